@@ -0,0 +1,68 @@
+"""Compare stream copy vs. re-encoding in `extract_audio`.
+
+Generates Telegram-like video notes (square H.264 video, AAC audio) of a few
+lengths with ffmpeg and times both extraction paths on each.
+
+Usage:
+    python -m benchmarks.bench_extract_audio [--runs N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import subprocess
+import tempfile
+import time
+
+from src.bot.services.audio import extract_audio
+
+DURATIONS = (15, 60, 180)
+
+
+def make_video_note(duration: int, directory: str) -> str:
+    path = os.path.join(directory, f"note_{duration}s.mp4")
+    subprocess.run(
+        [
+            "ffmpeg", "-y",
+            "-f", "lavfi", "-i", f"sine=frequency=220:duration={duration}",
+            "-f", "lavfi", "-i", f"testsrc=size=384x384:rate=30:duration={duration}",
+            "-c:v", "libx264", "-preset", "ultrafast",
+            "-c:a", "aac", "-b:a", "64k",
+            "-shortest", path,
+        ],
+        capture_output=True,
+        check=True,
+    )
+    return path
+
+
+async def time_extraction(path: str, allow_copy: bool, runs: int) -> tuple[float, int]:
+    best = float("inf")
+    size = 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        audio = await extract_audio(path, allow_copy=allow_copy)
+        best = min(best, time.perf_counter() - start)
+        size = os.path.getsize(audio.path)
+        os.remove(audio.path)
+    return best, size
+
+
+async def main(runs: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'note':>8} {'copy s':>8} {'encode s':>9} {'speedup':>8} "
+              f"{'copy KB':>8} {'encode KB':>9}")
+        for duration in DURATIONS:
+            path = make_video_note(duration, directory)
+            copy_t, copy_size = await time_extraction(path, True, runs)
+            enc_t, enc_size = await time_extraction(path, False, runs)
+            print(f"{duration:>7}s {copy_t:>8.3f} {enc_t:>9.3f} "
+                  f"{enc_t / copy_t:>7.1f}x {copy_size // 1024:>8} {enc_size // 1024:>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=3)
+    asyncio.run(main(parser.parse_args().runs))
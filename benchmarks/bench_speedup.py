@@ -0,0 +1,90 @@
+"""Measure what the link speed-up mode saves and what it costs in accuracy.
+
+For every sample file, each factor is run through `speed_up` and (when
+ELEVENLABS_API_KEY is set) transcribed. Reported per factor: upload size,
+end-to-end latency (speed-up + transcription), latency saved against 1.0x,
+word count and its drift from the 1.0x transcript. Without an API key only
+the ffmpeg side (time and upload size) is measured.
+
+Usage:
+    python -m benchmarks.bench_speedup FILE [FILE ...] [--factors 1.25 1.5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+
+from src.bot.services.audio import SPEECH_OPUS_ARGS, speed_up
+from src.bot.services.ffmpeg_scheduler import scheduler
+from src.bot.services.transcription import (
+    AsyncElevenLabsTranscriber,
+    AudioBuffer,
+    scale_timestamps,
+)
+
+
+async def baseline(path: str) -> AudioBuffer:
+    """The same speech profile at 1.0x, so only the tempo differs."""
+    _, stdout, _ = await scheduler.run(
+        "ffmpeg", "-i", path, "-vn", *SPEECH_OPUS_ARGS, "-f", "ogg", "pipe:1",
+        timeout=600,
+    )
+    return AudioBuffer(stdout, "baseline.ogg")
+
+
+async def run_file(
+    path: str, factors: list[float], client: AsyncElevenLabsTranscriber | None
+) -> None:
+    print(f"\n{os.path.basename(path)}")
+    print(f"{'factor':>7} {'upload KB':>10} {'ffmpeg s':>9} {'total s':>8} "
+          f"{'saved s':>8} {'words':>6} {'drift':>7} {'last word s':>12}")
+    reference: tuple[float, int] | None = None
+    for factor in [1.0, *factors]:
+        start = time.perf_counter()
+        audio = await (baseline(path) if factor == 1.0 else speed_up(path, factor, timeout=600))
+        prepared = time.perf_counter() - start
+
+        total = prepared
+        words = last = None
+        if client is not None:
+            result = scale_timestamps(await client.transcribe(audio), factor)
+            total = time.perf_counter() - start
+            spoken = [w for w in result.words if w.type == "word"]
+            words = len(spoken)
+            last = spoken[-1].end if spoken and spoken[-1].end is not None else None
+
+        if reference is None:
+            reference = (total, words or 0)
+        saved = reference[0] - total
+        drift = (
+            f"{(words - reference[1]) / reference[1]:+.1%}"
+            if words is not None and reference[1]
+            else "-"
+        )
+        print(f"{factor:>6.2f}x {len(audio.data) // 1024:>10} {prepared:>9.2f} "
+              f"{total:>8.2f} {saved:>8.2f} {words if words is not None else '-':>6} "
+              f"{drift:>7} {last if last is not None else '-':>12}")
+
+
+async def main(files: list[str], factors: list[float]) -> None:
+    api_key = os.environ.get("ELEVENLABS_API_KEY")
+    client = AsyncElevenLabsTranscriber(api_key) if api_key else None
+    if client is None:
+        print("ELEVENLABS_API_KEY not set: measuring ffmpeg only")
+    try:
+        for path in files:
+            await run_file(path, factors, client)
+    finally:
+        if client is not None:
+            await client.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--factors", type=float, nargs="+", default=[1.25, 1.5])
+    args = parser.parse_args()
+    asyncio.run(main(args.files, args.factors))
@@ -0,0 +1,57 @@
+"""Memory budget of `TranscriptionStore`: compression ratio and its cost.
+
+Saves long synthetic transcripts (see `bench_word_storage`) with
+compression forced on every entry but the newest, then reports the
+estimated bytes held hot vs compressed, the time to compress on `save`,
+and the time for the first read of a cold entry (inflate). The synthetic
+timestamps are full-precision random floats, so the ratio is a lower bound.
+
+Usage:
+    python -m benchmarks.bench_store_budget [--minutes 60] [--entries 20]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from benchmarks.bench_word_storage import make_words
+from src.bot.services.transcription import WordTable
+from src.bot.storage.transcription_store import TranscriptionStore
+
+
+def main(minutes: int, entries: int) -> None:
+    words = WordTable.from_words(make_words(minutes))
+    text = "".join(words.text_of(i) for i in range(len(words)))
+
+    hot = TranscriptionStore(ttl_seconds=3600)
+    for i in range(entries):
+        hot.save(1, i, text, words)
+    hot_bytes = hot.metrics()["transcription_store_bytes"]
+
+    # Anything idle for more than a nanosecond: all but the newest entry.
+    cold = TranscriptionStore(ttl_seconds=3600, compress_after=1e-9)
+    start = time.perf_counter()
+    for i in range(entries):
+        cold.save(1, i, text, words)
+    save_ms = (time.perf_counter() - start) / entries * 1000
+    metrics = cold.metrics()
+
+    start = time.perf_counter()
+    cold.get(1, 0)
+    inflate_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{entries} transcripts of {minutes} min ({len(words)} tokens each)")
+    print(f"  hot:        {hot_bytes / 2**20:8.2f} MiB")
+    print(f"  compressed: {metrics['transcription_store_bytes'] / 2**20:8.2f} MiB "
+          f"({hot_bytes / metrics['transcription_store_bytes']:.1f}x smaller, "
+          f"{metrics['transcription_store_compressed']} cold)")
+    print(f"  save + compress: {save_ms:.2f} ms/entry, first cold read: {inflate_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--minutes", type=int, default=60)
+    parser.add_argument("--entries", type=int, default=20)
+    args = parser.parse_args()
+    main(args.minutes, args.entries)
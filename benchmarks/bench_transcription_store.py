@@ -0,0 +1,76 @@
+"""Per-operation cost of `TranscriptionStore` as it fills up.
+
+Fills the store with N live transcripts, then times `save` (new key),
+`get` and `get_words` (hits). Times should stay flat as N grows. For
+contrast, the same operations run against the previous implementation,
+which swept the whole dict on every call.
+
+Usage:
+    python -m benchmarks.bench_transcription_store [--ops N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from collections.abc import Callable
+
+from src.bot.storage.transcription_store import TranscriptionStore
+
+SIZES = (1_000, 10_000, 100_000)
+
+
+class FullScanStore(TranscriptionStore):
+    """The old behaviour: an O(n) expiry scan before every operation."""
+
+    def _full_scan(self) -> None:
+        now = time.monotonic()
+        expired = [k for k, e in self._store.items() if now - e.saved_at > self._ttl]
+        for k in expired:
+            self._drop(k)
+
+    def save(self, user_id: int, message_id: int, text: str, words=None) -> None:  # type: ignore[no-untyped-def]
+        self._full_scan()
+        super().save(user_id, message_id, text, words)
+
+    def get(self, user_id: int, message_id: int) -> str | None:
+        self._full_scan()
+        return super().get(user_id, message_id)
+
+    def get_words(self, user_id: int, message_id: int):  # type: ignore[no-untyped-def]
+        self._full_scan()
+        return super().get_words(user_id, message_id)
+
+
+def per_op_us(op: Callable[[int], object], ops: int) -> float:
+    start = time.perf_counter()
+    for i in range(ops):
+        op(i)
+    return (time.perf_counter() - start) / ops * 1e6
+
+
+def measure(store: TranscriptionStore, size: int, ops: int) -> tuple[float, float, float]:
+    for i in range(size):  # fill without the per-call scan, which is O(n^2)
+        TranscriptionStore.save(store, i, 1, "text")
+    save = per_op_us(lambda i: store.save(size + i, 1, "text"), ops)
+    get = per_op_us(lambda i: store.get(i % size, 1), ops)
+    words = per_op_us(lambda i: store.get_words(i % size, 1), ops)
+    return save, get, words
+
+
+def main(ops: int) -> None:
+    print(f"{'entries':>8} {'store':>10} {'save us':>9} {'get us':>9} {'words us':>9}")
+    for size in SIZES:
+        for name, store, n in (
+            ("ordered", TranscriptionStore(ttl_seconds=3600), ops),
+            ("full-scan", FullScanStore(ttl_seconds=3600), max(ops // 100, 10)),
+        ):
+            save, get, words = measure(store, size, n)
+            print(f"{size:>8} {name:>10} {save:>9.2f} {get:>9.2f} {words:>9.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ops", type=int, default=20_000)
+    args = parser.parse_args()
+    main(args.ops)
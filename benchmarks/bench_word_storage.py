@@ -0,0 +1,77 @@
+"""Memory held by a transcript's word data: list of WordData vs WordTable.
+
+Builds a synthetic diarized transcript (word + spacing tokens, a few
+speakers, ~150 words per minute) and measures with tracemalloc what each
+representation keeps alive, plus the time `generate_srt` takes on each.
+
+Usage:
+    python -m benchmarks.bench_word_storage [--minutes 15 60 180]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+import tracemalloc
+from collections.abc import Callable
+
+from src.bot.services.export import generate_srt
+from src.bot.services.transcription import WordData, WordTable
+
+VOCABULARY = [
+    "the", "meeting", "is", "moved", "to", "Thursday", "because", "budget",
+    "review", "needs", "another", "week", "and", "we", "should", "invite",
+]
+
+
+def make_words(minutes: int) -> list[WordData]:
+    """Fresh objects per token, as parsed from the provider's JSON."""
+    rng = random.Random(minutes)
+    words: list[WordData] = []
+    t = 0.0
+    speaker = "speaker_0"
+    for _ in range(minutes * 150):
+        if rng.random() < 0.05:
+            speaker = f"speaker_{rng.randrange(4)}"
+        duration = rng.uniform(0.15, 0.45)
+        words.append(WordData("".join(rng.choice(VOCABULARY)), t, t + duration, speaker))
+        words.append(WordData(" ", t + duration, t + duration + 0.05, speaker, "spacing"))
+        t += duration + 0.05
+    return words
+
+
+def retained(build: Callable[[], object]) -> tuple[object, int]:
+    tracemalloc.start()
+    value = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, size
+
+
+def main(minutes: list[int]) -> None:
+    print(f"{'minutes':>7} {'tokens':>7} {'list KB':>9} {'table KB':>9} {'ratio':>6} "
+          f"{'srt list ms':>11} {'srt table ms':>12}")
+    for m in minutes:
+        words, list_bytes = retained(lambda m=m: make_words(m))
+        assert isinstance(words, list)
+        # Measured from fresh objects so the table doesn't share their strings.
+        table, table_bytes = retained(lambda m=m: WordTable.from_words(make_words(m)))
+        assert isinstance(table, WordTable)
+
+        start = time.perf_counter()
+        generate_srt(words)
+        srt_list = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        generate_srt(table)
+        srt_table = (time.perf_counter() - start) * 1000
+
+        print(f"{m:>7} {len(words):>7} {list_bytes // 1024:>9} {table_bytes // 1024:>9} "
+              f"{list_bytes / table_bytes:>5.1f}x {srt_list:>11.1f} {srt_table:>12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--minutes", type=int, nargs="+", default=[15, 60, 180])
+    args = parser.parse_args()
+    main(args.minutes)
@@ -27,20 +27,92 @@ class Settings(BaseSettings):
     # How long audio downloaded from a link stays on disk for the
     # "Download audio" / "Transcribe" buttons.
     link_audio_ttl: int = 3600
+    # Disk budget for that audio; the least recently used files are deleted
+    # to stay under it. 0 = no limit.
+    link_audio_max_bytes: int = 1024 * 1024 * 1024
+
+    # Persistent cache of finished transcripts keyed by Telegram's
+    # file_unique_id, so forwarded copies of a voice note are transcribed
+    # once. Disabled unless a path is set (transcripts are then kept on disk).
+    transcript_cache_path: str = ""
+    transcript_cache_ttl: int = 7 * 86400
+    transcript_cache_max_bytes: int = 200 * 1024 * 1024
+
+    # Long-term copy of the transcripts behind the Summarize / Save as file
+    # buttons, so they keep working after `transcription_ttl` and across
+    # restarts. Disabled unless a path is set (transcripts are then kept on disk).
+    transcript_archive_path: str = ""
+    transcript_archive_ttl: int = 7 * 86400
 
     admin_user_ids: list[int] = []
     database_path: str = "./stats.db"
+    # Usage/error stats are committed in batches every this many ms, or once
+    # this many writes are queued. 0 commits every write immediately.
+    stats_flush_ms: int = 250
+    stats_flush_max_rows: int = 100
+    # Read-only connections serving stats queries (WAL mode), so admin
+    # reports don't queue behind writes. 0 reads through the writer.
+    stats_read_connections: int = 2
+    # Raw error records (with details) kept for /stats and debugging; older
+    # or surplus rows are dropped, per-type counters are kept. 0 = no limit.
+    error_log_max_rows: int = 10_000
+    error_log_max_age_days: int = 90
     max_audio_duration: int = 3600
     transcription_ttl: int = 600
+    # Transcripts kept for the export/summary buttons: those not used for
+    # this many seconds are compressed in memory, and the least recently used
+    # are dropped once the (estimated) total passes the budget. 0 = off.
+    transcription_store_compress_after: int = 120
+    transcription_store_max_bytes: int = 64 * 1024 * 1024
     log_level: str = "INFO"
     health_port: int = 8080
 
+    # Updates from different chats are handled concurrently, up to this many
+    # at once; updates within one chat keep their order.
+    max_concurrent_updates: int = 64
+
     # Timeouts in seconds
     transcription_timeout: int = 900  # 15 min (long audio can take a while)
     summarization_timeout: int = 60
     ffmpeg_timeout: int = 120
     file_download_timeout: int = 60
 
+    # ffmpeg/ffprobe processes running at once (0 = one per available core);
+    # further jobs queue. Jobs run at this much lower OS priority (nice).
+    ffmpeg_max_jobs: int = 0
+    ffmpeg_niceness: int = 10
+
+    # Files up to this size are downloaded, converted and uploaded in memory
+    # without touching the disk. 0 always uses temp files.
+    in_memory_audio_max_bytes: int = 8 * 1024 * 1024
+
+    # Re-encode bulky uploads (WAV, FLAC, high-bitrate MP3, extracted video
+    # audio) to mono 16 kHz Opus when that at least cuts the payload by 30%.
+    compact_audio_uploads: bool = True
+
+    # Cut leading/trailing silence and shorten long pauses before upload;
+    # audio with no speech at all is rejected without calling the API.
+    trim_silence: bool = True
+
+    # Play linked lectures/podcasts (5 min and longer) back this much faster
+    # before transcription, between 1.0 (off) and 2.0; 1.25-1.5 keeps
+    # accuracy. Timestamps are scaled back to the original media.
+    link_speedup: float = 1.0
+
+    # Audio longer than twice this is cut at pauses into chunks of about this
+    # many seconds, transcribed in parallel. 0 disables chunking.
+    long_audio_chunk_seconds: int = 600
+
+    # Transcription uploads in flight at once; further jobs wait their turn.
+    transcription_max_concurrency: int = 32
+
+    @field_validator("link_speedup")
+    @classmethod
+    def check_link_speedup(cls, v: float) -> float:
+        if not 1.0 <= v <= 2.0:
+            raise ValueError("link_speedup must be between 1.0 and 2.0")
+        return v
+
     @field_validator("admin_user_ids", mode="before")
     @classmethod
     def parse_admin_ids(cls, v: object) -> list[int]:
@@ -1,4 +1,5 @@
 import asyncio
+import csv
 import io
 import logging
 import os
@@ -16,10 +17,12 @@ from telegram import (
     User,
 )
 from telegram.constants import ChatAction, ParseMode
-from telegram.error import BadRequest, NetworkError
+from telegram.error import BadRequest, NetworkError, TelegramError
 from telegram.ext import ContextTypes
 
 from src.bot.keyboards import (
+    CALLBACK_ADMIN_USERS,
+    CALLBACK_ADMIN_USERS_CSV,
     CALLBACK_EXPORT_SRT,
     CALLBACK_EXPORT_TXT,
     CALLBACK_LINK_AUDIO,
@@ -27,6 +30,7 @@ from src.bot.keyboards import (
     CALLBACK_SAVE_FILE,
     CALLBACK_SECRETARY_SETUP,
     CALLBACK_SUMMARIZE,
+    admin_users_keyboard,
     donation_keyboard,
     file_format_keyboard,
     link_audio_keyboard,
@@ -37,8 +41,15 @@ from src.bot.keyboards import (
     strip_audio_button,
 )
 from src.bot.locales import t
-from src.bot.services.audio import extract_audio, get_audio_duration
+from src.bot.services.audio import (
+    compact_for_upload,
+    extract_audio,
+    extract_audio_buffer,
+    get_audio_duration,
+    speed_up,
+)
 from src.bot.services.export import generate_html, generate_srt, generate_txt
+from src.bot.services.long_audio import transcribe_long_audio
 from src.bot.services.media_download import (
     MediaDownloadError,
     MediaLink,
@@ -47,14 +58,22 @@ from src.bot.services.media_download import (
     find_link,
 )
 from src.bot.services.notifier import AdminNotifier
+from src.bot.services.silence import TrimmedAudio, trim_silence
 from src.bot.services.summarization import SummarizationClient
 from src.bot.services.transcription import (
+    AsyncTranscriptionClient,
+    AudioBuffer,
+    AudioSource,
     EmptyTranscriptionError,
     TranscriptionClient,
     TranscriptionResult,
+    scale_timestamps,
+    transcribe_file,
+    transcription_slot,
 )
 from src.bot.storage.media_audio_store import MediaAudioStore
 from src.bot.storage.statistics import StatisticsDB
+from src.bot.storage.transcript_cache import CachedTranscript, TranscriptCache
 from src.bot.storage.transcription_store import TranscriptionStore
 from src.bot.utils.retry import with_network_retry
 from src.bot.utils.text import TELEGRAM_MAX_LENGTH, format_duration, split_message
@@ -75,6 +94,17 @@ DONATION_DURATION_THRESHOLD = 60
 # picks between transcription and just getting the audio file.
 LINK_CHOICE_DURATION_THRESHOLD = 20 * 60
 
+# With a link speed-up configured, only audio at least this long (seconds) —
+# lectures, podcasts — is played back faster for transcription.
+LINK_SPEEDUP_MIN_DURATION = 5 * 60
+
+# Windows (in days) of the usage summary admins get with /stats.
+STATS_WINDOWS_DAYS = (1, 7, 30)
+
+# Users per page of the admin user report; well under Telegram's 4096-char
+# message limit even with long usernames.
+USER_REPORT_PAGE_SIZE = 25
+
 # Telegram's upload limit for bots.
 TELEGRAM_MAX_UPLOAD_BYTES = 50 * 1024 * 1024
 
@@ -123,7 +153,7 @@ class BotHandlers:
 
     def __init__(
         self,
-        transcriber: TranscriptionClient,
+        transcriber: TranscriptionClient | AsyncTranscriptionClient,
         summarizer: SummarizationClient,
         notifier: AdminNotifier,
         store: TranscriptionStore,
@@ -132,8 +162,14 @@ class BotHandlers:
         transcription_timeout: int = 900,
         ffmpeg_timeout: int = 120,
         file_download_timeout: int = 60,
+        long_audio_chunk_seconds: int = 0,
+        in_memory_audio_max_bytes: int = 0,
+        compact_audio_uploads: bool = False,
+        trim_silence: bool = False,
+        link_speedup: float = 1.0,
         media_resolvers: dict[str, RapidAPIMediaResolver] | None = None,
         media_audio_store: MediaAudioStore | None = None,
+        transcript_cache: TranscriptCache | None = None,
     ) -> None:
         self._transcriber = transcriber
         self._summarizer = summarizer
@@ -144,8 +180,14 @@ class BotHandlers:
         self._transcription_timeout = transcription_timeout
         self._ffmpeg_timeout = ffmpeg_timeout
         self._file_download_timeout = file_download_timeout
+        self._long_audio_chunk_seconds = long_audio_chunk_seconds
+        self._in_memory_audio_max_bytes = in_memory_audio_max_bytes
+        self._compact_audio_uploads = compact_audio_uploads
+        self._trim_silence = trim_silence
+        self._link_speedup = link_speedup
         self._media_resolvers = media_resolvers or {}
         self._media_audio = media_audio_store or MediaAudioStore()
+        self._transcript_cache = transcript_cache
 
     async def start(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         if not update.message or not update.effective_user:
@@ -230,7 +272,7 @@ class BotHandlers:
                 return
 
             try:
-                audio_path = await extract_audio(
+                extracted = await extract_audio(
                     media_path, timeout=self._ffmpeg_timeout
                 )
             except RuntimeError as e:
@@ -245,9 +287,9 @@ class BotHandlers:
                 )
                 return
 
-            measured = await get_audio_duration(audio_path)
-            if measured is not None:
-                duration = int(measured)
+            audio_path = extracted.path
+            if extracted.duration is not None:
+                duration = int(extracted.duration)
 
             # The audio stays on disk so the "Download audio" button (and, for
             # long videos, "Transcribe") can still use it later.
@@ -275,9 +317,12 @@ class BotHandlers:
                 t("transcribing", lang),
                 reply_markup=link_audio_keyboard(message.message_id, lang),
             )
-            await self._transcribe_link_audio(
-                message, user, keep_path, duration, processing_msg
-            )
+            # Pinned so a concurrent save can't evict the file mid-transcription.
+            with self._media_audio.use(user.id, message.message_id):
+                await self._transcribe_link_audio(
+                    message, user, keep_path, duration, processing_msg,
+                    compacted=keep_path == audio_path and extracted.compacted,
+                )
             logger.info(
                 "Transcribed link for user %s (%d): %s", user.username, user.id, link.url
             )
@@ -307,11 +352,19 @@ class BotHandlers:
         audio_path: str,
         duration: int | None,
         processing_msg: Message,
+        *,
+        compacted: bool = False,
     ) -> None:
         """Transcribe already-downloaded link audio and reply with the result."""
         lang = user.language_code or "en"
+        speed = 1.0
+        if duration is not None and duration >= LINK_SPEEDUP_MIN_DURATION:
+            speed = self._link_speedup
         transcript = await self._run_transcription(
-            audio_path, duration, user, lang, processing_msg
+            audio_path, duration, user, lang, processing_msg,
+            reply_markup=link_audio_keyboard(message.message_id, lang),
+            speed=speed,
+            compacted=compacted,
         )
         if transcript is None:
             return
@@ -339,47 +392,54 @@ class BotHandlers:
     ) -> None:
         """Handle the Transcribe button on a long linked video."""
         lang = user.language_code or "en"
-        audio = self._media_audio.get(user.id, original_message_id)
-        if audio is None or query.message is None:
-            await self._expire_link_audio(query, lang)
-            return
+        with self._media_audio.use(user.id, original_message_id) as audio:
+            if audio is None or query.message is None:
+                await self._expire_link_audio(query, lang)
+                return
 
-        processing_msg = query.message
-        assert isinstance(processing_msg, Message)
-        await processing_msg.edit_text(
-            t("transcribing", lang),
-            reply_markup=link_audio_keyboard(original_message_id, lang),
-        )
-        reply_target = processing_msg.reply_to_message or processing_msg
-        await self._transcribe_link_audio(
-            reply_target, user, audio.path, audio.duration, processing_msg
-        )
+            processing_msg = query.message
+            assert isinstance(processing_msg, Message)
+            await processing_msg.edit_text(
+                t("transcribing", lang),
+                reply_markup=link_audio_keyboard(original_message_id, lang),
+            )
+            reply_target = processing_msg.reply_to_message or processing_msg
+            await self._transcribe_link_audio(
+                reply_target, user, audio.path, audio.duration, processing_msg
+            )
 
     async def _handle_link_audio(
         self, query: CallbackQuery, user: User, original_message_id: int
     ) -> None:
         """Send the downloaded audio file as a Telegram audio message."""
         lang = user.language_code or "en"
-        audio = self._media_audio.get(user.id, original_message_id)
-        if audio is None or query.message is None:
-            await self._expire_link_audio(query, lang)
-            return
+        with self._media_audio.use(user.id, original_message_id) as audio:
+            if audio is None or query.message is None:
+                await self._expire_link_audio(query, lang)
+                return
 
-        message = query.message
-        assert isinstance(message, Message)
-        if os.path.getsize(audio.path) > TELEGRAM_MAX_UPLOAD_BYTES:
-            await query.edit_message_reply_markup(
-                reply_markup=strip_audio_button(message.reply_markup)
-            )
-            await message.reply_text(t("link_audio_too_big", lang))
-            return
+            message = query.message
+            assert isinstance(message, Message)
+            if audio.size > TELEGRAM_MAX_UPLOAD_BYTES:
+                await query.edit_message_reply_markup(
+                    reply_markup=strip_audio_button(message.reply_markup)
+                )
+                await message.reply_text(t("link_audio_too_big", lang))
+                return
 
-        with open(audio.path, "rb") as fh:
-            await message.reply_audio(
-                audio=fh,
-                filename=f"audio{os.path.splitext(audio.path)[1]}",
-                duration=audio.duration,
-            )
+            try:
+                fh = open(audio.path, "rb")
+            except FileNotFoundError:
+                # Removed behind the store's back since the last sweep.
+                self._media_audio.discard(user.id, original_message_id)
+                await self._expire_link_audio(query, lang)
+                return
+            with fh:
+                await message.reply_audio(
+                    audio=fh,
+                    filename=f"audio{os.path.splitext(audio.path)[1]}",
+                    duration=audio.duration,
+                )
         await query.edit_message_reply_markup(
             reply_markup=strip_audio_button(message.reply_markup)
         )
@@ -391,24 +451,76 @@ class BotHandlers:
 
     async def _run_transcription(
         self,
-        audio_path: str,
+        audio: AudioSource,
         duration: int | None,
         user: User,
         lang: str,
         processing_msg: Message,
+        reply_markup: InlineKeyboardMarkup | None = None,
+        speed: float = 1.0,
+        compacted: bool = False,
     ) -> TranscriptionResult | None:
-        """Transcribe `audio_path`, reporting failures to the user and admins.
+        """Transcribe `audio`, reporting failures to the user and admins.
+
+        The upload is prepared first (see `_prepare_upload`; `compacted`
+        audio is already in the speech profile), optionally played back
+        `speed` times faster. Long audio is transcribed in
+        parallel chunks, with `processing_msg` (keeping `reply_markup`)
+        updated as each chunk finishes. Timestamps in the result always refer
+        to the original audio.
 
         Returns None when transcription failed; the user has already been told.
         """
-        for attempt in range(2):
+        chunked = bool(
+            self._long_audio_chunk_seconds
+            and duration
+            and duration > 2 * self._long_audio_chunk_seconds
+        )
+
+        async def report_progress(done: int, total: int) -> None:
             try:
-                return await asyncio.wait_for(
-                    asyncio.to_thread(self._transcriber.transcribe, audio_path),
-                    timeout=self._transcription_timeout,
+                await processing_msg.edit_text(
+                    t("transcribing_progress", lang, done=done, total=total),
+                    reply_markup=reply_markup,
                 )
-            except TimeoutError:
+            except TelegramError as e:
+                # Progress is cosmetic ("message is not modified", flood
+                # limits); the transcription carries on regardless.
+                logger.debug("Progress update failed: %s", e)
+
+        trim: TrimmedAudio | None = None
+        for attempt in range(2):
+            try:
                 if attempt == 0:
+                    # Rejects silent audio before anything is uploaded.
+                    audio, trim, speed = await self._prepare_upload(
+                        audio, duration, user, chunked=chunked, speed=speed,
+                        compacted=compacted,
+                    )
+                if chunked:
+                    assert duration is not None
+                    result = await transcribe_long_audio(
+                        self._transcriber,
+                        audio,
+                        duration / speed,
+                        chunk_seconds=self._long_audio_chunk_seconds,
+                        chunk_timeout=self._transcription_timeout,
+                        ffmpeg_timeout=self._ffmpeg_timeout,
+                        on_progress=report_progress,
+                    )
+                else:
+                    # The timeout starts once an upload slot is free.
+                    async with transcription_slot(self._transcriber):
+                        result = await asyncio.wait_for(
+                            transcribe_file(self._transcriber, audio),
+                            timeout=self._transcription_timeout,
+                        )
+                if trim is not None:
+                    result = trim.remap(result)
+                return scale_timestamps(result, speed)
+            except TimeoutError:
+                # Chunked mode already retried the chunk that timed out.
+                if attempt == 0 and not chunked:
                     logger.warning(
                         "Transcription timed out for user %s, retrying",
                         user.username,
@@ -454,6 +566,64 @@ class BotHandlers:
                 return None
         return None
 
+    async def _prepare_upload(
+        self,
+        audio: AudioSource,
+        duration: int | None,
+        user: User,
+        *,
+        chunked: bool,
+        speed: float = 1.0,
+        compacted: bool = False,
+    ) -> tuple[AudioSource, TrimmedAudio | None, float]:
+        """Speed up, trim silence from and/or compact `audio` for upload.
+
+        Returns the audio to upload, the silence trim to undo on its
+        timestamps, and the speed actually applied (1.0 if the speed-up
+        failed). Sped-up and trimmed audio is already in the speech profile,
+        as is `compacted` audio, so it skips the compaction step. Chunked jobs are cut at pauses
+        anyway and are not trimmed. Raises EmptyTranscriptionError for silent
+        audio.
+        """
+        encoded = compacted
+        if speed != 1.0:
+            try:
+                audio = await speed_up(audio, speed, timeout=self._ffmpeg_timeout)
+                encoded = True
+                logger.info(
+                    "Sped up audio %.2fx for user %s", speed, user.username
+                )
+            except RuntimeError as e:
+                logger.warning("Speed-up failed, using normal speed: %s", e)
+                speed = 1.0
+
+        trim: TrimmedAudio | None = None
+        if self._trim_silence and not chunked:
+            trim = await trim_silence(audio, timeout=self._ffmpeg_timeout)
+            if trim.segments:
+                logger.info(
+                    "Trimmed %.1fs of silence for user %s",
+                    trim.removed_seconds,
+                    user.username,
+                )
+                audio = trim.source
+                encoded = True
+
+        if self._compact_audio_uploads and not encoded:
+            result = await compact_for_upload(
+                audio, duration, timeout=self._ffmpeg_timeout
+            )
+            if result.saved_bytes:
+                logger.info(
+                    "Compacted upload for user %s: %d -> %d bytes (saved %d)",
+                    user.username,
+                    result.original_bytes,
+                    result.upload_bytes,
+                    result.saved_bytes,
+                )
+            audio = result.source
+        return audio, trim, speed
+
     async def handle_audio(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
     ) -> None:
@@ -466,6 +636,7 @@ class BotHandlers:
 
         # Determine file_id and duration from the incoming message
         file_id: str | None = None
+        file_unique_id: str | None = None
         duration: int | None = None
         is_video = False
 
@@ -473,24 +644,29 @@ class BotHandlers:
 
         if message.voice:
             file_id = message.voice.file_id
+            file_unique_id = message.voice.file_unique_id
             duration = message.voice.duration
             file_type = "voice message"
         elif message.video_note:
             file_id = message.video_note.file_id
+            file_unique_id = message.video_note.file_unique_id
             duration = message.video_note.duration
             is_video = True
             file_type = "video note"
         elif message.audio:
             file_id = message.audio.file_id
+            file_unique_id = message.audio.file_unique_id
             duration = message.audio.duration
             file_type = "audio file"
         elif message.video:
             file_id = message.video.file_id
+            file_unique_id = message.video.file_unique_id
             duration = message.video.duration
             is_video = True
             file_type = "video"
         elif message.document:
             file_id = message.document.file_id
+            file_unique_id = message.document.file_unique_id
             duration = None
             file_type = "document"
 
@@ -516,6 +692,36 @@ class BotHandlers:
             )
             return
 
+        # Same file transcribed before (e.g. a forwarded voice note) — answer
+        # from the cache without downloading or calling the provider. A cache
+        # failure only costs the shortcut.
+        cached: CachedTranscript | None = None
+        if self._transcript_cache is not None and file_unique_id:
+            try:
+                cached = await self._transcript_cache.get(file_unique_id)
+            except Exception:
+                logger.exception("Transcript cache lookup failed")
+        if cached is not None:
+            duration = duration or cached.duration
+            self._store.save(
+                user.id, message.message_id,
+                cached.result.text, cached.result.words,
+            )
+            await self._stats_db.record_usage(
+                user.id, user.username, duration or 0
+            )
+            await _send_transcript(
+                message,
+                cached.result.text,
+                lang,
+                post_transcription_keyboard(message.message_id, lang),
+            )
+            logger.info(
+                "Served cached transcript for user %s (%d)",
+                user.username, user.id,
+            )
+            return
+
         # Send a "processing" message and show typing indicator
         await context.bot.send_chat_action(
             chat_id=message.chat_id, action=ChatAction.TYPING
@@ -590,13 +796,32 @@ class BotHandlers:
                     return
                 raise
             ext = (tg_file.file_path or "").rsplit(".", 1)[-1] if tg_file.file_path else "ogg"
-            file_path = os.path.join(tempfile.gettempdir(), f"{uuid.uuid4()}.{ext}")
+            # Small files never touch the disk: they are downloaded into
+            # memory, piped through ffmpeg if needed and uploaded from there.
+            in_memory = bool(
+                self._in_memory_audio_max_bytes
+                and tg_file.file_size
+                and tg_file.file_size <= self._in_memory_audio_max_bytes
+            )
+            data: bytes | None = None
             try:
-                await with_network_retry(
-                    lambda: tg_file.download_to_drive(custom_path=file_path),
-                    timeout=self._file_download_timeout,
-                    description="download_to_drive",
-                )
+                if in_memory:
+                    data = bytes(
+                        await with_network_retry(
+                            lambda: tg_file.download_as_bytearray(),
+                            timeout=self._file_download_timeout,
+                            description="download_as_bytearray",
+                        )
+                    )
+                else:
+                    file_path = os.path.join(
+                        tempfile.gettempdir(), f"{uuid.uuid4()}.{ext}"
+                    )
+                    await with_network_retry(
+                        lambda: tg_file.download_to_drive(custom_path=file_path),
+                        timeout=self._file_download_timeout,
+                        description="download_to_drive",
+                    )
             except TimeoutError:
                 await processing_msg.edit_text(
                     t("download_timeout", lang)
@@ -629,11 +854,26 @@ class BotHandlers:
                 return
 
             # Extract audio from video if needed
+            audio: AudioSource
+            measured: float | None = None
+            compacted = False
             if is_video:
                 try:
-                    audio_path = await extract_audio(
-                        file_path, timeout=self._ffmpeg_timeout
-                    )
+                    if data is not None:
+                        buffered = await extract_audio_buffer(
+                            data, timeout=self._ffmpeg_timeout
+                        )
+                        audio = buffered.audio
+                        measured = buffered.duration
+                        compacted = buffered.compacted
+                    else:
+                        assert file_path is not None
+                        extracted = await extract_audio(
+                            file_path, timeout=self._ffmpeg_timeout
+                        )
+                        audio = audio_path = extracted.path
+                        measured = extracted.duration
+                        compacted = extracted.compacted
                 except RuntimeError as e:
                     msg_key = (
                         "video_timeout"
@@ -650,12 +890,18 @@ class BotHandlers:
                         "Audio extraction", user.username, str(e)
                     )
                     return
+            elif data is not None:
+                audio = AudioBuffer(data, f"audio.{ext}")
             else:
-                audio_path = file_path
+                assert file_path is not None
+                audio = file_path
 
             # Get actual duration if not provided by Telegram
             if duration is None:
-                measured = await get_audio_duration(audio_path)
+                if not is_video:
+                    measured = await get_audio_duration(
+                        audio.data if isinstance(audio, AudioBuffer) else audio
+                    )
                 if measured is not None:
                     duration = int(measured)
                     if duration > self._max_audio_duration:
@@ -677,7 +923,9 @@ class BotHandlers:
 
             # Transcribe (with one automatic retry on timeout)
             transcript = await self._run_transcription(
-                audio_path, duration, user, lang, processing_msg
+                audio, duration, user, lang, processing_msg,
+                reply_markup=donation_keyboard(lang) if show_donation else None,
+                compacted=compacted,
             )
             if transcript is None:
                 return
@@ -703,6 +951,16 @@ class BotHandlers:
                 post_transcription_keyboard(original_message_id, lang),
             )
 
+            # Only after the reply: a failing cache must not cost the user
+            # a transcript that was already paid for.
+            if self._transcript_cache is not None and file_unique_id:
+                try:
+                    await self._transcript_cache.put(
+                        file_unique_id, transcript, duration
+                    )
+                except Exception:
+                    logger.exception("Failed to cache transcript")
+
             logger.info(
                 "Transcribed audio for user %s (%d), duration=%s",
                 user.username,
@@ -766,6 +1024,11 @@ class BotHandlers:
                 )
             return
 
+        if data == CALLBACK_ADMIN_USERS_CSV:
+            if user.id in self._admin_ids and isinstance(query.message, Message):
+                await self._send_user_report_csv(query.message)
+            return
+
         parts = data.split(":")
         if len(parts) != 2:
             return
@@ -786,6 +1049,11 @@ class BotHandlers:
             await self._handle_link_transcribe(query, user, original_message_id)
         elif action == CALLBACK_LINK_AUDIO:
             await self._handle_link_audio(query, user, original_message_id)
+        elif action == CALLBACK_ADMIN_USERS and user.id in self._admin_ids:
+            users = await self._stats_db.count_report_users()
+            if users:
+                text, markup = await self._user_report_page(original_message_id, users)
+                await query.edit_message_text(text, reply_markup=markup)
 
     async def _handle_summarize(
         self,
@@ -801,12 +1069,13 @@ class BotHandlers:
 
         lang = user.language_code or "en"
 
-        transcript = self._store.get(user.id, original_message_id)
-        if transcript is None:
+        entry = await self._store.load(user.id, original_message_id)
+        if entry is None:
             await query.edit_message_reply_markup(reply_markup=None)
             if query.message:
                 await query.message.reply_text(t("transcription_expired", lang))
             return
+        transcript, _ = entry
 
         await query.edit_message_reply_markup(reply_markup=None)
 
@@ -847,8 +1116,8 @@ class BotHandlers:
 
         lang = user.language_code or "en"
 
-        transcript = self._store.get(user.id, original_message_id)
-        if transcript is None:
+        # Also brings an archived transcript back into memory for the export.
+        if await self._store.load(user.id, original_message_id) is None:
             await query.edit_message_reply_markup(reply_markup=None)
             if query.message:
                 await query.message.reply_text(t("transcription_expired", lang))
@@ -873,12 +1142,13 @@ class BotHandlers:
 
         lang = user.language_code or "en"
 
-        transcript = self._store.get(user.id, original_message_id)
-        if transcript is None:
+        entry = await self._store.load(user.id, original_message_id)
+        if entry is None:
             await query.edit_message_reply_markup(reply_markup=None)
             if query.message:
                 await query.message.reply_text(t("transcription_expired", lang))
             return
+        transcript, words = entry
 
         await query.edit_message_reply_markup(reply_markup=None)
 
@@ -886,7 +1156,6 @@ class BotHandlers:
             content = generate_txt(transcript)
             filename = "transcription.txt"
         else:
-            words = self._store.get_words(user.id, original_message_id)
             if not words:
                 if query.message:
                     await query.message.reply_text(
@@ -1051,62 +1320,79 @@ class BotHandlers:
 
         # Admin: show all users + error stats
         if user.id in self._admin_ids:
-            all_direct = await self._stats_db.get_all_stats()
-            all_sec = await self._stats_db.get_all_secretary_stats()
-
-            # Build combined per-user stats
-            user_data: dict[int, dict[str, object]] = {}
-            for uid, uname, count, dur, _, last in all_direct:
-                user_data[uid] = {
-                    "name": uname, "d_count": count, "d_dur": dur,
-                    "s_count": 0, "s_dur": 0, "last": last,
-                }
-            for uid, uname, count, dur, _, last in all_sec:
-                if uid in user_data:
-                    entry = user_data[uid]
-                    entry["s_count"] = count
-                    entry["s_dur"] = dur
-                    if last and (not entry["last"] or last > entry["last"]):  # type: ignore[operator]
-                        entry["last"] = last
-                else:
-                    user_data[uid] = {
-                        "name": uname, "d_count": 0, "d_dur": 0,
-                        "s_count": count, "s_dur": dur, "last": last,
-                    }
-
-            if user_data:
-                admin_lines = ["All users:"]
-                for uid, d in sorted(
-                    user_data.items(),
-                    key=lambda x: x[1]["last"] or "",  # type: ignore[arg-type]
-                    reverse=True,
-                ):
-                    name = d["name"] or uid
-                    d_count = d["d_count"]
-                    s_count = d["s_count"]
-                    total = int(d_count) + int(s_count)  # type: ignore[arg-type]
-                    total_dur = int(d["d_dur"]) + int(d["s_dur"])  # type: ignore[arg-type]
-                    parts = [f"@{name} | {total} msgs | {format_duration(total_dur)}"]
-                    if int(d_count) > 0 and int(s_count) > 0:  # type: ignore[arg-type]
-                        parts.append(f"(D:{d_count} S:{s_count})")
-                    elif int(s_count) > 0:  # type: ignore[arg-type]
-                        parts.append("(S)")
-                    parts.append(f"| last: {d['last']}")
-                    admin_lines.append(" ".join(parts))
-                await update.message.reply_text("\n".join(admin_lines))
+            users = await self._stats_db.count_report_users()
+            if users:
+                text, markup = await self._user_report_page(0, users)
+                await update.message.reply_text(text, reply_markup=markup)
             else:
                 await update.message.reply_text("No user stats found in database.")
 
+            windows = await asyncio.gather(
+                *(self._stats_db.get_usage_window(days) for days in STATS_WINDOWS_DAYS)
+            )
+            usage_lines = ["Usage (UTC days):"]
+            for days, (d_count, d_dur, s_count, s_dur, peak) in zip(
+                STATS_WINDOWS_DAYS, windows, strict=True
+            ):
+                line = (
+                    f"{days}d: {d_count + s_count} msgs | "
+                    f"{format_duration(d_dur + s_dur)} (D:{d_count} S:{s_count})"
+                )
+                if peak is not None:
+                    line += f" | peak {peak:02d}:00"
+                usage_lines.append(line)
+            await update.message.reply_text("\n".join(usage_lines))
+
             total_errors, by_type, last_error = (
                 await self._stats_db.get_error_stats()
             )
             if total_errors > 0:
+                recent = await self._stats_db.get_recent_error_counts(7)
                 err_lines = [f"Errors: {total_errors} total"]
                 for etype, ecount in sorted(by_type.items()):
-                    err_lines.append(f"  {etype}: {ecount}")
+                    err_lines.append(f"  {etype}: {ecount} (7d: {recent.get(etype, 0)})")
                 err_lines.append(f"Last error: {last_error}")
                 await update.message.reply_text("\n".join(err_lines))
 
+    async def _user_report_page(
+        self, page: int, users: int
+    ) -> tuple[str, InlineKeyboardMarkup]:
+        """Text and keyboard for one page of the admin user report."""
+        pages = -(-users // USER_REPORT_PAGE_SIZE)
+        page = min(max(page, 0), pages - 1)
+        rows = await self._stats_db.get_user_report(
+            page * USER_REPORT_PAGE_SIZE, USER_REPORT_PAGE_SIZE
+        )
+        lines = [f"All users ({users}), page {page + 1}/{pages}:"]
+        for uid, name, d_count, d_dur, s_count, s_dur, last in rows:
+            parts = [
+                f"@{name or uid} | {d_count + s_count} msgs | "
+                f"{format_duration(d_dur + s_dur)}"
+            ]
+            if d_count > 0 and s_count > 0:
+                parts.append(f"(D:{d_count} S:{s_count})")
+            elif s_count > 0:
+                parts.append("(S)")
+            parts.append(f"| last: {last}")
+            lines.append(" ".join(parts))
+        return "\n".join(lines), admin_users_keyboard(page, pages)
+
+    async def _send_user_report_csv(self, message: Message) -> None:
+        """Stream the full user report into a CSV document."""
+        with tempfile.TemporaryFile() as f:
+            text = io.TextIOWrapper(f, encoding="utf-8", newline="")
+            writer = csv.writer(text)
+            writer.writerow([
+                "user_id", "username", "direct_count", "direct_seconds",
+                "secretary_count", "secretary_seconds", "last_used_at",
+            ])
+            async for row in self._stats_db.iter_user_report():
+                writer.writerow(row)
+            text.flush()
+            text.detach()
+            f.seek(0)
+            await message.reply_document(f, filename="users.csv")
+
     async def logs_command(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
     ) -> None:
@@ -10,6 +10,8 @@ CALLBACK_SEC_TRANSCRIBE = "sec_transcribe"
 CALLBACK_SECRETARY_SETUP = "secretary_setup"
 CALLBACK_LINK_TRANSCRIBE = "link_transcribe"
 CALLBACK_LINK_AUDIO = "link_audio"
+CALLBACK_ADMIN_USERS = "admin_users"
+CALLBACK_ADMIN_USERS_CSV = "admin_users_csv"
 
 
 def post_transcription_keyboard(
@@ -94,6 +96,22 @@ def file_format_keyboard(message_id: int) -> InlineKeyboardMarkup:
     ])
 
 
+def admin_users_keyboard(page: int, pages: int) -> InlineKeyboardMarkup:
+    """Paging and CSV download for the admin user report."""
+    nav = []
+    if page > 0:
+        nav.append(
+            InlineKeyboardButton("\u25c0", callback_data=f"{CALLBACK_ADMIN_USERS}:{page - 1}")
+        )
+    if page < pages - 1:
+        nav.append(
+            InlineKeyboardButton("\u25b6", callback_data=f"{CALLBACK_ADMIN_USERS}:{page + 1}")
+        )
+    rows = [nav] if nav else []
+    rows.append([InlineKeyboardButton("CSV", callback_data=CALLBACK_ADMIN_USERS_CSV)])
+    return InlineKeyboardMarkup(rows)
+
+
 def secretary_transcribe_keyboard(
     message_id: int, business_connection_id: str, lang: str = "en"
 ) -> InlineKeyboardMarkup:
@@ -59,6 +59,10 @@ _STRINGS: dict[str, dict[str, str]] = {
         "en": "Transcribing...",
         "ru": "Расшифровываю...",
     },
+    "transcribing_progress": {
+        "en": "Transcribing... {done} of {total} parts done",
+        "ru": "Расшифровываю... готово частей: {done} из {total}",
+    },
     "transcribing_donate": {
         "en": (
             "Transcribing...\n"
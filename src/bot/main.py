@@ -1,5 +1,6 @@
 import asyncio
 import logging
+from collections.abc import Awaitable, Callable
 from datetime import UTC, datetime
 from logging.handlers import RotatingFileHandler
 
@@ -18,6 +19,7 @@ from telegram.ext import (
 from src.bot.config import Settings
 from src.bot.handlers import BotHandlers
 from src.bot.secretary import PROMPT_TTL_SECONDS, SecretaryHandler
+from src.bot.services.ffmpeg_scheduler import scheduler as ffmpeg_scheduler
 from src.bot.services.media_download import (
     INSTAGRAM,
     YOUTUBE,
@@ -25,10 +27,16 @@ from src.bot.services.media_download import (
 )
 from src.bot.services.notifier import AdminNotifier
 from src.bot.services.summarization import OpenAISummarizer
-from src.bot.services.transcription import ElevenLabsTranscriber
+from src.bot.services.transcription import (
+    AsyncElevenLabsTranscriber,
+    TranscriptionExecutor,
+)
 from src.bot.storage.media_audio_store import MediaAudioStore
 from src.bot.storage.statistics import StatisticsDB
+from src.bot.storage.transcript_archive import TranscriptArchive
+from src.bot.storage.transcript_cache import TranscriptCache
 from src.bot.storage.transcription_store import TranscriptionStore
+from src.bot.update_processor import ChatOrderedUpdateProcessor
 
 logger = logging.getLogger(__name__)
 
@@ -52,10 +60,32 @@ async def health_handler(request: web.Request) -> web.Response:
     return web.Response(text="ok")
 
 
-async def run_health_server(port: int) -> web.AppRunner:
-    """Start a minimal HTTP server for health checks."""
+MetricsSource = Callable[[], dict[str, int]]
+
+
+def metrics_handler(
+    sources: list[MetricsSource],
+) -> Callable[[web.Request], Awaitable[web.Response]]:
+    """Build a `/metrics` endpoint that renders `name value` lines."""
+
+    async def handler(request: web.Request) -> web.Response:
+        lines = [
+            f"{name} {value}"
+            for source in sources
+            for name, value in source().items()
+        ]
+        return web.Response(text="\n".join(lines) + "\n")
+
+    return handler
+
+
+async def run_health_server(
+    port: int, metrics: list[MetricsSource] | None = None
+) -> web.AppRunner:
+    """Start a minimal HTTP server for health checks and metrics."""
     app = web.Application()
     app.router.add_get("/health", health_handler)
+    app.router.add_get("/metrics", metrics_handler(metrics or []))
     runner = web.AppRunner(app)
     await runner.setup()
     site = web.TCPSite(runner, "0.0.0.0", port)
@@ -69,9 +99,15 @@ def main() -> None:
     setup_logging(settings.log_level)
 
     # Build services
-    transcriber = ElevenLabsTranscriber(
-        settings.elevenlabs_api_key,
-        timeout=settings.transcription_timeout,
+    ffmpeg_scheduler.configure(
+        settings.ffmpeg_max_jobs, niceness=settings.ffmpeg_niceness
+    )
+    transcriber = TranscriptionExecutor(
+        AsyncElevenLabsTranscriber(
+            settings.elevenlabs_api_key,
+            timeout=settings.transcription_timeout,
+            max_concurrency=settings.transcription_max_concurrency,
+        )
     )
     summarizer = OpenAISummarizer(
         settings.openai_api_key,
@@ -98,12 +134,47 @@ def main() -> None:
                 param_value=settings.youtube_rapidapi_param_value,
                 timeout=settings.file_download_timeout,
             )
-    store = TranscriptionStore(ttl_seconds=settings.transcription_ttl)
-    media_audio_store = MediaAudioStore(ttl_seconds=settings.link_audio_ttl)
-    stats_db = StatisticsDB(settings.database_path)
+    transcript_archive: TranscriptArchive | None = None
+    if settings.transcript_archive_path:
+        transcript_archive = TranscriptArchive(
+            settings.transcript_archive_path,
+            ttl_seconds=settings.transcript_archive_ttl,
+        )
+    store = TranscriptionStore(
+        ttl_seconds=settings.transcription_ttl,
+        max_bytes=settings.transcription_store_max_bytes,
+        compress_after=settings.transcription_store_compress_after,
+        archive=transcript_archive,
+    )
+    media_audio_store = MediaAudioStore(
+        ttl_seconds=settings.link_audio_ttl,
+        max_bytes=settings.link_audio_max_bytes,
+    )
+    stats_db = StatisticsDB(
+        settings.database_path,
+        flush_interval=settings.stats_flush_ms / 1000,
+        flush_max_rows=settings.stats_flush_max_rows,
+        read_connections=settings.stats_read_connections,
+        error_max_rows=settings.error_log_max_rows,
+        error_max_age_days=settings.error_log_max_age_days,
+    )
+    transcript_cache: TranscriptCache | None = None
+    if settings.transcript_cache_path:
+        transcript_cache = TranscriptCache(
+            settings.transcript_cache_path,
+            ttl_seconds=settings.transcript_cache_ttl,
+            max_bytes=settings.transcript_cache_max_bytes,
+        )
 
     # Build application
-    application = Application.builder().token(settings.telegram_bot_token).build()
+    application = (
+        Application.builder()
+        .token(settings.telegram_bot_token)
+        .concurrent_updates(
+            ChatOrderedUpdateProcessor(settings.max_concurrent_updates)
+        )
+        .build()
+    )
 
     notifier = AdminNotifier(application.bot, settings.admin_user_ids)
 
@@ -117,8 +188,14 @@ def main() -> None:
         transcription_timeout=settings.transcription_timeout,
         ffmpeg_timeout=settings.ffmpeg_timeout,
         file_download_timeout=settings.file_download_timeout,
+        long_audio_chunk_seconds=settings.long_audio_chunk_seconds,
+        in_memory_audio_max_bytes=settings.in_memory_audio_max_bytes,
+        compact_audio_uploads=settings.compact_audio_uploads,
+        trim_silence=settings.trim_silence,
+        link_speedup=settings.link_speedup,
         media_resolvers=media_resolvers,
         media_audio_store=media_audio_store,
+        transcript_cache=transcript_cache,
     )
 
     secretary = SecretaryHandler(
@@ -129,6 +206,7 @@ def main() -> None:
         transcription_timeout=settings.transcription_timeout,
         ffmpeg_timeout=settings.ffmpeg_timeout,
         file_download_timeout=settings.file_download_timeout,
+        transcript_cache=transcript_cache,
     )
 
     # Register handlers
@@ -195,6 +273,8 @@ def main() -> None:
 
     health_runner: web.AppRunner | None = None
     cleanup_task: asyncio.Task[None] | None = None
+    store_sweeper: asyncio.Task[None] | None = None
+    media_audio_sweeper: asyncio.Task[None] | None = None
 
     async def prompt_cleanup_loop(app: Application) -> None:  # type: ignore[type-arg]
         """Periodically delete untranscribed prompts older than the TTL."""
@@ -203,17 +283,32 @@ def main() -> None:
                 await secretary.delete_expired_prompts(
                     app.bot, PROMPT_TTL_SECONDS
                 )
-                media_audio_store.cleanup()
+                if transcript_cache is not None:
+                    await transcript_cache.purge_expired()
+                if transcript_archive is not None:
+                    await transcript_archive.purge_expired()
             except Exception:
                 logger.exception("Prompt cleanup sweep failed")
             await asyncio.sleep(3600)
 
     async def post_init(app: Application) -> None:  # type: ignore[type-arg]
-        nonlocal health_runner, cleanup_task
+        nonlocal health_runner, cleanup_task, store_sweeper, media_audio_sweeper
         await stats_db.initialize()
+        if transcript_cache is not None:
+            await transcript_cache.initialize()
+        if transcript_archive is not None:
+            await transcript_archive.initialize()
 
         # Start health check server
-        health_runner = await run_health_server(settings.health_port)
+        health_runner = await run_health_server(
+            settings.health_port,
+            metrics=[
+                transcriber.metrics,
+                ffmpeg_scheduler.metrics,
+                store.metrics,
+                media_audio_store.metrics,
+            ],
+        )
 
         # Notify admins that bot has (re)started
         now = datetime.now(UTC).strftime("%Y-%m-%d %H:%M:%S UTC")
@@ -234,15 +329,32 @@ def main() -> None:
 
         # Start the background sweep that auto-deletes stale prompts.
         cleanup_task = asyncio.create_task(prompt_cleanup_loop(app))
+        # Frees transcripts that expire without anyone asking for them again
+        # and writes new ones to the archive.
+        store_sweeper = asyncio.create_task(store.run_sweeper())
+        # Deletes link audio whose buttons have expired.
+        media_audio_sweeper = asyncio.create_task(media_audio_store.run_sweeper())
 
         logger.info("Bot started. Admin IDs: %s", settings.admin_user_ids)
 
     async def post_shutdown(app: Application) -> None:  # type: ignore[type-arg]
         if cleanup_task is not None:
             cleanup_task.cancel()
+        if store_sweeper is not None:
+            store_sweeper.cancel()
+        if media_audio_sweeper is not None:
+            media_audio_sweeper.cancel()
         if health_runner:
             await health_runner.cleanup()
+        await transcriber.aclose()
+        # Commits any stats writes still queued for the next batch.
         await stats_db.close()
+        if transcript_cache is not None:
+            await transcript_cache.close()
+        if transcript_archive is not None:
+            # Archives transcripts saved since the last sweep.
+            await store.flush()
+            await transcript_archive.close()
 
     application.post_init = post_init
     application.post_shutdown = post_shutdown
@@ -20,8 +20,15 @@ from src.bot.keyboards import (
 from src.bot.locales import t
 from src.bot.services.audio import extract_audio, get_audio_duration
 from src.bot.services.notifier import AdminNotifier
-from src.bot.services.transcription import EmptyTranscriptionError, TranscriptionClient
+from src.bot.services.transcription import (
+    AsyncTranscriptionClient,
+    EmptyTranscriptionError,
+    TranscriptionClient,
+    transcribe_file,
+    transcription_slot,
+)
 from src.bot.storage.statistics import StatisticsDB
+from src.bot.storage.transcript_cache import CachedTranscript, TranscriptCache
 from src.bot.utils.retry import with_network_retry
 from src.bot.utils.text import format_duration, split_message
 
@@ -36,13 +43,14 @@ class SecretaryHandler:
 
     def __init__(
         self,
-        transcriber: TranscriptionClient,
+        transcriber: TranscriptionClient | AsyncTranscriptionClient,
         notifier: AdminNotifier,
         stats_db: StatisticsDB,
         max_audio_duration: int,
         transcription_timeout: int = 900,
         ffmpeg_timeout: int = 120,
         file_download_timeout: int = 60,
+        transcript_cache: TranscriptCache | None = None,
     ) -> None:
         self._transcriber = transcriber
         self._notifier = notifier
@@ -51,6 +59,7 @@ class SecretaryHandler:
         self._transcription_timeout = transcription_timeout
         self._ffmpeg_timeout = ffmpeg_timeout
         self._file_download_timeout = file_download_timeout
+        self._transcript_cache = transcript_cache
         # business_connection_id -> BusinessConnection
         self._connections: dict[str, BusinessConnection] = {}
         # Dedup: file_id -> timestamp — prevents double-transcription
@@ -371,16 +380,19 @@ class SecretaryHandler:
 
         chat_id = message.chat.id
         file_id: str | None = None
+        file_unique_id: str | None = None
         duration: int | None = None
         is_video = False
         file_type = "unknown"
 
         if message.voice:
             file_id = message.voice.file_id
+            file_unique_id = message.voice.file_unique_id
             duration = message.voice.duration
             file_type = "voice message"
         elif message.video_note:
             file_id = message.video_note.file_id
+            file_unique_id = message.video_note.file_unique_id
             duration = message.video_note.duration
             is_video = True
             file_type = "video note"
@@ -402,6 +414,29 @@ class SecretaryHandler:
             )
             return
 
+        # Both sides of a secretary chat (and forwards) share the same file —
+        # reuse an earlier transcript without any download or provider call.
+        # A cache failure only costs the shortcut.
+        cached: CachedTranscript | None = None
+        if self._transcript_cache is not None and file_unique_id:
+            try:
+                cached = await self._transcript_cache.get(file_unique_id)
+            except Exception:
+                logger.exception("Secretary: transcript cache lookup failed")
+        if cached is not None:
+            await self._stats_db.record_secretary_usage(
+                owner_user.id, owner_user.username,
+                duration or cached.duration or 0,
+            )
+            await self._send_transcription(
+                bot, chat_id, status_msg, biz_conn_id, cached.result.text
+            )
+            logger.info(
+                "Secretary served cached %s for user %s (%d)",
+                file_type, owner_user.username, owner_user.id,
+            )
+            return
+
         file_path: str | None = None
         audio_path: str | None = None
         try:
@@ -470,11 +505,14 @@ class SecretaryHandler:
                 return
 
             # Extract audio from video if needed
+            measured: float | None = None
             if is_video:
                 try:
-                    audio_path = await extract_audio(
+                    extracted = await extract_audio(
                         file_path, timeout=self._ffmpeg_timeout
                     )
+                    audio_path = extracted.path
+                    measured = extracted.duration
                 except RuntimeError as e:
                     msg_key = (
                         "video_timeout"
@@ -498,7 +536,8 @@ class SecretaryHandler:
 
             # Get actual duration if not provided
             if duration is None:
-                measured = await get_audio_duration(audio_path)
+                if not is_video:
+                    measured = await get_audio_duration(audio_path)
                 if measured is not None:
                     duration = int(measured)
                     if duration > self._max_audio_duration:
@@ -519,12 +558,11 @@ class SecretaryHandler:
             transcript = None
             for attempt in range(2):
                 try:
-                    transcript = await asyncio.wait_for(
-                        asyncio.to_thread(
-                            self._transcriber.transcribe, audio_path
-                        ),
-                        timeout=self._transcription_timeout,
-                    )
+                    async with transcription_slot(self._transcriber):
+                        transcript = await asyncio.wait_for(
+                            transcribe_file(self._transcriber, audio_path),
+                            timeout=self._transcription_timeout,
+                        )
                     break
                 except TimeoutError:
                     if attempt == 0:
@@ -577,33 +615,18 @@ class SecretaryHandler:
                 owner_user.id, owner_user.username, duration or 0
             )
 
-            # Send transcription as a bare expandable blockquote so it
-            # takes minimal visual space in the chat.
-            escaped_text = html.escape(transcript.text)
-
-            # Split the escaped text first, then wrap each chunk in
-            # blockquote tags so HTML is never broken by the splitter.
-            bq_overhead = len("<blockquote expandable></blockquote>")
-            raw_chunks = split_message(
-                escaped_text, max_length=4096 - bq_overhead
+            await self._send_transcription(
+                bot, chat_id, status_msg, biz_conn_id, transcript.text
             )
-            for i, chunk in enumerate(raw_chunks):
-                text = f"<blockquote expandable>{chunk}</blockquote>"
-                if i == 0:
-                    await bot.edit_message_text(
-                        chat_id=chat_id,
-                        message_id=status_msg.message_id,
-                        text=text,
-                        parse_mode=ParseMode.HTML,
-                        business_connection_id=biz_conn_id,
-                    )
-                else:
-                    await bot.send_message(
-                        chat_id=chat_id,
-                        text=text,
-                        parse_mode=ParseMode.HTML,
-                        business_connection_id=biz_conn_id,
+
+            # Only after the reply, so a failing cache can't lose the transcript.
+            if self._transcript_cache is not None and file_unique_id:
+                try:
+                    await self._transcript_cache.put(
+                        file_unique_id, transcript, duration
                     )
+                except Exception:
+                    logger.exception("Secretary: failed to cache transcript")
 
             logger.info(
                 "Secretary transcribed %s for user %s (%d), duration=%s",
@@ -635,3 +658,40 @@ class SecretaryHandler:
                 os.remove(file_path)
             if audio_path and audio_path != file_path and os.path.exists(audio_path):
                 os.remove(audio_path)
+
+    async def _send_transcription(
+        self,
+        bot: Bot,
+        chat_id: int,
+        status_msg: Message,
+        biz_conn_id: str,
+        transcript_text: str,
+    ) -> None:
+        """Replace the status message with the transcript."""
+        # Send transcription as a bare expandable blockquote so it
+        # takes minimal visual space in the chat.
+        escaped_text = html.escape(transcript_text)
+
+        # Split the escaped text first, then wrap each chunk in
+        # blockquote tags so HTML is never broken by the splitter.
+        bq_overhead = len("<blockquote expandable></blockquote>")
+        raw_chunks = split_message(
+            escaped_text, max_length=4096 - bq_overhead
+        )
+        for i, chunk in enumerate(raw_chunks):
+            text = f"<blockquote expandable>{chunk}</blockquote>"
+            if i == 0:
+                await bot.edit_message_text(
+                    chat_id=chat_id,
+                    message_id=status_msg.message_id,
+                    text=text,
+                    parse_mode=ParseMode.HTML,
+                    business_connection_id=biz_conn_id,
+                )
+            else:
+                await bot.send_message(
+                    chat_id=chat_id,
+                    text=text,
+                    parse_mode=ParseMode.HTML,
+                    business_connection_id=biz_conn_id,
+                )
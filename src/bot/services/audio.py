@@ -1,94 +1,522 @@
 import asyncio
+import csv
+import io
 import logging
 import os
+import re
 import tempfile
+from dataclasses import dataclass, replace
+
+from src.bot.services.ffmpeg_scheduler import scheduler
+from src.bot.services.media_duration import (
+    read_duration,
+    read_duration_from,
+    read_layout,
+    read_layout_from,
+)
+from src.bot.services.transcription import AudioBuffer, AudioSource
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class ExtractedAudio:
+    """Audio track pulled out of a video, with metadata from the same ffmpeg run."""
+
+    path: str
+    duration: float | None
+    codec: str | None
+    # Re-encoded to the speech profile, so `compact_for_upload` has nothing
+    # left to save.
+    compacted: bool = False
+
+
+@dataclass(frozen=True)
+class ExtractedAudioBuffer:
+    """In-memory audio produced by `extract_audio_buffer`."""
+
+    audio: AudioBuffer
+    duration: float | None
+    codec: str | None
+    compacted: bool = False
+
+
+_NO_AUDIO = "Video has no audio track"
+
+# Upload profile for speech: mono, 16 kHz, low-bitrate Opus in VoIP mode.
+# Transcription accuracy is unaffected; a 1-hour file is about 11 MB.
+SPEECH_BITRATE = 24_000
+SPEECH_OPUS_ARGS = [
+    "-ac",
+    "1",
+    "-ar",
+    "16000",
+    "-acodec",
+    "libopus",
+    "-b:a",
+    "24k",
+    "-application",
+    "voip",
+]
+
+# Audio codecs the transcription API accepts as-is, mapped to a container
+# that can hold them. Such tracks are remuxed instead of re-encoded.
+_COPYABLE_CODECS = {
+    "aac": ".m4a",
+    "opus": ".ogg",
+    "vorbis": ".ogg",
+    "mp3": ".mp3",
+    "flac": ".flac",
+}
+
+
 async def extract_audio(
-    video_path: str, *, timeout: int = 120
-) -> str:
+    video_path: str, *, timeout: int = 120, allow_copy: bool = True
+) -> ExtractedAudio:
     """Extract audio from a video file using ffmpeg.
 
-    Returns the path to the extracted audio file (.ogg).
+    When the audio track already uses a codec the transcription API accepts
+    it is stream-copied into a matching container (e.g. .m4a for AAC), which
+    costs almost no CPU. Otherwise, or if the copy fails, it is re-encoded
+    straight to the speech upload profile (.ogg) and marked `compacted`.
+
+    No separate probe runs first: MP4 and Ogg name their codec in headers
+    read in-process (see `media_duration.read_layout`), and anything else
+    is copied into Matroska, which holds every codec, with the codec then
+    read from the copy run's own log. Duration comes from that log too.
+
     Raises RuntimeError if ffmpeg fails or video has no audio.
     """
-    fd, audio_path = tempfile.mkstemp(suffix=".ogg")
-    os.close(fd)
+    if allow_copy:
+        layout = await asyncio.to_thread(read_layout, video_path)
+        if layout is None or layout.codec in _COPYABLE_CODECS:
+            ext = _COPYABLE_CODECS[layout.codec or ""] if layout else ".mka"
+            try:
+                audio = await _run_extraction(
+                    video_path, ext, ["-acodec", "copy"], timeout=timeout
+                )
+            except RuntimeError as e:
+                if str(e) == _NO_AUDIO:
+                    raise
+                logger.warning("Stream copy of %s failed, re-encoding: %s", video_path, e)
+            else:
+                if audio.codec in _COPYABLE_CODECS:
+                    logger.info(
+                        "Remuxed %s audio from %s to %s", audio.codec, video_path, audio.path
+                    )
+                    return audio
+                # Unknown container holding a codec the API doesn't take.
+                os.remove(audio.path)
 
-    process = await asyncio.create_subprocess_exec(
-        "ffmpeg",
-        "-i",
-        video_path,
-        "-vn",
-        "-acodec",
-        "libopus",
-        "-y",
-        audio_path,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
+    audio = await _run_extraction(video_path, ".ogg", SPEECH_OPUS_ARGS, timeout=timeout)
+    logger.info("Extracted audio from %s to %s", video_path, audio.path)
+    return replace(audio, compacted=True)
+
+
+# Pipe-friendly output for each copyable codec (format, suffix); anything
+# else is re-encoded to speech-profile Opus in Ogg.
+_PIPE_COPY_FORMATS = {
+    "aac": ("adts", ".aac"),
+    "opus": ("ogg", ".ogg"),
+    "vorbis": ("ogg", ".ogg"),
+    "mp3": ("mp3", ".mp3"),
+    "flac": ("flac", ".flac"),
+}
+
+
+async def extract_audio_buffer(
+    data: bytes, *, timeout: int = 120
+) -> ExtractedAudioBuffer:
+    """Extract audio from an in-memory video, piping it through ffmpeg.
+
+    The container and codec are read in-process first (see
+    `media_duration.read_layout`), so one ffmpeg run does the job: AAC
+    (what Telegram video notes carry) is stream-copied into ADTS, other
+    copyable codecs into their own stream format, and the rest re-encoded
+    to the speech profile (`compacted`). An MP4 whose index sits at the
+    end can't be read from a pipe; it goes straight to a temp file and
+    `extract_audio`, as does anything whose piped run fails.
+
+    Raises RuntimeError if ffmpeg fails or video has no audio.
+    """
+    layout = read_layout_from(io.BytesIO(data))
+    if layout is None or layout.streamable:
+        codec = layout.codec if layout else None
+        fmt, suffix = _PIPE_COPY_FORMATS.get(codec or "", ("ogg", ".ogg"))
+        codec_args = ["-acodec", "copy"] if codec in _PIPE_COPY_FORMATS else SPEECH_OPUS_ARGS
+        try:
+            returncode, stdout, stderr = await scheduler.run(
+                "ffmpeg",
+                "-i",
+                "pipe:0",
+                "-vn",
+                *codec_args,
+                "-f",
+                fmt,
+                "pipe:1",
+                timeout=timeout,
+                input=data,
+            )
+        except TimeoutError:
+            raise RuntimeError(f"ffmpeg timed out after {timeout}s")
+        log = stderr.decode(errors="replace")
+        if "does not contain any stream" in log or "Output file is empty" in log:
+            raise RuntimeError(_NO_AUDIO)
+        if returncode == 0 and stdout:
+            duration, codec = parse_ffmpeg_log(log)
+            return ExtractedAudioBuffer(
+                AudioBuffer(stdout, f"audio{suffix}"),
+                duration,
+                codec,
+                compacted=codec_args is SPEECH_OPUS_ARGS,
+            )
+        logger.info("Piped extraction failed, falling back to a temp file: %s", log[-200:])
+
+    fd, video_path = tempfile.mkstemp(suffix=".mp4")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        extracted = await extract_audio(video_path, timeout=timeout)
+    finally:
+        os.remove(video_path)
+    try:
+        with open(extracted.path, "rb") as f:
+            audio = AudioBuffer(f.read(), os.path.basename(extracted.path))
+    finally:
+        os.remove(extracted.path)
+    return ExtractedAudioBuffer(
+        audio, extracted.duration, extracted.codec, extracted.compacted
     )
+
+
+@dataclass(frozen=True)
+class CompactedAudio:
+    """Result of `compact_for_upload`; `source` may be the original."""
+
+    source: AudioSource
+    original_bytes: int
+    upload_bytes: int
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.original_bytes - self.upload_bytes
+
+
+async def compact_for_upload(
+    source: AudioSource,
+    duration: float | None,
+    *,
+    timeout: int = 120,
+    min_saved_ratio: float = 0.3,
+    min_saved_bytes: int = 256 * 1024,
+) -> CompactedAudio:
+    """Re-encode `source` to the speech profile if that shrinks it enough.
+
+    With a known duration the size of the result is estimated first, so
+    files that are already compact (voice messages, low-bitrate MP3) are
+    left alone without running ffmpeg. The transcode only counts if it saves
+    at least `min_saved_ratio` of the payload and `min_saved_bytes`. Any
+    ffmpeg failure returns the original source unchanged.
+    """
+    if isinstance(source, AudioBuffer):
+        size = len(source.data)
+    else:
+        size = os.path.getsize(source)
+    unchanged = CompactedAudio(source, size, size)
+
+    def worth_it(new_size: float) -> bool:
+        saved = size - new_size
+        return saved >= min_saved_bytes and saved >= size * min_saved_ratio
+
+    # Container overhead on top of the nominal bitrate is a few percent.
+    if duration and not worth_it(duration * SPEECH_BITRATE / 8 * 1.1):
+        return unchanged
+    if not duration and size < min_saved_bytes:
+        return unchanged
+
+    try:
+        returncode, stdout, stderr = await scheduler.run(
+            "ffmpeg",
+            "-i",
+            "pipe:0" if isinstance(source, AudioBuffer) else source,
+            "-vn",
+            *SPEECH_OPUS_ARGS,
+            "-f",
+            "ogg",
+            "pipe:1",
+            timeout=timeout,
+            input=source.data if isinstance(source, AudioBuffer) else None,
+        )
+    except (OSError, TimeoutError) as e:
+        logger.warning("Speech transcode skipped: %r", e)
+        return unchanged
+    if returncode != 0 or not stdout:
+        logger.warning(
+            "Speech transcode failed: %s", stderr.decode(errors="replace")[-200:]
+        )
+        return unchanged
+    if not worth_it(len(stdout)):
+        return unchanged
+    return CompactedAudio(AudioBuffer(stdout, "speech.ogg"), size, len(stdout))
+
+
+async def speed_up(
+    source: AudioSource, factor: float, *, timeout: int = 120
+) -> AudioBuffer:
+    """Play `source` back `factor` times faster, keeping the pitch.
+
+    Uses ffmpeg's `atempo` and encodes straight to the speech profile. The
+    result is 1/`factor` as long, so both the upload and the provider's
+    processing shrink accordingly. `factor` must be between 1 and 2.
+
+    Raises RuntimeError if ffmpeg fails or times out.
+    """
+    if not 1.0 <= factor <= 2.0:
+        raise ValueError(f"speed-up factor must be between 1 and 2, got {factor}")
+    try:
+        returncode, stdout, stderr = await scheduler.run(
+            "ffmpeg",
+            "-i",
+            "pipe:0" if isinstance(source, AudioBuffer) else source,
+            "-vn",
+            "-filter:a",
+            f"atempo={factor:g}",
+            *SPEECH_OPUS_ARGS,
+            "-f",
+            "ogg",
+            "pipe:1",
+            timeout=timeout,
+            input=source.data if isinstance(source, AudioBuffer) else None,
+        )
+    except TimeoutError:
+        raise RuntimeError(f"ffmpeg timed out after {timeout}s")
+    if returncode != 0 or not stdout:
+        raise RuntimeError(
+            f"ffmpeg failed: {stderr.decode(errors='replace')[-200:]}"
+        )
+    return AudioBuffer(stdout, "speedup.ogg")
+
+
+_DURATION_RE = re.compile(r"Duration: (\d+):(\d{2}):(\d{2}(?:\.\d+)?)")
+_PROGRESS_TIME_RE = re.compile(r"time=(\d+):(\d{2}):(\d{2}(?:\.\d+)?)")
+_AUDIO_STREAM_RE = re.compile(r"Stream #\d+:\d+\S*: Audio: (\w+)")
+
+
+def parse_ffmpeg_log(log: str) -> tuple[float | None, str | None]:
+    """Return (duration, audio codec) of the input from ffmpeg's stderr.
+
+    Duration comes from the input header, falling back to the last progress
+    timestamp when the container doesn't declare one.
+    """
+    input_section = log.split("Output #0", 1)[0]
+    header = _DURATION_RE.search(input_section)
+    progress = _PROGRESS_TIME_RE.findall(log)
+    parts = header.groups() if header else (progress[-1] if progress else None)
+    duration: float | None = None
+    if parts is not None:
+        hours, minutes, seconds = parts
+        duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+    codec = _AUDIO_STREAM_RE.search(input_section)
+    return duration, codec.group(1) if codec else None
+
+
+async def _run_extraction(
+    video_path: str, suffix: str, codec_args: list[str], *, timeout: int
+) -> ExtractedAudio:
+    fd, audio_path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+
     try:
-        _, stderr = await asyncio.wait_for(
-            process.communicate(), timeout=timeout
+        returncode, _, stderr = await scheduler.run(
+            "ffmpeg",
+            "-i",
+            video_path,
+            "-vn",
+            *codec_args,
+            "-y",
+            audio_path,
+            timeout=timeout,
         )
     except TimeoutError:
-        process.kill()
         if os.path.exists(audio_path):
             os.remove(audio_path)
         raise RuntimeError(
             f"ffmpeg timed out after {timeout}s"
         )
 
-    if process.returncode != 0:
+    if returncode != 0:
         if os.path.exists(audio_path):
             os.remove(audio_path)
         error_msg = stderr.decode(errors="replace")
         if "does not contain any stream" in error_msg or "Output file is empty" in error_msg:
-            raise RuntimeError("Video has no audio track")
+            raise RuntimeError(_NO_AUDIO)
         raise RuntimeError(f"ffmpeg failed: {error_msg[:200]}")
 
     if not os.path.exists(audio_path) or os.path.getsize(audio_path) == 0:
         if os.path.exists(audio_path):
             os.remove(audio_path)
-        raise RuntimeError("Video has no audio track")
+        raise RuntimeError(_NO_AUDIO)
 
-    logger.info("Extracted audio from %s to %s", video_path, audio_path)
-    return audio_path
+    duration, codec = parse_ffmpeg_log(stderr.decode(errors="replace"))
+    return ExtractedAudio(audio_path, duration, codec)
 
 
 async def get_audio_duration(
-    file_path: str, *, timeout: int = 30
+    source: str | bytes, *, timeout: int = 30
 ) -> float | None:
-    """Get duration of an audio/video file in seconds using ffprobe.
+    """Get duration of an audio/video file, or in-memory data, in seconds.
 
+    Ogg, MP3 and MP4 containers are measured in-process (see
+    `media_duration`); everything else goes through ffprobe.
     Returns None if duration cannot be determined.
     """
-    process = await asyncio.create_subprocess_exec(
-        "ffprobe",
-        "-v",
-        "error",
-        "-show_entries",
-        "format=duration",
-        "-of",
-        "default=noprint_wrappers=1:nokey=1",
-        file_path,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
+    if isinstance(source, bytes):
+        duration = read_duration_from(io.BytesIO(source))
+    else:
+        duration = await asyncio.to_thread(read_duration, source)
+    if duration is not None:
+        return duration
+
     try:
-        stdout, _ = await asyncio.wait_for(
-            process.communicate(), timeout=timeout
+        returncode, stdout, _ = await scheduler.run(
+            "ffprobe",
+            "-v",
+            "error",
+            "-show_entries",
+            "format=duration",
+            "-of",
+            "default=noprint_wrappers=1:nokey=1",
+            source if isinstance(source, str) else "pipe:0",
+            timeout=timeout,
+            input=source if isinstance(source, bytes) else None,
         )
     except TimeoutError:
-        process.kill()
         return None
 
-    if process.returncode != 0:
+    if returncode != 0:
         return None
 
     try:
         return float(stdout.decode().strip())
     except (ValueError, AttributeError):
         return None
+
+
+_SILENCE_START_RE = re.compile(r"silence_start: (-?[\d.]+)")
+_SILENCE_END_RE = re.compile(r"silence_end: (-?[\d.]+)")
+
+
+async def detect_silences(
+    file_path: str,
+    *,
+    noise_db: int = -35,
+    min_silence: float = 0.5,
+    timeout: int = 120,
+) -> list[tuple[float, float]]:
+    """Return (start, end) of silent stretches using ffmpeg's silencedetect.
+
+    Raises RuntimeError if ffmpeg fails or times out.
+    """
+    try:
+        returncode, _, stderr = await scheduler.run(
+            "ffmpeg",
+            "-nostats",
+            "-i",
+            file_path,
+            "-af",
+            f"silencedetect=noise={noise_db}dB:d={min_silence}",
+            "-f",
+            "null",
+            "-",
+            timeout=timeout,
+        )
+    except TimeoutError:
+        raise RuntimeError(f"ffmpeg timed out after {timeout}s")
+
+    output = stderr.decode(errors="replace")
+    if returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {output[:200]}")
+
+    starts = [float(m) for m in _SILENCE_START_RE.findall(output)]
+    ends = [float(m) for m in _SILENCE_END_RE.findall(output)]
+    return list(zip(starts, ends, strict=False))
+
+
+def plan_chunks(
+    duration: float,
+    silences: list[tuple[float, float]],
+    chunk_seconds: float,
+) -> list[float]:
+    """Choose split points roughly every `chunk_seconds`, preferring silences.
+
+    Each cut goes in the middle of the latest silence within the last quarter
+    of the chunk; with no silence there the cut is made at the target time.
+    A trailing piece shorter than a quarter chunk is folded into the last one.
+    """
+    window = chunk_seconds / 4
+    midpoints = [(start + end) / 2 for start, end in silences]
+    points: list[float] = []
+    prev = 0.0
+    while duration - prev > chunk_seconds + window:
+        target = prev + chunk_seconds
+        candidates = [m for m in midpoints if target - window <= m <= target]
+        cut = max(candidates) if candidates else target
+        points.append(cut)
+        prev = cut
+    return points
+
+
+async def split_audio(
+    file_path: str,
+    split_points: list[float],
+    out_dir: str,
+    *,
+    timeout: int = 120,
+) -> list[tuple[str, float]]:
+    """Cut an audio file at `split_points` without re-encoding.
+
+    Returns (chunk_path, start_offset) pairs in order. Offsets come from the
+    segment muxer, so they reflect where each stream-copied chunk really
+    starts. Raises RuntimeError if ffmpeg fails or times out.
+    """
+    ext = os.path.splitext(file_path)[1] or ".ogg"
+    pattern = os.path.join(out_dir, f"chunk%03d{ext}")
+    segment_list = os.path.join(out_dir, "segments.csv")
+    args = [
+        "ffmpeg",
+        "-i",
+        file_path,
+        "-vn",
+        "-c",
+        "copy",
+        "-f",
+        "segment",
+        "-segment_list",
+        segment_list,
+        "-segment_list_type",
+        "csv",
+    ]
+    if split_points:
+        args += ["-segment_times", ",".join(f"{p:.3f}" for p in split_points)]
+    else:
+        args += ["-segment_time", "1000000"]
+    args += ["-y", pattern]
+
+    try:
+        returncode, _, stderr = await scheduler.run(*args, timeout=timeout)
+    except TimeoutError:
+        raise RuntimeError(f"ffmpeg timed out after {timeout}s")
+
+    if returncode != 0 or not os.path.exists(segment_list):
+        raise RuntimeError(
+            f"ffmpeg failed: {stderr.decode(errors='replace')[:200]}"
+        )
+
+    chunks: list[tuple[str, float]] = []
+    with open(segment_list, encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if len(row) >= 2:
+                chunks.append((os.path.join(out_dir, row[0]), float(row[1])))
+    logger.info("Split %s into %d chunks", file_path, len(chunks))
+    return chunks
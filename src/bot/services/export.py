@@ -3,11 +3,11 @@
 from __future__ import annotations
 
 import html
+import math
 import re
-from typing import TYPE_CHECKING
+from collections.abc import Iterable
 
-if TYPE_CHECKING:
-    from src.bot.services.transcription import WordData
+from src.bot.services.transcription import WordData, WordTable
 
 
 def _format_srt_time(seconds: float) -> str:
@@ -74,37 +74,42 @@ def generate_html(text: str, title: str = "Transcript") -> str:
     )
 
 
-def generate_srt(words: list[WordData], max_words_per_sub: int = 10) -> str:
+def generate_srt(
+    words: WordTable | Iterable[WordData], max_words_per_sub: int = 10
+) -> str:
     """Generate SRT subtitle content from word-level data.
 
     Groups words into subtitle blocks of up to max_words_per_sub words.
-    Uses word-level timestamps from the API.
+    Uses word-level timestamps from the API. Reads the columns of a
+    `WordTable` directly; other sequences are converted to one first.
     """
-    timed_words = [w for w in words if w.type == "word" and w.start is not None]
-    if not timed_words:
+    table = WordTable.from_words(words)
+    word = table.type_code("word")
+    timed = [
+        i
+        for i, code in enumerate(table.type_codes)
+        if code == word and not math.isnan(table.starts[i])
+    ]
+    if not timed:
         return ""
 
     blocks: list[str] = []
     block_num = 0
-    i = 0
 
-    while i < len(timed_words):
-        chunk = timed_words[i : i + max_words_per_sub]
-        start = chunk[0].start
-        end = chunk[-1].end or chunk[-1].start
-
-        if start is None or end is None:
-            i += len(chunk)
-            continue
+    for first in range(0, len(timed), max_words_per_sub):
+        chunk = timed[first : first + max_words_per_sub]
+        start = table.starts[chunk[0]]
+        end = table.ends[chunk[-1]]
+        if math.isnan(end) or end == 0:
+            end = table.starts[chunk[-1]]
 
         block_num += 1
-        text = " ".join(w.text for w in chunk)
+        text = " ".join(table.text_of(i) for i in chunk)
 
-        speaker_ids = {w.speaker_id for w in chunk if w.speaker_id}
+        speaker_ids = {table.speaker_ids[table.speaker_codes[i]] for i in chunk}
+        speaker_ids -= {None, ""}
         if len(speaker_ids) == 1:
-            sid = next(iter(speaker_ids))
-            if sid:
-                text = f"[{sid}] {text}"
+            text = f"[{speaker_ids.pop()}] {text}"
 
         blocks.append(
             f"{block_num}\n"
@@ -112,6 +117,4 @@ def generate_srt(words: list[WordData], max_words_per_sub: int = 10) -> str:
             f"{text}"
         )
 
-        i += len(chunk)
-
     return "\n\n".join(blocks) + "\n" if blocks else ""
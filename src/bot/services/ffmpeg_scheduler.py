@@ -0,0 +1,215 @@
+"""Process-wide scheduler for ffmpeg and ffprobe jobs.
+
+Each audio helper used to start its own subprocess, so a burst of forwarded
+videos ran dozens of encoders side by side, oversubscribed the cores and
+pushed every job toward `ffmpeg_timeout`. All jobs now go through one
+scheduler that runs at most one job per available core, queues the rest in
+arrival order and starts them at a lower OS priority so the event loop and
+the HTTP clients stay responsive.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+import time
+from collections.abc import AsyncIterator, Callable
+
+logger = logging.getLogger(__name__)
+
+
+def available_cores() -> int:
+    """Number of CPUs this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return os.cpu_count() or 1
+
+
+class FFmpegScheduler:
+    """Bounds concurrent ffmpeg/ffprobe processes and tracks the queue.
+
+    `max_jobs=0` means one job per available core. The timeout passed to
+    `run` counts from the moment the process starts, so time spent queued
+    never makes a job fail.
+    """
+
+    def __init__(self, max_jobs: int = 0, *, niceness: int = 10) -> None:
+        self._semaphore = asyncio.Semaphore(1)
+        self._max_jobs = 1
+        self._niceness = niceness
+        self._running = 0
+        self._queued = 0
+        self._jobs_total = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self.configure(max_jobs, niceness=niceness)
+
+    def configure(self, max_jobs: int = 0, *, niceness: int = 10) -> None:
+        """Resize the scheduler. Call before any job is submitted."""
+        self._max_jobs = max_jobs if max_jobs > 0 else available_cores()
+        self._niceness = niceness
+        self._semaphore = asyncio.Semaphore(self._max_jobs)
+
+    @property
+    def max_jobs(self) -> int:
+        return self._max_jobs
+
+    async def run(
+        self, *args: str, timeout: float, input: bytes | None = None
+    ) -> tuple[int, bytes, bytes]:
+        """Run a command once a slot is free; return (returncode, stdout, stderr).
+
+        `input` is fed to the process on stdin.
+
+        Raises TimeoutError (after killing the process) if it runs longer
+        than `timeout` seconds, and OSError if it cannot be started.
+        """
+        async with self._slot(args[0]):
+            process = await self._start(args, input is not None)
+            try:
+                stdout, stderr = await asyncio.wait_for(
+                    process.communicate(input), timeout=timeout
+                )
+            except (TimeoutError, asyncio.CancelledError):
+                process.kill()
+                await process.wait()
+                raise
+            finally:
+                self._running -= 1
+            assert process.returncode is not None
+            return process.returncode, stdout, stderr
+
+    async def stream(
+        self,
+        *args: str,
+        consume: Callable[[bytes], None],
+        timeout: float,
+        input: bytes | None = None,
+        block_size: int = 64 * 1024,
+    ) -> tuple[int, bytes]:
+        """Like `run`, but hand stdout to `consume` as it arrives instead of
+        collecting it; return (returncode, stderr).
+
+        Every block is `block_size` bytes except possibly the last, so
+        consumers working in fixed-size frames can pick a multiple of the
+        frame size. Raises like `run`, or what `consume` raises (the
+        process is killed either way).
+        """
+        async with self._slot(args[0]):
+            process = await self._start(args, input is not None)
+            try:
+                stderr = await asyncio.wait_for(
+                    _pump(process, input, consume, block_size), timeout=timeout
+                )
+            except BaseException:  # also whatever `consume` raised
+                process.kill()
+                await process.wait()
+                raise
+            finally:
+                self._running -= 1
+            assert process.returncode is not None
+            return process.returncode, stderr
+
+    @contextlib.asynccontextmanager
+    async def _slot(self, program: str) -> AsyncIterator[None]:
+        queued_at = time.monotonic()
+        self._queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._queued -= 1
+        try:
+            waited = time.monotonic() - queued_at
+            self._jobs_total += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            if waited > 1:
+                logger.info("%s waited %.1fs for a free slot", program, waited)
+            yield
+        finally:
+            self._semaphore.release()
+
+    async def _start(
+        self, args: tuple[str, ...], with_stdin: bool
+    ) -> asyncio.subprocess.Process:
+        """Start the process and count it as running (callers uncount it)."""
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdin=asyncio.subprocess.PIPE if with_stdin else None,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        self._running += 1
+        self._lower_priority(process.pid)
+        return process
+
+    def _lower_priority(self, pid: int) -> None:
+        if self._niceness <= 0:
+            return
+        try:
+            current = os.getpriority(os.PRIO_PROCESS, pid)
+            os.setpriority(os.PRIO_PROCESS, pid, current + self._niceness)
+        except (AttributeError, OSError):
+            # Not supported here, or the process already exited.
+            pass
+
+    def metrics(self) -> dict[str, int]:
+        """Counters for the /metrics endpoint."""
+        return {
+            "ffmpeg_max_jobs": self._max_jobs,
+            "ffmpeg_running": self._running,
+            "ffmpeg_queued": self._queued,
+            "ffmpeg_jobs_total": self._jobs_total,
+            "ffmpeg_wait_ms_total": round(self._wait_total * 1000),
+            "ffmpeg_wait_ms_max": round(self._wait_max * 1000),
+        }
+
+
+async def _pump(
+    process: asyncio.subprocess.Process,
+    input: bytes | None,
+    consume: Callable[[bytes], None],
+    block_size: int,
+) -> bytes:
+    """Feed stdin, pass stdout on in blocks and collect stderr, all at once
+    so neither side blocks on a full pipe. Returns stderr."""
+    assert process.stdout is not None and process.stderr is not None
+
+    async def feed() -> None:
+        assert process.stdin is not None
+        try:
+            if input:
+                process.stdin.write(input)
+                await process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # it stopped reading; its exit status tells why
+        finally:
+            process.stdin.close()
+
+    feeder = asyncio.create_task(feed()) if input is not None else None
+    errors = asyncio.create_task(process.stderr.read())
+    try:
+        while True:
+            try:
+                block = await process.stdout.readexactly(block_size)
+            except asyncio.IncompleteReadError as e:
+                if e.partial:
+                    consume(e.partial)
+                break
+            consume(block)
+        if feeder is not None:
+            await feeder
+        stderr = await errors
+        await process.wait()
+        return stderr
+    finally:
+        for task in (feeder, errors):
+            if task is not None:
+                task.cancel()
+
+
+# Shared by every audio helper in the process; main() sizes it from settings.
+scheduler = FFmpegScheduler()
@@ -0,0 +1,116 @@
+"""Chunked, parallel transcription for long recordings.
+
+A single hour-long upload that times out has to start over from zero. Here
+the file is cut at pauses into chunks of roughly `chunk_seconds`, the chunks
+are transcribed concurrently, and a timeout only retries the chunk that hit
+it. The per-chunk results are stitched back onto the original timeline.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+from collections.abc import Awaitable, Callable
+
+from src.bot.services.audio import detect_silences, plan_chunks, split_audio
+from src.bot.services.transcription import (
+    AsyncTranscriptionClient,
+    AudioBuffer,
+    AudioSource,
+    EmptyTranscriptionError,
+    TranscriptionClient,
+    TranscriptionResult,
+    merge_chunk_results,
+    transcribe_file,
+    transcription_slot,
+)
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[int, int], Awaitable[None]]
+
+
+async def transcribe_long_audio(
+    client: TranscriptionClient | AsyncTranscriptionClient,
+    audio: AudioSource,
+    duration: float,
+    *,
+    chunk_seconds: int = 600,
+    chunk_timeout: int = 900,
+    ffmpeg_timeout: int = 120,
+    on_progress: ProgressCallback | None = None,
+) -> TranscriptionResult:
+    """Transcribe `audio` in silence-aligned chunks.
+
+    `on_progress(done, total)` is awaited after every finished chunk. An
+    in-memory buffer is written to the chunk directory first, since ffmpeg
+    has to seek while cutting.
+
+    Raises TimeoutError if a chunk times out twice, EmptyTranscriptionError if
+    no chunk contains speech, RuntimeError on ffmpeg or provider failure.
+    """
+    out_dir = tempfile.mkdtemp(prefix="chunks-")
+    try:
+        if isinstance(audio, AudioBuffer):
+            audio_path = os.path.join(out_dir, f"source-{audio.filename}")
+            with open(audio_path, "wb") as f:
+                f.write(audio.data)
+        else:
+            audio_path = audio
+        silences = await detect_silences(audio_path, timeout=ffmpeg_timeout)
+        split_points = plan_chunks(duration, silences, chunk_seconds)
+        chunks = await split_audio(
+            audio_path, split_points, out_dir, timeout=ffmpeg_timeout
+        )
+        total = len(chunks)
+        logger.info(
+            "Transcribing %s in %d chunks (%.0fs audio)", audio_path, total, duration
+        )
+
+        async def run(index: int, path: str) -> tuple[int, TranscriptionResult]:
+            retried = False
+            while True:
+                try:
+                    # Chunks queued for an upload slot aren't on the clock yet.
+                    async with transcription_slot(client):
+                        result = await asyncio.wait_for(
+                            transcribe_file(client, path), timeout=chunk_timeout
+                        )
+                    return index, result
+                except TimeoutError:
+                    if retried:
+                        raise
+                    retried = True
+                    logger.warning(
+                        "Chunk %d/%d timed out, retrying", index + 1, total
+                    )
+                except EmptyTranscriptionError:
+                    # A chunk of pure silence or music — not an error here.
+                    return index, TranscriptionResult(text="")
+
+        tasks = [
+            asyncio.create_task(run(i, path)) for i, (path, _) in enumerate(chunks)
+        ]
+        results: list[TranscriptionResult | None] = [None] * total
+        try:
+            for done, next_result in enumerate(asyncio.as_completed(tasks), 1):
+                index, result = await next_result
+                results[index] = result
+                if on_progress is not None:
+                    await on_progress(done, total)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        return merge_chunk_results(
+            [
+                (result, offset)
+                for result, (_, offset) in zip(results, chunks, strict=True)
+                if result is not None
+            ]
+        )
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
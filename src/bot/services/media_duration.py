@@ -0,0 +1,439 @@
+"""In-process duration reader for common audio containers.
+
+Telegram documents and RapidAPI downloads come without a duration, and
+spawning ffprobe for each of them costs far more than the answer is worth.
+The formats users actually send can be measured from a few kilobytes at the
+start and end of the file:
+
+- Ogg (Opus, Vorbis): granule position of the last page over the sample rate
+- MP3: frame count from a Xing/Info or VBRI header, else a CBR estimate from
+  the first frame header
+- MP4/M4A: duration and timescale of the `mvhd` atom
+
+Anything else returns None and the caller falls back to ffprobe.
+
+`read_layout` answers the questions audio extraction asks before it spawns
+ffmpeg, from the same headers: which codec the audio track uses (Ogg
+identification packet, MP4 `stsd` sample entry) and whether an MP4 can be
+read from a pipe at all (`moov` before `mdat`).
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import struct
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import BinaryIO
+
+logger = logging.getLogger(__name__)
+
+_HEAD_SIZE = 64 * 1024
+_TAIL_SIZE = 64 * 1024
+
+
+def read_duration(file_path: str) -> float | None:
+    """Return the duration of `file_path` in seconds, or None if unknown."""
+    try:
+        with open(file_path, "rb") as f:
+            return read_duration_from(f)
+    except OSError:
+        return None
+
+
+def read_duration_from(f: BinaryIO) -> float | None:
+    """Like `read_duration`, for a seekable binary stream (e.g. BytesIO)."""
+    try:
+        head = f.read(_HEAD_SIZE)
+        if head.startswith(b"OggS"):
+            duration = _ogg_duration(f, head)
+        elif head[4:8] == b"ftyp":
+            duration = _mp4_duration(f)
+        else:
+            duration = _mp3_duration(f, head)
+    except (OSError, struct.error, IndexError, ValueError):
+        return None
+    if duration is None or duration <= 0:
+        return None
+    return duration
+
+
+@dataclass(frozen=True)
+class MediaLayout:
+    """What `read_layout` found out about a recognized container."""
+
+    # ffmpeg's name for the first audio track's codec; None if there is no
+    # audio track or its codec isn't one listed here.
+    codec: str | None
+    # False for an MP4 whose `moov` index follows `mdat`: ffmpeg has to seek
+    # back for it, which it can't do on a pipe.
+    streamable: bool = True
+
+
+def read_layout(file_path: str) -> MediaLayout | None:
+    """Return the layout of `file_path`, or None for other containers."""
+    try:
+        with open(file_path, "rb") as f:
+            return read_layout_from(f)
+    except OSError:
+        return None
+
+
+def read_layout_from(f: BinaryIO) -> MediaLayout | None:
+    """Like `read_layout`, for a seekable binary stream (e.g. BytesIO)."""
+    try:
+        head = f.read(_HEAD_SIZE)
+        if head.startswith(b"OggS"):
+            return MediaLayout(_ogg_codec(head))
+        if head[4:8] == b"ftyp":
+            return _mp4_layout(f)
+    except (OSError, struct.error, IndexError, ValueError):
+        return None
+    return None
+
+
+# --- Ogg ---------------------------------------------------------------
+
+
+def _ogg_duration(f: BinaryIO, head: bytes) -> float | None:
+    packet = _ogg_first_packet(head)
+    if packet.startswith(b"OpusHead") and len(packet) >= 12:
+        # Opus granules always count 48 kHz samples; pre-skip is padding.
+        pre_skip: int = struct.unpack_from("<H", packet, 10)[0]
+        rate: int = 48000
+    elif packet.startswith(b"\x01vorbis") and len(packet) >= 16:
+        pre_skip = 0
+        rate = struct.unpack_from("<I", packet, 12)[0]
+    else:
+        return None
+    if not rate:
+        return None
+
+    granule = _last_ogg_granule(f)
+    if granule is None:
+        return None
+    return max(granule - pre_skip, 0) / rate
+
+
+def _ogg_codec(head: bytes) -> str | None:
+    packet = _ogg_first_packet(head)
+    if packet.startswith(b"OpusHead"):
+        return "opus"
+    if packet.startswith(b"\x01vorbis"):
+        return "vorbis"
+    if packet.startswith(b"\x7fFLAC"):
+        return "flac"
+    return None
+
+
+def _ogg_first_packet(head: bytes) -> bytes:
+    # The first page carries the codec identification header.
+    if len(head) < 28:
+        return b""
+    segments = head[26]
+    return head[27 + segments :]
+
+
+def _last_ogg_granule(f: BinaryIO) -> int | None:
+    size = f.seek(0, os.SEEK_END)
+    f.seek(max(size - _TAIL_SIZE, 0))
+    tail = f.read()
+    pos = tail.rfind(b"OggS")
+    while pos != -1:
+        if pos + 14 <= len(tail) and tail[pos + 4] == 0:
+            granule = struct.unpack_from("<q", tail, pos + 6)[0]
+            # -1 marks a page on which no packet ends.
+            if granule >= 0:
+                return int(granule)
+        pos = tail.rfind(b"OggS", 0, pos)
+    return None
+
+
+# --- MP3 ---------------------------------------------------------------
+
+# Bitrates in kbit/s, indexed by [version is MPEG-1][layer][index].
+_MP3_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# Sample rates indexed by version bits (0 = 2.5, 2 = 2, 3 = 1).
+_MP3_SAMPLE_RATES = {
+    0: (11025, 12000, 8000),
+    2: (22050, 24000, 16000),
+    3: (44100, 48000, 32000),
+}
+_MP3_CONFIRM_FRAMES = 3
+
+
+def _mp3_duration(f: BinaryIO, head: bytes) -> float | None:
+    base = 0  # file offset of head[0]
+    start = 0
+    if head.startswith(b"ID3") and len(head) >= 10:
+        # ID3v2 size is a 28-bit "syncsafe" integer, plus an optional footer.
+        size = 0
+        for b in head[6:10]:
+            size = (size << 7) | (b & 0x7F)
+        start = 10 + size + (10 if head[5] & 0x10 else 0)
+        if start + 4 > len(head):
+            # Large embedded cover art: re-read from the end of the tag.
+            f.seek(start)
+            head = f.read(_HEAD_SIZE)
+            base, start = start, 0
+
+    offset = _find_mp3_frame(head, start)
+    if offset is None:
+        return None
+    frame_pos = base + offset
+
+    header = struct.unpack_from(">I", head, offset)[0]
+    version_bits = (header >> 19) & 0x3
+    layer = 4 - ((header >> 17) & 0x3)
+    bitrate_index = (header >> 12) & 0xF
+    rate_index = (header >> 10) & 0x3
+    mono = ((header >> 6) & 0x3) == 3
+    mpeg1 = version_bits == 3
+
+    rate = _MP3_SAMPLE_RATES[version_bits][rate_index]
+    if layer == 1:
+        samples_per_frame = 384
+    elif layer == 3 and not mpeg1:
+        samples_per_frame = 576
+    else:
+        samples_per_frame = 1152
+
+    # Xing/Info sits right after the side information of the first frame.
+    if mpeg1:
+        side_info = 17 if mono else 32
+    else:
+        side_info = 9 if mono else 17
+    frames: int | None = None
+    xing = offset + 4 + side_info
+    if head[xing : xing + 4] in (b"Xing", b"Info") and len(head) >= xing + 12:
+        flags = struct.unpack_from(">I", head, xing + 4)[0]
+        if flags & 0x1:
+            frames = struct.unpack_from(">I", head, xing + 8)[0]
+    vbri = offset + 36
+    if frames is None and head[vbri : vbri + 4] == b"VBRI" and len(head) >= vbri + 18:
+        frames = struct.unpack_from(">I", head, vbri + 14)[0]
+    if frames:
+        return frames * samples_per_frame / rate
+
+    # No VBR header: assume constant bitrate over the audio payload.
+    bitrate = _MP3_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    if not bitrate:
+        return None
+    end = f.seek(0, os.SEEK_END)
+    if end >= 128:
+        f.seek(end - 128)
+        if f.read(3) == b"TAG":
+            end -= 128
+    return (end - frame_pos) * 8 / bitrate
+
+
+def _find_mp3_frame(data: bytes, start: int) -> int | None:
+    """Offset of the first frame, which must start the stream.
+
+    Scanning for a sync word anywhere would happily "find" MP3 frames in
+    arbitrary binary data, so only zero padding after the ID3 tag is skipped
+    and the next few headers have to chain up.
+    """
+    pos = start
+    while pos < len(data) and data[pos] == 0:
+        pos += 1
+    first = pos
+    for _ in range(_MP3_CONFIRM_FRAMES):
+        if pos + 4 > len(data):
+            break
+        length = _mp3_frame_length(data, pos)
+        if length is None:
+            return None
+        pos += length
+    return first
+
+
+def _mp3_frame_length(data: bytes, pos: int) -> int | None:
+    if pos + 4 > len(data):
+        return None
+    header: int = struct.unpack_from(">I", data, pos)[0]
+    if header >> 21 != 0x7FF:
+        return None
+    version_bits = (header >> 19) & 0x3
+    layer_bits = (header >> 17) & 0x3
+    bitrate_index = (header >> 12) & 0xF
+    rate_index = (header >> 10) & 0x3
+    if version_bits == 1 or layer_bits == 0:
+        return None
+    if bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    mpeg1 = version_bits == 3
+    layer = 4 - layer_bits
+    bitrate = _MP3_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    rate = _MP3_SAMPLE_RATES[version_bits][rate_index]
+    padding: int = (header >> 9) & 0x1
+    if layer == 1:
+        return (12 * bitrate // rate + padding) * 4
+    if layer == 3 and not mpeg1:
+        return 72 * bitrate // rate + padding
+    return 144 * bitrate // rate + padding
+
+
+# --- MP4 ---------------------------------------------------------------
+
+
+def _mp4_duration(f: BinaryIO) -> float | None:
+    # Walk box headers only; `moov` is often after a large `mdat`.
+    end = f.seek(0, os.SEEK_END)
+    moov = _find_box(f, 0, end, b"moov")
+    if moov is None:
+        return None
+    mvhd = _find_box(f, *moov, b"mvhd")
+    if mvhd is None:
+        return None
+    f.seek(mvhd[0])
+    body = f.read(min(mvhd[1] - mvhd[0], 32))
+    timescale: int
+    duration: int
+    if body[0] == 1:
+        timescale, duration = struct.unpack_from(">IQ", body, 20)
+        unknown = 0xFFFFFFFFFFFFFFFF
+    else:
+        timescale, duration = struct.unpack_from(">II", body, 12)
+        unknown = 0xFFFFFFFF
+    # Fragmented files leave the duration at 0 or all ones.
+    if not timescale or duration in (0, unknown):
+        return None
+    return duration / timescale
+
+
+# Sample entry types of audio tracks, as ffmpeg names their codecs. `mp4a`
+# is told apart by its object type (see `_mp4a_codec`).
+_MP4_SAMPLE_ENTRIES = {
+    b"Opus": "opus",
+    b"fLaC": "flac",
+    b".mp3": "mp3",
+    b"alac": "alac",
+    b"ac-3": "ac3",
+    b"ec-3": "eac3",
+    b"samr": "amr_nb",
+    b"sawb": "amr_wb",
+}
+# MPEG-4 object type indications in `esds`.
+_MP4A_OBJECT_TYPES = {0x40: "aac", 0x66: "aac", 0x67: "aac", 0x68: "aac", 0x69: "mp3", 0x6B: "mp3"}
+
+
+def _mp4_layout(f: BinaryIO) -> MediaLayout | None:
+    end = f.seek(0, os.SEEK_END)
+    mdat_first = False
+    for kind, payload, box_end in _boxes(f, 0, end):
+        if kind == b"mdat":
+            mdat_first = True
+        elif kind == b"moov":
+            return MediaLayout(
+                _mp4_audio_codec(f, payload, box_end), streamable=not mdat_first
+            )
+    return None
+
+
+def _mp4_audio_codec(f: BinaryIO, start: int, end: int) -> str | None:
+    """Codec of the first sound track in `moov` (start, end)."""
+    for kind, trak, trak_end in _boxes(f, start, end):
+        if kind != b"trak":
+            continue
+        mdia = _find_box(f, trak, trak_end, b"mdia")
+        hdlr = _find_box(f, *mdia, b"hdlr") if mdia else None
+        if mdia is None or hdlr is None:
+            continue
+        # version/flags and pre_defined come before the handler type.
+        f.seek(hdlr[0] + 8)
+        if f.read(4) != b"soun":
+            continue
+        box: tuple[int, int] | None = mdia
+        for child in (b"minf", b"stbl", b"stsd"):
+            box = _find_box(f, *box, child) if box else None
+        if box is None:
+            return None
+        # version/flags and the entry count precede the first sample entry.
+        entry = box[0] + 8
+        f.seek(entry)
+        size, entry_type = struct.unpack(">I4s", f.read(8))
+        if entry_type == b"mp4a":
+            return _mp4a_codec(f, entry, min(entry + size, box[1]))
+        return _MP4_SAMPLE_ENTRIES.get(entry_type)
+    return None
+
+
+def _mp4a_codec(f: BinaryIO, entry: int, end: int) -> str | None:
+    # Sound sample entry: 8-byte header, 8 bytes of reserved/data reference,
+    # then a version that decides how many fields precede the child boxes.
+    f.seek(entry + 16)
+    version: int = struct.unpack(">H", f.read(2))[0]
+    children = entry + 36 + {1: 16, 2: 36}.get(version, 0)
+    esds = _find_box(f, children, end, b"esds")
+    if esds is None:
+        return "aac"  # QuickTime files may wrap it; AAC is the norm
+    f.seek(esds[0] + 4)  # version/flags
+    data = f.read(min(esds[1] - esds[0] - 4, 64))
+
+    def descriptor(pos: int) -> tuple[int, int]:
+        """(tag, payload offset) of the descriptor at `pos`."""
+        tag = data[pos]
+        pos += 1
+        for _ in range(4):  # variable-length size, 7 bits per byte
+            pos += 1
+            if not data[pos - 1] & 0x80:
+                break
+        return tag, pos
+
+    tag, pos = descriptor(0)
+    if tag != 0x03:  # ES_Descriptor
+        return None
+    flags = data[pos + 2]
+    pos += 3
+    if flags & 0x80:
+        pos += 2
+    if flags & 0x40:
+        pos += 1 + data[pos]
+    if flags & 0x20:
+        pos += 2
+    tag, pos = descriptor(pos)
+    if tag != 0x04:  # DecoderConfigDescriptor
+        return None
+    return _MP4A_OBJECT_TYPES.get(data[pos])
+
+
+def _find_box(
+    f: BinaryIO, start: int, end: int, box_type: bytes
+) -> tuple[int, int] | None:
+    """Return (payload_start, box_end) of the first `box_type` box."""
+    for kind, payload, box_end in _boxes(f, start, end):
+        if kind == box_type:
+            return payload, box_end
+    return None
+
+
+def _boxes(f: BinaryIO, start: int, end: int) -> Iterator[tuple[bytes, int, int]]:
+    """Yield (type, payload_start, box_end) of the boxes in (start, end)."""
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        header = f.read(16)
+        if len(header) < 8:
+            return
+        size, kind = struct.unpack_from(">I4s", header)
+        payload = pos + 8
+        if size == 1:
+            if len(header) < 16:
+                return
+            size = struct.unpack_from(">Q", header, 8)[0]
+            payload = pos + 16
+        elif size == 0:
+            size = end - pos
+        if size < payload - pos:
+            return
+        yield kind, payload, min(pos + size, end)
+        pos += size
@@ -0,0 +1,240 @@
+"""Energy-based silence trimming before transcription.
+
+Voice messages often start or end with seconds of silence, and some contain
+nothing at all — those used to cost a full upload and API round trip just to
+come back empty. ffmpeg decodes the audio to 16 kHz mono PCM, which is
+read in fixed-size blocks; the RMS of each 20 ms frame is computed with
+NumPy as the blocks arrive and only a voiced/silent flag per frame is kept,
+so memory stays small however long the recording. Then:
+
+- all-silent audio is rejected with EmptyTranscriptionError before upload
+- leading/trailing silence is cut and long pauses are shortened to a short
+  gap: a second ffmpeg run selects the kept frames from the source and
+  encodes them to the speech upload profile
+
+`TrimmedAudio.remap` moves word timestamps back onto the original timeline,
+so SRT exports still line up with the user's recording.
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from src.bot.services.audio import SPEECH_OPUS_ARGS
+from src.bot.services.ffmpeg_scheduler import scheduler
+from src.bot.services.transcription import (
+    AudioBuffer,
+    AudioSource,
+    EmptyTranscriptionError,
+    TranscriptionResult,
+)
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = 320  # 20 ms
+_FRAME_SECONDS = FRAME_SAMPLES / SAMPLE_RATE
+_FRAME_BYTES = 2 * FRAME_SAMPLES  # s16le
+# PCM handed over per read while scanning: 2 s, a whole number of frames.
+_BLOCK_BYTES = 100 * _FRAME_BYTES
+
+
+@dataclass(frozen=True)
+class TrimmedAudio:
+    """Audio with silence removed, plus the map back to the original.
+
+    `segments` holds (trimmed_start, original_start, length) in seconds for
+    each stretch that was kept, in order. When nothing was trimmed `source`
+    is the caller's original audio and `segments` is empty.
+    """
+
+    source: AudioSource
+    segments: tuple[tuple[float, float, float], ...]
+    original_duration: float
+
+    @property
+    def removed_seconds(self) -> float:
+        if not self.segments:
+            return 0.0
+        return self.original_duration - sum(length for _, _, length in self.segments)
+
+    def to_original(self, t: float, *, end: bool = False) -> float:
+        """Map a time on the trimmed timeline to the original one.
+
+        A time exactly on a cut belongs to the next stretch, or to the
+        previous one when `end` is set, so words never span a removed pause.
+        """
+        if not self.segments:
+            return t
+        starts = [start for start, _, _ in self.segments]
+        index = (bisect.bisect_left if end else bisect.bisect_right)(starts, t) - 1
+        trimmed_start, original_start, length = self.segments[max(index, 0)]
+        return original_start + min(max(t - trimmed_start, 0.0), length)
+
+    def remap(self, result: TranscriptionResult) -> TranscriptionResult:
+        """Return `result` with word timestamps on the original timeline."""
+        if not self.segments:
+            return result
+        words = [
+            replace(
+                w,
+                start=None if w.start is None else self.to_original(w.start),
+                end=None if w.end is None else self.to_original(w.end, end=True),
+            )
+            for w in result.words
+        ]
+        return TranscriptionResult(text=result.text, words=words)
+
+
+def speech_frames(
+    samples: np.ndarray, *, threshold_db: float = -40.0
+) -> np.ndarray:
+    """Boolean mask of 20 ms frames whose RMS level exceeds `threshold_db` dBFS."""
+    count = len(samples) // FRAME_SAMPLES
+    frames = samples[: count * FRAME_SAMPLES].reshape(count, FRAME_SAMPLES)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+    level = 20 * np.log10(np.maximum(rms, 1e-9) / 32768)
+    return level > threshold_db
+
+
+def keep_intervals(
+    voiced: np.ndarray, *, pad_frames: int, max_gap_frames: int
+) -> list[tuple[int, int]]:
+    """Frame ranges [start, end) to keep around voiced frames.
+
+    Each voiced run is widened by `pad_frames` on both sides. Gaps left
+    between the widened runs are kept whole when shorter than
+    `max_gap_frames` (so pauses under `max_gap_frames + 2 * pad_frames`
+    survive) and removed otherwise, leaving only the padding.
+    """
+    kernel = np.ones(2 * pad_frames + 1, dtype=np.int32)
+    keep = np.convolve(voiced.astype(np.int32), kernel, mode="same") > 0
+    edges = np.diff(np.concatenate(([0], keep.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if len(starts) == 0:
+        return []
+    split = np.flatnonzero(starts[1:] - ends[:-1] >= max_gap_frames)
+    run_starts = np.concatenate(([starts[0]], starts[split + 1]))
+    run_ends = np.concatenate((ends[split], [ends[-1]]))
+    return [(int(s), int(e)) for s, e in zip(run_starts, run_ends, strict=True)]
+
+
+async def trim_silence(
+    source: AudioSource,
+    *,
+    timeout: int = 120,
+    threshold_db: float = -40.0,
+    pad: float = 0.25,
+    max_gap: float = 1.0,
+    min_speech: float = 0.1,
+    min_removed: float = 1.0,
+) -> TrimmedAudio:
+    """Drop silence from `source` ahead of transcription.
+
+    Speech is padded by `pad` seconds on each side, so pauses shorter than
+    about `max_gap` + 2 * `pad` are kept whole and longer ones shrink to
+    2 * `pad`. The original is returned untouched when less than
+    `min_removed` seconds would go, or if ffmpeg can't decode it (the
+    provider may still manage).
+
+    Raises EmptyTranscriptionError if under `min_speech` seconds of the audio
+    rise above `threshold_db` dBFS.
+    """
+    scan = await _scan_frames(source, threshold_db=threshold_db, timeout=timeout)
+    if scan is None:
+        return TrimmedAudio(source, (), 0.0)
+    voiced, duration = scan
+    unchanged = TrimmedAudio(source, (), duration)
+
+    if voiced.sum() * _FRAME_SECONDS < min_speech:
+        raise EmptyTranscriptionError("Audio contains no speech")
+
+    intervals = keep_intervals(
+        voiced,
+        pad_frames=round(pad / _FRAME_SECONDS),
+        max_gap_frames=round(max_gap / _FRAME_SECONDS),
+    )
+    kept_frames = sum(end - start for start, end in intervals)
+    if duration - kept_frames * _FRAME_SECONDS < min_removed:
+        return unchanged
+
+    segments: list[tuple[float, float, float]] = []
+    position = 0.0
+    for start, end in intervals:
+        length = (end - start) * _FRAME_SECONDS
+        segments.append((position, start * _FRAME_SECONDS, length))
+        position += length
+    # Re-framed exactly like the scan, frame n of the filter is voiced[n].
+    select = "+".join(f"between(n,{start},{end - 1})" for start, end in intervals)
+
+    try:
+        returncode, stdout, stderr = await scheduler.run(
+            "ffmpeg",
+            "-i",
+            "pipe:0" if isinstance(source, AudioBuffer) else source,
+            "-vn",
+            "-af",
+            f"aresample={SAMPLE_RATE},asetnsamples=n={FRAME_SAMPLES}:p=0,"
+            f"aselect='{select}',asetpts=N/SR/TB",
+            *SPEECH_OPUS_ARGS,
+            "-f",
+            "ogg",
+            "pipe:1",
+            timeout=timeout,
+            input=source.data if isinstance(source, AudioBuffer) else None,
+        )
+    except (OSError, TimeoutError) as e:
+        logger.warning("Silence trimming skipped: %r", e)
+        return unchanged
+    if returncode != 0 or not stdout:
+        logger.warning(
+            "Silence trimming failed: %s", stderr.decode(errors="replace")[-200:]
+        )
+        return unchanged
+    return TrimmedAudio(AudioBuffer(stdout, "trimmed.ogg"), tuple(segments), duration)
+
+
+async def _scan_frames(
+    source: AudioSource, *, threshold_db: float, timeout: int
+) -> tuple[np.ndarray, float] | None:
+    """(`speech_frames` mask, duration) of `source`, or None if ffmpeg can't
+    decode it. The PCM is looked at one block at a time and not kept."""
+    masks: list[np.ndarray] = []
+    size = 0
+
+    def consume(block: bytes) -> None:
+        nonlocal size
+        size += len(block)
+        # Blocks hold whole frames; only the last may end in a partial one.
+        samples = np.frombuffer(block, dtype="<i2", count=len(block) // 2)
+        masks.append(speech_frames(samples, threshold_db=threshold_db))
+
+    try:
+        returncode, _ = await scheduler.stream(
+            "ffmpeg",
+            "-i",
+            "pipe:0" if isinstance(source, AudioBuffer) else source,
+            "-vn",
+            "-ac",
+            "1",
+            "-ar",
+            str(SAMPLE_RATE),
+            "-f",
+            "s16le",
+            "pipe:1",
+            consume=consume,
+            timeout=timeout,
+            input=source.data if isinstance(source, AudioBuffer) else None,
+            block_size=_BLOCK_BYTES,
+        )
+    except (OSError, TimeoutError) as e:
+        logger.warning("PCM decode skipped: %r", e)
+        return None
+    if returncode != 0 or size < _FRAME_BYTES:
+        return None
+    return np.concatenate(masks), size // 2 / SAMPLE_RATE
@@ -1,14 +1,32 @@
+import asyncio
+import contextlib
+import contextvars
+import inspect
+import json
 import logging
+import math
+import struct
+import sys
+from array import array
+from collections.abc import AsyncIterator, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import Protocol
+from typing import Any, Protocol
 
-from elevenlabs.client import ElevenLabs
+import httpx
+from elevenlabs.client import AsyncElevenLabs, ElevenLabs
 from elevenlabs.types.speech_to_text_chunk_response_model import (
     SpeechToTextChunkResponseModel,
 )
 
 logger = logging.getLogger(__name__)
 
+# The transcriber whose upload slot the current task holds (see
+# `AsyncElevenLabsTranscriber.slot`), so `transcribe` doesn't take a second.
+_held_slot: contextvars.ContextVar[object | None] = contextvars.ContextVar(
+    "_held_slot", default=None
+)
+
 
 class EmptyTranscriptionError(RuntimeError):
     """Raised when the API returns no speech content."""
@@ -33,45 +51,232 @@ class TranscriptionResult:
     words: list[WordData] = field(default_factory=list)
 
 
+# Token count, UTF-8 text length, JSON name tables length.
+_TABLE_HEADER = struct.Struct("<III")
+
+
+@dataclass(frozen=True)
+class WordTable:
+    """Word-level data stored column-wise, for transcripts kept in memory.
+
+    A list of `WordData` costs a dataclass, a dict and several boxed values
+    per token; an hour of diarized speech is tens of thousands of them. Here
+    every column is a flat array: `starts`/`ends` (NaN for a missing time),
+    indexes into the interned `speaker_ids` and `type_names` tables, and the
+    token texts joined into `text`, token i being
+    `text[offsets[i]:offsets[i + 1]]`.
+    """
+
+    text: str
+    offsets: array[int]
+    starts: array[float]
+    ends: array[float]
+    speaker_codes: array[int]
+    speaker_ids: tuple[str | None, ...]
+    type_codes: array[int]
+    type_names: tuple[str, ...]
+
+    @classmethod
+    def from_words(cls, words: Iterable[Any]) -> "WordTable":
+        """Build from `WordData` or any objects with the same attributes
+        (such as the SDK's word models)."""
+        if isinstance(words, WordTable):
+            return words
+        texts: list[str] = []
+        offsets = array("I", [0])
+        starts = array("d")
+        ends = array("d")
+        speakers: dict[str | None, int] = {None: 0}
+        speaker_codes = array("H")
+        types: dict[str, int] = {}
+        type_codes = array("B")
+        position = 0
+        for w in words:
+            texts.append(w.text)
+            position += len(w.text)
+            offsets.append(position)
+            starts.append(math.nan if w.start is None else w.start)
+            ends.append(math.nan if w.end is None else w.end)
+            speaker_codes.append(speakers.setdefault(w.speaker_id, len(speakers)))
+            type_codes.append(types.setdefault(w.type, len(types)))
+        return cls(
+            "".join(texts),
+            offsets,
+            starts,
+            ends,
+            speaker_codes,
+            tuple(speakers),
+            type_codes,
+            tuple(types),
+        )
+
+    def __len__(self) -> int:
+        return len(self.type_codes)
+
+    def __iter__(self) -> Iterator[WordData]:
+        for i in range(len(self)):
+            start, end = self.starts[i], self.ends[i]
+            yield WordData(
+                self.text_of(i),
+                None if math.isnan(start) else start,
+                None if math.isnan(end) else end,
+                self.speaker_ids[self.speaker_codes[i]],
+                self.type_names[self.type_codes[i]],
+            )
+
+    def text_of(self, i: int) -> str:
+        return self.text[self.offsets[i] : self.offsets[i + 1]]
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the table."""
+        return sys.getsizeof(self.text) + sum(
+            a.itemsize * len(a)
+            for a in (
+                self.offsets, self.starts, self.ends, self.speaker_codes, self.type_codes
+            )
+        )
+
+    def to_bytes(self) -> bytes:
+        """Serialize for `from_bytes` (arrays in native byte order)."""
+        text = self.text.encode("utf-8")
+        names = json.dumps([self.speaker_ids, self.type_names]).encode("utf-8")
+        return b"".join((
+            _TABLE_HEADER.pack(len(self), len(text), len(names)),
+            text,
+            names,
+            self.offsets.tobytes(),
+            self.starts.tobytes(),
+            self.ends.tobytes(),
+            self.speaker_codes.tobytes(),
+            self.type_codes.tobytes(),
+        ))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "WordTable":
+        view = memoryview(data)
+        count, text_len, names_len = _TABLE_HEADER.unpack_from(view)
+        pos = _TABLE_HEADER.size
+        text = str(view[pos : pos + text_len], "utf-8")
+        pos += text_len
+        speaker_ids, type_names = json.loads(bytes(view[pos : pos + names_len]))
+        pos += names_len
+        offsets = array("I")
+        starts = array("d")
+        ends = array("d")
+        speaker_codes = array("H")
+        type_codes = array("B")
+        for column, n in (
+            (offsets, count + 1),
+            (starts, count),
+            (ends, count),
+            (speaker_codes, count),
+            (type_codes, count),
+        ):
+            end = pos + column.itemsize * n
+            column.frombytes(view[pos:end])
+            pos = end
+        return cls(
+            text,
+            offsets,
+            starts,
+            ends,
+            speaker_codes,
+            tuple(speaker_ids),
+            type_codes,
+            tuple(type_names),
+        )
+
+    def type_code(self, name: str) -> int:
+        """Code of type `name` in this table, or -1 if no token has it."""
+        try:
+            return self.type_names.index(name)
+        except ValueError:
+            return -1
+
+
+@dataclass(frozen=True)
+class AudioBuffer:
+    """Audio held in memory; `filename` tells the provider the format."""
+
+    data: bytes
+    filename: str
+
+
+# A file on disk or an in-memory buffer.
+AudioSource = str | AudioBuffer
+
+
 class TranscriptionClient(Protocol):
     """Protocol for transcription clients (enables mocking)."""
 
-    def transcribe(self, file_path: str) -> TranscriptionResult: ...
+    def transcribe(self, source: AudioSource) -> TranscriptionResult: ...
+
+
+class AsyncTranscriptionClient(Protocol):
+    """Protocol for transcription clients that run on the event loop."""
+
+    async def transcribe(self, source: AudioSource) -> TranscriptionResult: ...
+
+
+async def transcribe_file(
+    client: TranscriptionClient | AsyncTranscriptionClient, source: AudioSource
+) -> TranscriptionResult:
+    """Transcribe `source` with either kind of client.
+
+    Async clients are awaited directly; blocking ones run in a worker thread
+    so they don't stall the event loop.
+    """
+    if inspect.iscoroutinefunction(client.transcribe):
+        return await client.transcribe(source)  # type: ignore[no-any-return]
+    return await asyncio.to_thread(client.transcribe, source)  # type: ignore[arg-type]
+
+
+def transcription_slot(
+    client: TranscriptionClient | AsyncTranscriptionClient,
+) -> contextlib.AbstractAsyncContextManager[object]:
+    """The client's upload slot, or a no-op for clients without one.
+
+    Enter it outside `asyncio.wait_for` so the time spent queueing for a
+    slot doesn't count against the transcription timeout.
+    """
+    slot = getattr(client, "slot", None)
+    if slot is None:
+        return contextlib.nullcontext()
+    return slot()  # type: ignore[no-any-return]
 
 
 def format_diarized_transcript(
-    result: SpeechToTextChunkResponseModel,
+    result: SpeechToTextChunkResponseModel | TranscriptionResult,
 ) -> str:
     """Format a transcript with speaker labels from the words array.
 
     Groups consecutive words by speaker_id and labels each turn.
     If only one speaker is detected, returns plain text without labels.
+    The words are read through a `WordTable`, used as is when
+    `result.words` already is one.
     """
-    words = result.words
-    if not words:
+    if not result.words:
         return result.text
+    words = WordTable.from_words(result.words)
 
-    speaker_ids: set[str] = set()
-    for w in words:
-        if w.speaker_id is not None:
-            speaker_ids.add(w.speaker_id)
-
-    if len(speaker_ids) <= 1:
+    if sum(1 for sid in words.speaker_ids if sid is not None) <= 1:
         return result.text
 
+    word, spacing = words.type_code("word"), words.type_code("spacing")
     speaker_label_map: dict[str, str] = {}
     label_counter = 0
     segments: list[str] = []
     current_speaker: str | None = None
     current_words: list[str] = []
 
-    for w in words:
-        if w.type != "word":
-            if w.type == "spacing" and current_words:
-                current_words.append(w.text)
+    for i, code in enumerate(words.type_codes):
+        if code != word:
+            if code == spacing and current_words:
+                current_words.append(words.text_of(i))
             continue
 
-        sid = w.speaker_id or "unknown"
+        sid = words.speaker_ids[words.speaker_codes[i]] or "unknown"
         if sid != current_speaker:
             if current_words and current_speaker is not None:
                 label = speaker_label_map[current_speaker]
@@ -82,7 +287,7 @@ def format_diarized_transcript(
                 label_counter += 1
                 speaker_label_map[sid] = f"Speaker {label_counter}"
 
-        current_words.append(w.text)
+        current_words.append(words.text_of(i))
 
     if current_words and current_speaker is not None:
         label = speaker_label_map[current_speaker]
@@ -91,6 +296,106 @@ def format_diarized_transcript(
     return "\n".join(segments)
 
 
+def merge_chunk_results(
+    chunks: list[tuple[TranscriptionResult, float]],
+) -> TranscriptionResult:
+    """Stitch per-chunk results of one long file into a single result.
+
+    `chunks` holds (result, start_offset) pairs in playback order. Word
+    timestamps are shifted onto the original timeline and speaker ids are
+    reconciled across chunks (see `_reconcile_speakers`) before the text is
+    rebuilt with `format_diarized_transcript`.
+
+    Raises EmptyTranscriptionError if no chunk contains speech.
+    """
+    words: list[WordData] = []
+    mapping = _reconcile_speakers([result.words for result, _ in chunks])
+    for index, (result, offset) in enumerate(chunks):
+        if not result.words:
+            continue
+        if words:
+            words.append(WordData(text=" ", type="spacing"))
+        for w in result.words:
+            words.append(
+                WordData(
+                    text=w.text,
+                    start=None if w.start is None else w.start + offset,
+                    end=None if w.end is None else w.end + offset,
+                    speaker_id=(
+                        None
+                        if w.speaker_id is None
+                        else mapping[index][w.speaker_id]
+                    ),
+                    type=w.type,
+                )
+            )
+
+    plain = "".join(w.text for w in words if w.type in ("word", "spacing"))
+    text = format_diarized_transcript(TranscriptionResult(plain.strip(), words))
+    if not text.strip():
+        raise EmptyTranscriptionError("Transcription returned empty text")
+    return TranscriptionResult(text=text, words=words)
+
+
+def scale_timestamps(
+    result: TranscriptionResult, factor: float
+) -> TranscriptionResult:
+    """Multiply word timestamps by `factor`.
+
+    Maps a transcript of audio played back `factor` times faster onto the
+    original timeline.
+    """
+    if factor == 1.0:
+        return result
+    words = [
+        WordData(
+            text=w.text,
+            start=None if w.start is None else w.start * factor,
+            end=None if w.end is None else w.end * factor,
+            speaker_id=w.speaker_id,
+            type=w.type,
+        )
+        for w in result.words
+    ]
+    return TranscriptionResult(text=result.text, words=words)
+
+
+def _reconcile_speakers(
+    chunks: list[list[WordData]],
+) -> list[dict[str, str]]:
+    """Map each chunk's local speaker ids onto file-wide ids.
+
+    The provider numbers speakers independently per request, so ids from
+    different chunks don't correspond. Chunks are cut at pauses, and the
+    person talking just before a cut usually keeps talking after it: the
+    first voice of a chunk is matched to the last voice of the previous one,
+    and further voices to the most recently active remaining speakers. New
+    ids are only created when a chunk has more voices than seen so far.
+    """
+    mappings: list[dict[str, str]] = []
+    recent: list[str] = []  # file-wide ids, most recently active first
+    created = 0
+    for words in chunks:
+        mapping: dict[str, str] = {}
+        available = list(recent)
+        for w in words:
+            if w.speaker_id is None or w.speaker_id in mapping:
+                continue
+            if available:
+                mapping[w.speaker_id] = available.pop(0)
+            else:
+                mapping[w.speaker_id] = f"speaker_{created}"
+                created += 1
+        mappings.append(mapping)
+
+        active: list[str] = []
+        for w in reversed(words):
+            if w.speaker_id is not None and mapping[w.speaker_id] not in active:
+                active.append(mapping[w.speaker_id])
+        recent = active + [gid for gid in recent if gid not in active]
+    return mappings
+
+
 class ElevenLabsTranscriber:
     """Transcription service using ElevenLabs Scribe v2."""
 
@@ -100,8 +405,8 @@ class ElevenLabsTranscriber:
         self._client = ElevenLabs(api_key=api_key, timeout=timeout)
         self._timeout = timeout
 
-    def transcribe(self, file_path: str) -> TranscriptionResult:
-        """Transcribe an audio file and return text + word-level data.
+    def transcribe(self, source: AudioSource) -> TranscriptionResult:
+        """Transcribe an audio file or buffer and return text + word-level data.
 
         Uses speaker diarization. For multi-speaker audio, returns
         labeled transcript. For single-speaker audio, returns plain text.
@@ -109,31 +414,203 @@ class ElevenLabsTranscriber:
         Raises RuntimeError on API failure.
         """
         try:
-            with open(file_path, "rb") as f:
+            with _upload(source) as f:
                 result = self._client.speech_to_text.convert(
                     file=f,
                     model_id="scribe_v2",
                     tag_audio_events=False,
                     diarize=True,
                 )
-            text = format_diarized_transcript(result)  # type: ignore[arg-type]
-            if not text.strip():
-                raise EmptyTranscriptionError("Transcription returned empty text")
-
-            words = [
-                WordData(
-                    text=w.text,
-                    start=w.start,
-                    end=w.end,
-                    speaker_id=w.speaker_id,
-                    type=w.type if isinstance(w.type, str) else "word",
-                )
-                for w in result.words  # type: ignore[union-attr]
-            ]
-
-            logger.info("Transcribed %s (%d chars)", file_path, len(text))
-            return TranscriptionResult(text=text, words=words)
+            return _to_result(result, source)
         except RuntimeError:
             raise
         except Exception as e:
             raise RuntimeError(f"ElevenLabs transcription failed: {e}") from e
+
+
+class AsyncElevenLabsTranscriber:
+    """Non-blocking ElevenLabs Scribe v2 client.
+
+    All requests share one pooled HTTP connection; at most `max_concurrency`
+    uploads are in flight at once, the rest wait on a semaphore. Cancelling
+    `transcribe` (e.g. from `asyncio.wait_for`) aborts the HTTP request.
+    Callers with a deadline take the slot first with `slot` (see
+    `transcription_slot`), so the wait for it isn't part of the deadline.
+    """
+
+    def __init__(
+        self, api_key: str, *, timeout: int = 900, max_concurrency: int = 32
+    ) -> None:
+        self._http = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+            ),
+        )
+        self._client = AsyncElevenLabs(
+            api_key=api_key, timeout=timeout, httpx_client=self._http
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    @contextlib.asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one of the upload slots; `transcribe` calls made inside
+        (in this task) use it instead of taking another."""
+        if _held_slot.get() is self:
+            yield
+            return
+        async with self._semaphore:
+            token = _held_slot.set(self)
+            try:
+                yield
+            finally:
+                _held_slot.reset(token)
+
+    async def transcribe(self, source: AudioSource) -> TranscriptionResult:
+        """Transcribe audio; same contract as `ElevenLabsTranscriber`."""
+        async with self.slot():
+            try:
+                with _upload(source) as f:
+                    result = await self._client.speech_to_text.convert(
+                        file=f,
+                        model_id="scribe_v2",
+                        tag_audio_events=False,
+                        diarize=True,
+                    )
+                return _to_result(result, source)
+            except RuntimeError:
+                raise
+            except Exception as e:
+                raise RuntimeError(f"ElevenLabs transcription failed: {e}") from e
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP connection."""
+        await self._http.aclose()
+
+
+class TranscriptionExecutor:
+    """Runs provider calls on a dedicated, sized thread pool.
+
+    Wraps any transcription client and is itself an async client. Async
+    clients are awaited directly, so a timeout cancels — and aborts — the
+    underlying HTTP request; no threads are created for them. Blocking
+    clients run on a pool of `max_workers` threads instead of the default
+    executor; a thread cannot be interrupted, so a call that keeps running
+    after its caller gave up is counted as orphaned until it ends.
+    """
+
+    def __init__(
+        self,
+        client: TranscriptionClient | AsyncTranscriptionClient,
+        *,
+        max_workers: int = 4,
+    ) -> None:
+        self._client = client
+        self._pool: ThreadPoolExecutor | None = None
+        if not inspect.iscoroutinefunction(client.transcribe):
+            self._pool = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="transcription"
+            )
+        self._in_flight = 0
+        self._cancelled = 0
+        self._orphaned = 0
+        self._orphaned_total = 0
+
+    async def transcribe(self, source: AudioSource) -> TranscriptionResult:
+        self._in_flight += 1
+        try:
+            if self._pool is None:
+                return await self._client.transcribe(source)  # type: ignore[misc, no-any-return]
+            return await self._run_blocking(source, self._pool)
+        except asyncio.CancelledError:
+            self._cancelled += 1
+            raise
+        finally:
+            self._in_flight -= 1
+
+    async def _run_blocking(
+        self, source: AudioSource, pool: ThreadPoolExecutor
+    ) -> TranscriptionResult:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[TranscriptionResult] = loop.run_in_executor(
+            pool,
+            self._client.transcribe,  # type: ignore[arg-type]
+            source,
+        )
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if not future.done():
+                self._orphaned += 1
+                self._orphaned_total += 1
+                logger.warning(
+                    "Transcription of %s abandoned; worker thread still running",
+                    _describe(source),
+                )
+                future.add_done_callback(self._orphan_finished)
+            raise
+
+    def slot(self) -> contextlib.AbstractAsyncContextManager[object]:
+        """The wrapped client's upload slot (see `transcription_slot`)."""
+        return transcription_slot(self._client)
+
+    def _orphan_finished(self, future: asyncio.Future[TranscriptionResult]) -> None:
+        self._orphaned -= 1
+        if not future.cancelled():
+            # Retrieve the outcome so asyncio doesn't log it as unhandled.
+            future.exception()
+
+    def metrics(self) -> dict[str, int]:
+        """Counters for the /metrics endpoint (orphans only for blocking clients)."""
+        metrics = {
+            "transcription_in_flight": self._in_flight,
+            "transcription_cancelled_total": self._cancelled,
+        }
+        if self._pool is not None:
+            metrics["transcription_orphaned"] = self._orphaned
+            metrics["transcription_orphaned_total"] = self._orphaned_total
+        return metrics
+
+    async def aclose(self) -> None:
+        """Stop the worker pool and close the wrapped client."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        aclose = getattr(self._client, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+def _upload(source: AudioSource) -> contextlib.AbstractContextManager[Any]:
+    """Open `source` as the `file` argument of the speech-to-text API."""
+    if isinstance(source, AudioBuffer):
+        return contextlib.nullcontext((source.filename, source.data))
+    return open(source, "rb")
+
+
+def _describe(source: AudioSource) -> str:
+    if isinstance(source, AudioBuffer):
+        return f"{source.filename} ({len(source.data)} bytes in memory)"
+    return source
+
+
+def _to_result(
+    result: SpeechToTextChunkResponseModel, source: AudioSource
+) -> TranscriptionResult:
+    text = format_diarized_transcript(result)
+    if not text.strip():
+        raise EmptyTranscriptionError("Transcription returned empty text")
+
+    words = [
+        WordData(
+            text=w.text,
+            start=w.start,
+            end=w.end,
+            speaker_id=w.speaker_id,
+            type=w.type if isinstance(w.type, str) else "word",
+        )
+        for w in result.words or []
+    ]
+
+    logger.info("Transcribed %s (%d chars)", _describe(source), len(text))
+    return TranscriptionResult(text=text, words=words)
@@ -1,9 +1,15 @@
 from __future__ import annotations
 
+import asyncio
 import os
 import time
+from collections import Counter, OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
 from dataclasses import dataclass
 
+Key = tuple[int, int]
+
 
 @dataclass(frozen=True)
 class StoredAudio:
@@ -11,6 +17,7 @@ class StoredAudio:
 
     path: str
     duration: int | None
+    size: int = 0
 
 
 class MediaAudioStore:
@@ -19,46 +26,131 @@ class MediaAudioStore:
     Keyed by (user_id, message_id) like `TranscriptionStore`, so a callback can
     transcribe or send the file after the link message was handled. Expired
     entries have their files removed.
+
+    Entries are kept in save order (expiry order), so `save` drops expired
+    ones from the old end and lookups check only the requested key. With
+    `max_bytes` set, the files' total size (taken once, at save) is kept
+    under it by deleting the least recently used ones; the newest entry is
+    never evicted. `run_sweeper` expires entries nobody asks for again and
+    forgets files that were removed behind the store's back.
+
+    Files being read by a handler are pinned with `use`: eviction skips
+    them, and a pinned entry that expires or is discarded keeps its file
+    until the last user releases it.
     """
 
-    def __init__(self, ttl_seconds: int = 3600) -> None:
+    def __init__(self, ttl_seconds: int = 3600, *, max_bytes: int = 0) -> None:
         self._ttl = ttl_seconds
-        self._store: dict[tuple[int, int], tuple[StoredAudio, float]] = {}
+        self._max_bytes = max_bytes
+        self._store: OrderedDict[Key, tuple[StoredAudio, float]] = OrderedDict()
+        self._lru: OrderedDict[Key, None] = OrderedDict()  # least recently used first
+        self._bytes = 0
+        self._evictions = 0
+        self._pins: Counter[str] = Counter()  # path -> handlers using it
+        self._deferred: set[str] = set()  # dropped while pinned; delete on release
+
+    def __len__(self) -> int:
+        return len(self._store)
 
     def save(
         self, user_id: int, message_id: int, path: str, duration: int | None
     ) -> None:
-        self.cleanup()
-        self._store[(user_id, message_id)] = (
-            StoredAudio(path, duration),
-            time.monotonic(),
-        )
+        now = time.monotonic()
+        self._expire(now)
+        key = (user_id, message_id)
+        if key in self._store:
+            self._drop(key, delete=self._store[key][0].path != path)
+        self._deferred.discard(path)
+        audio = StoredAudio(path, duration, os.path.getsize(path))
+        self._store[key] = (audio, now)
+        self._lru[key] = None
+        self._bytes += audio.size
+        self._fit()
 
     def get(self, user_id: int, message_id: int) -> StoredAudio | None:
         """Return the stored audio, or None if expired or not found."""
-        self.cleanup()
-        entry = self._store.get((user_id, message_id))
+        key = (user_id, message_id)
+        entry = self._store.get(key)
         if entry is None:
             return None
-        audio, _ = entry
-        if not os.path.exists(audio.path):
-            del self._store[(user_id, message_id)]
+        audio, ts = entry
+        if time.monotonic() - ts > self._ttl:
+            self._drop(key)
             return None
+        self._lru.move_to_end(key)
         return audio
 
+    @contextmanager
+    def use(self, user_id: int, message_id: int) -> Iterator[StoredAudio | None]:
+        """`get`, with the file pinned until the block exits."""
+        audio = self.get(user_id, message_id)
+        if audio is None:
+            yield None
+            return
+        self._pins[audio.path] += 1
+        try:
+            yield audio
+        finally:
+            self._pins[audio.path] -= 1
+            if not self._pins[audio.path]:
+                del self._pins[audio.path]
+                if audio.path in self._deferred:
+                    self._deferred.discard(audio.path)
+                    _remove(audio.path)
+
     def discard(self, user_id: int, message_id: int) -> None:
         """Drop an entry and delete its file."""
-        entry = self._store.pop((user_id, message_id), None)
-        if entry is not None:
-            _remove(entry[0].path)
+        if (user_id, message_id) in self._store:
+            self._drop((user_id, message_id))
 
-    def cleanup(self) -> None:
-        now = time.monotonic()
-        expired = [
-            key for key, (_, ts) in self._store.items() if now - ts > self._ttl
-        ]
-        for key in expired:
-            audio, _ = self._store.pop(key)
+    def sweep(self) -> None:
+        """Drop expired entries and those whose file no longer exists."""
+        self._expire(time.monotonic())
+        for key in [k for k, (a, _) in self._store.items() if not os.path.exists(a.path)]:
+            self._drop(key, delete=False)
+
+    async def run_sweeper(self, interval: float = 60.0) -> None:
+        """Call `sweep` every `interval` seconds; run as a background task."""
+        while True:
+            await asyncio.sleep(interval)
+            self.sweep()
+
+    def metrics(self) -> dict[str, int]:
+        """Counters for the /metrics endpoint."""
+        return {
+            "link_audio_entries": len(self._store),
+            "link_audio_bytes": self._bytes,
+            "link_audio_evictions_total": self._evictions,
+        }
+
+    def _expire(self, now: float) -> None:
+        while self._store:
+            key, (_, ts) = next(iter(self._store.items()))
+            if now - ts <= self._ttl:
+                break
+            self._drop(key)
+
+    def _fit(self) -> None:
+        if self._max_bytes <= 0 or self._bytes <= self._max_bytes:
+            return
+        newest = next(reversed(self._lru))
+        for key in list(self._lru):  # least recently used first
+            if self._bytes <= self._max_bytes:
+                break
+            if key == newest or self._store[key][0].path in self._pins:
+                continue
+            self._drop(key)
+            self._evictions += 1
+
+    def _drop(self, key: Key, *, delete: bool = True) -> None:
+        audio, _ = self._store.pop(key)
+        del self._lru[key]
+        self._bytes -= audio.size
+        if not delete:
+            return
+        if audio.path in self._pins:
+            self._deferred.add(audio.path)
+        else:
             _remove(audio.path)
 
 
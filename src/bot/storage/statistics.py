@@ -1,20 +1,22 @@
+import asyncio
+import contextlib
+import itertools
 import logging
+import sqlite3
+from collections.abc import AsyncIterator
+from pathlib import Path
 
 import aiosqlite
 
 logger = logging.getLogger(__name__)
 
 
-class StatisticsDB:
-    """Async SQLite database for user statistics."""
-
-    def __init__(self, db_path: str) -> None:
-        self._db_path = db_path
-        self._db: aiosqlite.Connection | None = None
-
-    async def initialize(self) -> None:
-        self._db = await aiosqlite.connect(self._db_path)
-        await self._db.execute("""
+# Schema migrations, applied in order by `StatisticsDB.initialize`. PRAGMA
+# user_version records how many have run; only ever append new steps.
+_MIGRATIONS: tuple[tuple[str, ...], ...] = (
+    # 1: base tables (IF NOT EXISTS: databases created before versioning)
+    (
+        """
             CREATE TABLE IF NOT EXISTS user_statistics (
                 user_id INTEGER PRIMARY KEY,
                 username TEXT,
@@ -23,8 +25,8 @@ class StatisticsDB:
                 first_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
-        """)
-        await self._db.execute("""
+        """,
+        """
             CREATE TABLE IF NOT EXISTS error_statistics (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 error_type TEXT NOT NULL,
@@ -32,9 +34,9 @@ class StatisticsDB:
                 error_detail TEXT,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
-        """)
+        """,
         # Secretary usage stats (separate from direct usage)
-        await self._db.execute("""
+        """
             CREATE TABLE IF NOT EXISTS secretary_statistics (
                 user_id INTEGER PRIMARY KEY,
                 username TEXT,
@@ -43,18 +45,18 @@ class StatisticsDB:
                 first_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
-        """)
+        """,
         # Active secretary connections (persisted across restarts)
-        await self._db.execute("""
+        """
             CREATE TABLE IF NOT EXISTS secretary_connections (
                 user_id INTEGER PRIMARY KEY,
                 connection_id TEXT NOT NULL,
                 username TEXT,
                 connected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
-        """)
+        """,
         # Untranscribed manual prompts awaiting auto-deletion.
-        await self._db.execute("""
+        """
             CREATE TABLE IF NOT EXISTS secretary_pending_prompts (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 connection_id TEXT NOT NULL,
@@ -62,19 +64,283 @@ class StatisticsDB:
                 message_id INTEGER NOT NULL,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
-        """)
-        await self._db.commit()
+        """,
+    ),
+    # 2: an index for every query path, so no statement scans a table
+    (
+        # get_all_stats / get_all_secretary_stats ORDER BY last_used_at; the
+        # index alone also covers the user ID union in get_all_user_ids.
+        "CREATE INDEX IF NOT EXISTS idx_user_statistics_last_used "
+        "ON user_statistics (last_used_at)",
+        "CREATE INDEX IF NOT EXISTS idx_secretary_statistics_last_used "
+        "ON secretary_statistics (last_used_at)",
+        # get_error_stats counts per type straight from the index.
+        "CREATE INDEX IF NOT EXISTS idx_error_statistics_type "
+        "ON error_statistics (error_type)",
+        "CREATE INDEX IF NOT EXISTS idx_secretary_connections_connection "
+        "ON secretary_connections (connection_id)",
+        "CREATE INDEX IF NOT EXISTS idx_pending_prompts_message "
+        "ON secretary_pending_prompts (connection_id, message_id)",
+        # Covering: the expiry sweep never touches the table.
+        "CREATE INDEX IF NOT EXISTS idx_pending_prompts_created "
+        "ON secretary_pending_prompts (created_at, connection_id, chat_id, message_id)",
+    ),
+    # 3: per-day and per-hour usage rollups (UTC), kept up to date by
+    # record_usage / record_secretary_usage; source is 'direct' or 'secretary'
+    (
+        """
+            CREATE TABLE IF NOT EXISTS usage_daily (
+                day TEXT NOT NULL,
+                source TEXT NOT NULL,
+                transcriptions INTEGER NOT NULL,
+                audio_duration_seconds INTEGER NOT NULL,
+                PRIMARY KEY (day, source)
+            ) WITHOUT ROWID
+        """,
+        """
+            CREATE TABLE IF NOT EXISTS usage_hourly (
+                hour TEXT NOT NULL,
+                source TEXT NOT NULL,
+                transcriptions INTEGER NOT NULL,
+                audio_duration_seconds INTEGER NOT NULL,
+                PRIMARY KEY (hour, source)
+            ) WITHOUT ROWID
+        """,
+    ),
+    # 4: error counters per type (lifetime) and per type and day, so the
+    # raw error_statistics rows can be pruned; backfilled from them
+    (
+        """
+            CREATE TABLE IF NOT EXISTS error_totals (
+                error_type TEXT PRIMARY KEY,
+                count INTEGER NOT NULL,
+                last_at TIMESTAMP NOT NULL
+            ) WITHOUT ROWID
+        """,
+        """
+            CREATE TABLE IF NOT EXISTS error_daily (
+                day TEXT NOT NULL,
+                error_type TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (day, error_type)
+            ) WITHOUT ROWID
+        """,
+        "INSERT INTO error_totals "
+        "SELECT error_type, COUNT(*), MAX(created_at) FROM error_statistics GROUP BY 1",
+        "INSERT INTO error_daily "
+        "SELECT date(created_at), error_type, COUNT(*) FROM error_statistics GROUP BY 1, 2",
+        "DROP INDEX IF EXISTS idx_error_statistics_type",
+        "CREATE INDEX IF NOT EXISTS idx_error_statistics_created "
+        "ON error_statistics (created_at)",
+    ),
+    # 5: secretary_connections is only ever read whole (one row per
+    # connected user) or by user_id, so the connection_id index was pure
+    # write overhead
+    ("DROP INDEX IF EXISTS idx_secretary_connections_connection",),
+)
+
+_ROLLUP_DAILY = """
+    INSERT INTO usage_daily (day, source, transcriptions, audio_duration_seconds)
+    VALUES (date('now'), ?, 1, ?)
+    ON CONFLICT(day, source) DO UPDATE SET
+        transcriptions = transcriptions + 1,
+        audio_duration_seconds = audio_duration_seconds + excluded.audio_duration_seconds
+"""
+_ROLLUP_HOURLY = """
+    INSERT INTO usage_hourly (hour, source, transcriptions, audio_duration_seconds)
+    VALUES (strftime('%Y-%m-%d %H:00', 'now'), ?, 1, ?)
+    ON CONFLICT(hour, source) DO UPDATE SET
+        transcriptions = transcriptions + 1,
+        audio_duration_seconds = audio_duration_seconds + excluded.audio_duration_seconds
+"""
+
+_ERROR_TOTALS = """
+    INSERT INTO error_totals (error_type, count, last_at)
+    VALUES (?, 1, CURRENT_TIMESTAMP)
+    ON CONFLICT(error_type) DO UPDATE SET
+        count = count + 1,
+        last_at = excluded.last_at
+"""
+_ERROR_DAILY = """
+    INSERT INTO error_daily (day, error_type, count)
+    VALUES (date('now'), ?, 1)
+    ON CONFLICT(day, error_type) DO UPDATE SET count = count + 1
+"""
+
+# Direct and secretary usage merged per user, most recently active first:
+# (user_id, username, direct_count, direct_duration, secretary_count,
+# secretary_duration, last_used_at). Each user comes from the table holding
+# their latest activity; both halves walk their last_used_at index, so
+# SQLite merges two ordered streams instead of sorting.
+_USER_REPORT = """
+    SELECT u.user_id, COALESCE(u.username, s.username),
+           u.total_transcriptions, u.total_audio_duration_seconds,
+           COALESCE(s.total_transcriptions, 0),
+           COALESCE(s.total_audio_duration_seconds, 0), u.last_used_at
+    FROM user_statistics u
+    LEFT JOIN secretary_statistics s ON s.user_id = u.user_id
+    WHERE s.last_used_at IS NULL OR s.last_used_at <= u.last_used_at
+    UNION ALL
+    SELECT s.user_id, COALESCE(u.username, s.username),
+           COALESCE(u.total_transcriptions, 0),
+           COALESCE(u.total_audio_duration_seconds, 0),
+           s.total_transcriptions, s.total_audio_duration_seconds, s.last_used_at
+    FROM secretary_statistics s
+    LEFT JOIN user_statistics u ON u.user_id = s.user_id
+    WHERE u.last_used_at IS NULL OR u.last_used_at < s.last_used_at
+    ORDER BY 7 DESC
+"""
+
+UserReportRow = tuple[int, str | None, int, int, int, int, str | None]
+
+
+class StatisticsDB:
+    """Async SQLite database for user statistics.
+
+    Usage counters, error records and pending-prompt bookkeeping are
+    write-behind when `flush_interval` is set: they are queued and
+    committed together, in order, in one transaction every
+    `flush_interval` seconds or once `flush_max_rows` are waiting, so the
+    user-facing path doesn't wait on a commit per write. Reads of those
+    tables flush first and always see queued writes. `close` flushes too.
+    With the default interval of 0 every write commits immediately.
+
+    Raw error rows (with their detail text) are kept as a ring of at most
+    `error_max_rows` rows no older than `error_max_age_days`; 0 leaves
+    either bound off. Per-type counters outlive them.
+
+    With `read_connections` > 0 the database runs in WAL mode: writes go
+    through one connection and reads are served by a pool of read-only
+    connections, so a long admin report never holds up `record_usage`.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        *,
+        flush_interval: float = 0.0,
+        flush_max_rows: int = 100,
+        read_connections: int = 0,
+        error_max_rows: int = 0,
+        error_max_age_days: int = 0,
+    ) -> None:
+        self._db_path = db_path
+        self._db: aiosqlite.Connection | None = None
+        self._flush_interval = flush_interval
+        self._flush_max_rows = flush_max_rows
+        self._pending: list[tuple[str, tuple[object, ...]]] = []
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: asyncio.Task[None] | None = None
+        self._read_connections = read_connections
+        self._readers: asyncio.Queue[aiosqlite.Connection] | None = None
+        self._error_max_rows = error_max_rows
+        self._error_max_age_days = error_max_age_days
+        # Users with an active secretary connection, mirrored from the
+        # secretary_connections table so hot-path checks skip the database.
+        self._connected_user_ids: set[int] = set()
+
+    async def initialize(self) -> None:
+        self._db = await aiosqlite.connect(self._db_path)
+        await self._migrate()
+        async with self._db.execute("SELECT user_id FROM secretary_connections") as cursor:
+            self._connected_user_ids = {r[0] for r in await cursor.fetchall()}
+
+        if self._read_connections > 0:
+            await self._db.execute("PRAGMA journal_mode=WAL")
+            await self._db.execute("PRAGMA synchronous=NORMAL")
+            self._readers = asyncio.Queue()
+            for _ in range(self._read_connections):
+                uri = f"{Path(self._db_path).resolve().as_uri()}?mode=ro"
+                reader = await aiosqlite.connect(uri, uri=True)
+                self._readers.put_nowait(reader)
+
+    async def _migrate(self) -> None:
+        """Bring the schema up to the latest version, one transaction per step."""
+        assert self._db is not None
+        async with self._db.execute("PRAGMA user_version") as cursor:
+            row = await cursor.fetchone()
+        version = row[0] if row else 0
+        for number, statements in enumerate(_MIGRATIONS[version:], start=version + 1):
+            await self._db.execute("BEGIN")
+            for statement in statements:
+                await self._db.execute(statement)
+            await self._db.execute(f"PRAGMA user_version = {number}")
+            await self._db.commit()
+            logger.info("Statistics schema migrated to version %d", number)
 
     async def close(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+        if self._readers is not None:
+            while not self._readers.empty():
+                await self._readers.get_nowait().close()
+            self._readers = None
         if self._db:
             await self._db.close()
             self._db = None
 
+    @contextlib.asynccontextmanager
+    async def _reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """A pooled read-only connection, or the writer when there is no pool."""
+        if self._readers is None:
+            assert self._db is not None
+            yield self._db
+            return
+        reader = await self._readers.get()
+        try:
+            yield reader
+        finally:
+            self._readers.put_nowait(reader)
+
+    async def flush(self) -> None:
+        """Commit all queued writes in a single transaction."""
+        async with self._flush_lock:
+            if not self._pending or self._db is None:
+                return
+            batch, self._pending = self._pending, []
+            try:
+                # Runs of the same statement go through one executemany.
+                for sql, group in itertools.groupby(batch, key=lambda w: w[0]):
+                    await self._db.executemany(sql, [params for _, params in group])
+                await self._db.commit()
+            except sqlite3.Error:
+                logger.exception("Dropping %d queued statistics writes", len(batch))
+                await self._db.rollback()
+
+    async def _write(
+        self, sql: str, params: tuple[object, ...], *also: tuple[str, tuple[object, ...]]
+    ) -> None:
+        """Queue or run a write; statements in `also` commit in the same transaction."""
+        statements = [(sql, params), *also]
+        if self._flush_interval <= 0:
+            await self._commit(statements)
+            return
+        self._pending.extend(statements)
+        if len(self._pending) >= self._flush_max_rows:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _commit(self, statements: list[tuple[str, tuple[object, ...]]]) -> None:
+        """Run `statements` and commit now. Holds the flush lock, so the
+        commit never lands in the middle of a batch `flush` is writing."""
+        assert self._db is not None
+        async with self._flush_lock:
+            for statement, values in statements:
+                await self._db.execute(statement, values)
+            await self._db.commit()
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self._flush_interval)
+        self._flush_task = None
+        await self.flush()
+
     async def record_usage(
         self, user_id: int, username: str | None, audio_duration: int
     ) -> None:
-        assert self._db is not None
-        await self._db.execute(
+        await self._write(
             """
             INSERT INTO user_statistics (user_id, username, total_transcriptions,
                                          total_audio_duration_seconds, first_used_at, last_used_at)
@@ -86,15 +352,16 @@ class StatisticsDB:
                 last_used_at = CURRENT_TIMESTAMP
             """,
             (user_id, username, audio_duration, username, audio_duration),
+            (_ROLLUP_DAILY, ("direct", audio_duration)),
+            (_ROLLUP_HOURLY, ("direct", audio_duration)),
         )
-        await self._db.commit()
 
     async def get_user_stats(
         self, user_id: int
     ) -> tuple[int, int, str | None, str | None] | None:
         """Returns (total_transcriptions, total_duration, first_used, last_used) or None."""
-        assert self._db is not None
-        async with self._db.execute(
+        await self.flush()
+        async with self._reader() as db, db.execute(
             """
             SELECT total_transcriptions, total_audio_duration_seconds,
                    first_used_at, last_used_at
@@ -111,8 +378,8 @@ class StatisticsDB:
         self,
     ) -> list[tuple[int, str | None, int, int, str | None, str | None]]:
         """Returns list of (user_id, username, transcriptions, duration, first, last)."""
-        assert self._db is not None
-        async with self._db.execute(
+        await self.flush()
+        async with self._reader() as db, db.execute(
             """
             SELECT user_id, username, total_transcriptions,
                    total_audio_duration_seconds, first_used_at, last_used_at
@@ -122,11 +389,42 @@ class StatisticsDB:
             rows = await cursor.fetchall()
         return [(r[0], r[1], r[2], r[3], r[4], r[5]) for r in rows]
 
+    async def count_report_users(self) -> int:
+        """Number of users with direct or secretary usage."""
+        await self.flush()
+        async with self._reader() as db, db.execute(
+            """
+            SELECT (SELECT COUNT(*) FROM user_statistics)
+                 + (SELECT COUNT(*) FROM secretary_statistics s
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM user_statistics u WHERE u.user_id = s.user_id
+                    ))
+            """
+        ) as cursor:
+            row = await cursor.fetchone()
+        return row[0] if row else 0
+
+    async def get_user_report(self, offset: int, limit: int) -> list[UserReportRow]:
+        """One page of the merged per-user report (see `_USER_REPORT`)."""
+        await self.flush()
+        async with self._reader() as db, db.execute(
+            _USER_REPORT + " LIMIT ? OFFSET ?", (limit, offset)
+        ) as cursor:
+            rows = await cursor.fetchall()
+        return [(r[0], r[1], r[2], r[3], r[4], r[5], r[6]) for r in rows]
+
+    async def iter_user_report(self) -> AsyncIterator[UserReportRow]:
+        """Stream the whole merged report without loading it into memory."""
+        await self.flush()
+        async with self._reader() as db, db.execute(_USER_REPORT) as cursor:
+            async for r in cursor:
+                yield (r[0], r[1], r[2], r[3], r[4], r[5], r[6])
+
     async def get_all_user_ids(self) -> list[int]:
         """Return distinct user IDs the bot can DM (everyone who has
         interacted with it directly or via secretary mode)."""
-        assert self._db is not None
-        async with self._db.execute(
+        await self.flush()
+        async with self._reader() as db, db.execute(
             """
             SELECT user_id FROM user_statistics
             UNION
@@ -138,45 +436,98 @@ class StatisticsDB:
             rows = await cursor.fetchall()
         return [r[0] for r in rows]
 
+    async def get_usage_window(
+        self, days: int
+    ) -> tuple[int, int, int, int, int | None]:
+        """Usage over the last `days` UTC days, today included, from the rollups.
+
+        Returns (direct_transcriptions, direct_duration,
+        secretary_transcriptions, secretary_duration, peak_hour), where
+        peak_hour is the UTC hour of day (0-23) with the most
+        transcriptions, or None without any usage.
+        """
+        await self.flush()
+        since = f"-{int(days) - 1} days"
+        totals = {"direct": (0, 0), "secretary": (0, 0)}
+        async with self._reader() as db:
+            async with db.execute(
+                """
+                SELECT source, SUM(transcriptions), SUM(audio_duration_seconds)
+                FROM usage_daily WHERE day >= date('now', ?)
+                GROUP BY source
+                """,
+                (since,),
+            ) as cursor:
+                for source, count, duration in await cursor.fetchall():
+                    totals[source] = (count, duration)
+            async with db.execute(
+                """
+                SELECT substr(hour, 12, 2), SUM(transcriptions)
+                FROM usage_hourly WHERE hour >= date('now', ?)
+                GROUP BY 1
+                """,
+                (since,),
+            ) as cursor:
+                by_hour = await cursor.fetchall()
+        peak_hour = int(max(by_hour, key=lambda r: r[1])[0]) if by_hour else None
+        return (*totals["direct"], *totals["secretary"], peak_hour)
+
     async def record_error(
         self,
         error_type: str,
         username: str | None = None,
         error_detail: str | None = None,
     ) -> None:
-        """Record an error occurrence."""
-        assert self._db is not None
-        await self._db.execute(
+        """Record an error occurrence, trimming the raw error ring."""
+        pruning: list[tuple[str, tuple[object, ...]]] = []
+        if self._error_max_rows > 0:
+            pruning.append((
+                "DELETE FROM error_statistics "
+                "WHERE id <= (SELECT MAX(id) FROM error_statistics) - ?",
+                (self._error_max_rows,),
+            ))
+        if self._error_max_age_days > 0:
+            pruning.append((
+                "DELETE FROM error_statistics WHERE created_at < datetime('now', ?)",
+                (f"-{self._error_max_age_days} days",),
+            ))
+        await self._write(
             "INSERT INTO error_statistics (error_type, username, error_detail) "
             "VALUES (?, ?, ?)",
             (error_type, username, error_detail),
+            (_ERROR_TOTALS, (error_type,)),
+            (_ERROR_DAILY, (error_type,)),
+            *pruning,
         )
-        await self._db.commit()
 
     async def get_error_stats(
         self,
     ) -> tuple[int, dict[str, int], str | None]:
-        """Returns (total_errors, {error_type: count}, last_error_time)."""
-        assert self._db is not None
-        async with self._db.execute(
-            "SELECT COUNT(*) FROM error_statistics"
-        ) as cursor:
-            row = await cursor.fetchone()
-        total = row[0] if row else 0
+        """Returns (total_errors, {error_type: count}, last_error_time).
 
-        async with self._db.execute(
-            "SELECT error_type, COUNT(*) FROM error_statistics GROUP BY error_type"
+        Read from the per-type counters, so it costs O(error types).
+        """
+        await self.flush()
+        async with self._reader() as db, db.execute(
+            "SELECT error_type, count, last_at FROM error_totals"
         ) as cursor:
-            type_rows = await cursor.fetchall()
-        by_type = {r[0]: r[1] for r in type_rows}
+            rows = await cursor.fetchall()
+        by_type = {r[0]: r[1] for r in rows}
+        last_error = max((r[2] for r in rows), default=None)
+        return sum(by_type.values()), by_type, last_error
 
-        async with self._db.execute(
-            "SELECT created_at FROM error_statistics ORDER BY id DESC LIMIT 1"
+    async def get_recent_error_counts(self, days: int) -> dict[str, int]:
+        """Returns {error_type: count} over the last `days` UTC days, today included."""
+        await self.flush()
+        async with self._reader() as db, db.execute(
+            """
+            SELECT error_type, SUM(count) FROM error_daily
+            WHERE day >= date('now', ?) GROUP BY error_type
+            """,
+            (f"-{int(days) - 1} days",),
         ) as cursor:
-            last_row = await cursor.fetchone()
-        last_error = last_row[0] if last_row else None
-
-        return total, by_type, last_error
+            rows = await cursor.fetchall()
+        return {r[0]: r[1] for r in rows}
 
     # --- Secretary pending prompts (auto-deletion) ---
 
@@ -184,8 +535,7 @@ class StatisticsDB:
         self, connection_id: str, chat_id: int, message_id: int
     ) -> None:
         """Record an untranscribed prompt so it can be auto-deleted later."""
-        assert self._db is not None
-        await self._db.execute(
+        await self._write(
             """
             INSERT INTO secretary_pending_prompts
                 (connection_id, chat_id, message_id)
@@ -193,29 +543,26 @@ class StatisticsDB:
             """,
             (connection_id, chat_id, message_id),
         )
-        await self._db.commit()
 
     async def remove_pending_prompt(
         self, connection_id: str, message_id: int
     ) -> None:
         """Remove a prompt once it has been transcribed or deleted."""
-        assert self._db is not None
-        await self._db.execute(
+        await self._write(
             """
             DELETE FROM secretary_pending_prompts
             WHERE connection_id = ? AND message_id = ?
             """,
             (connection_id, message_id),
         )
-        await self._db.commit()
 
     async def get_expired_pending_prompts(
         self, older_than_seconds: int
     ) -> list[tuple[str, int, int]]:
         """Return (connection_id, chat_id, message_id) for prompts older
         than the given age."""
-        assert self._db is not None
-        async with self._db.execute(
+        await self.flush()
+        async with self._reader() as db, db.execute(
             """
             SELECT connection_id, chat_id, message_id
             FROM secretary_pending_prompts
@@ -231,8 +578,7 @@ class StatisticsDB:
     async def record_secretary_usage(
         self, user_id: int, username: str | None, audio_duration: int
     ) -> None:
-        assert self._db is not None
-        await self._db.execute(
+        await self._write(
             """
             INSERT INTO secretary_statistics
                 (user_id, username, total_transcriptions,
@@ -245,15 +591,16 @@ class StatisticsDB:
                 last_used_at = CURRENT_TIMESTAMP
             """,
             (user_id, username, audio_duration, username, audio_duration),
+            (_ROLLUP_DAILY, ("secretary", audio_duration)),
+            (_ROLLUP_HOURLY, ("secretary", audio_duration)),
         )
-        await self._db.commit()
 
     async def get_secretary_stats(
         self, user_id: int
     ) -> tuple[int, int, str | None, str | None] | None:
         """Returns (total_transcriptions, total_duration, first_used, last_used) or None."""
-        assert self._db is not None
-        async with self._db.execute(
+        await self.flush()
+        async with self._reader() as db, db.execute(
             """
             SELECT total_transcriptions, total_audio_duration_seconds,
                    first_used_at, last_used_at
@@ -270,8 +617,8 @@ class StatisticsDB:
         self,
     ) -> list[tuple[int, str | None, int, int, str | None, str | None]]:
         """Returns list of (user_id, username, transcriptions, duration, first, last)."""
-        assert self._db is not None
-        async with self._db.execute(
+        await self.flush()
+        async with self._reader() as db, db.execute(
             """
             SELECT user_id, username, total_transcriptions,
                    total_audio_duration_seconds, first_used_at, last_used_at
@@ -286,8 +633,7 @@ class StatisticsDB:
     async def save_secretary_connection(
         self, user_id: int, connection_id: str, username: str | None
     ) -> None:
-        assert self._db is not None
-        await self._db.execute(
+        await self._commit([(
             """
             INSERT INTO secretary_connections
                 (user_id, connection_id, username)
@@ -297,33 +643,25 @@ class StatisticsDB:
                 connected_at = CURRENT_TIMESTAMP
             """,
             (user_id, connection_id, username, connection_id, username),
-        )
-        await self._db.commit()
+        )])
+        self._connected_user_ids.add(user_id)
 
     async def remove_secretary_connection(self, user_id: int) -> None:
-        assert self._db is not None
-        await self._db.execute(
-            "DELETE FROM secretary_connections WHERE user_id = ?",
-            (user_id,),
+        await self._commit(
+            [("DELETE FROM secretary_connections WHERE user_id = ?", (user_id,))]
         )
-        await self._db.commit()
+        self._connected_user_ids.discard(user_id)
 
     async def get_all_secretary_connections(
         self,
     ) -> list[tuple[int, str]]:
         """Returns list of (user_id, connection_id) for active connections."""
-        assert self._db is not None
-        async with self._db.execute(
+        async with self._reader() as db, db.execute(
             "SELECT user_id, connection_id FROM secretary_connections"
         ) as cursor:
             rows = await cursor.fetchall()
         return [(r[0], r[1]) for r in rows]
 
     async def is_user_secretary_connected(self, user_id: int) -> bool:
-        assert self._db is not None
-        async with self._db.execute(
-            "SELECT 1 FROM secretary_connections WHERE user_id = ?",
-            (user_id,),
-        ) as cursor:
-            row = await cursor.fetchone()
-        return row is not None
+        """Answered from memory; no database round trip."""
+        return user_id in self._connected_user_ids
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Iterable
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptArchive:
+    """SQLite tier behind `TranscriptionStore`, keyed by (user_id, message_id).
+
+    Keeps transcripts for the Summarize / Save-as-file buttons long after
+    they leave memory, including across restarts. Payloads are opaque to
+    the archive (the store's compressed entry format); entries expire
+    `ttl_seconds` after they were saved.
+    """
+
+    def __init__(self, db_path: str, *, ttl_seconds: int = 7 * 86400) -> None:
+        self._db_path = db_path
+        self._ttl = ttl_seconds
+        self._db: aiosqlite.Connection | None = None
+
+    async def initialize(self) -> None:
+        self._db = await aiosqlite.connect(self._db_path)
+        await self._db.execute("""
+            CREATE TABLE IF NOT EXISTS transcripts (
+                user_id INTEGER NOT NULL,
+                message_id INTEGER NOT NULL,
+                payload BLOB NOT NULL,
+                saved_at REAL NOT NULL,
+                PRIMARY KEY (user_id, message_id)
+            )
+        """)
+        await self._db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_transcripts_saved_at "
+            "ON transcripts (saved_at)"
+        )
+        await self._db.commit()
+        await self.purge_expired()
+
+    async def close(self) -> None:
+        if self._db:
+            await self._db.close()
+            self._db = None
+
+    async def get(self, user_id: int, message_id: int) -> bytes | None:
+        """Return the stored payload, or None if missing or expired."""
+        assert self._db is not None
+        async with self._db.execute(
+            """
+            SELECT payload FROM transcripts
+            WHERE user_id = ? AND message_id = ? AND saved_at >= ?
+            """,
+            (user_id, message_id, time.time() - self._ttl),
+        ) as cursor:
+            row = await cursor.fetchone()
+        return row[0] if row else None
+
+    async def put_many(self, rows: Iterable[tuple[int, int, bytes, float]]) -> None:
+        """Store (user_id, message_id, payload, saved_at) rows in one commit."""
+        assert self._db is not None
+        await self._db.executemany(
+            """
+            INSERT OR REPLACE INTO transcripts (user_id, message_id, payload, saved_at)
+            VALUES (?, ?, ?, ?)
+            """,
+            rows,
+        )
+        await self._db.commit()
+
+    async def purge_expired(self) -> int:
+        """Delete expired entries. Returns the number removed."""
+        assert self._db is not None
+        cursor = await self._db.execute(
+            "DELETE FROM transcripts WHERE saved_at < ?", (time.time() - self._ttl,)
+        )
+        await self._db.commit()
+        if cursor.rowcount:
+            logger.debug("Purged %d archived transcripts", cursor.rowcount)
+        return cursor.rowcount
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import json
+import logging
+import time
+from dataclasses import dataclass
+
+import aiosqlite
+
+from src.bot.services.transcription import TranscriptionResult, WordData
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CachedTranscript:
+    """A transcript served from the cache."""
+
+    result: TranscriptionResult
+    duration: int | None
+
+
+class TranscriptCache:
+    """SQLite cache of finished transcriptions keyed by Telegram `file_unique_id`.
+
+    The same voice note forwarded by many users (or seen by both sides of a
+    secretary chat) has one `file_unique_id`, so it is downloaded and
+    transcribed once. Entries expire `ttl_seconds` after they were written;
+    when the stored payload exceeds `max_bytes` the least recently used
+    entries are evicted.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        *,
+        ttl_seconds: int = 7 * 86400,
+        max_bytes: int = 200 * 1024 * 1024,
+    ) -> None:
+        self._db_path = db_path
+        self._ttl = ttl_seconds
+        self._max_bytes = max_bytes
+        self._db: aiosqlite.Connection | None = None
+        self._total_bytes = 0
+
+    async def initialize(self) -> None:
+        self._db = await aiosqlite.connect(self._db_path)
+        await self._db.execute("""
+            CREATE TABLE IF NOT EXISTS transcript_cache (
+                file_unique_id TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                words TEXT NOT NULL,
+                duration INTEGER,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL
+            )
+        """)
+        await self._db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_transcript_cache_last_used "
+            "ON transcript_cache (last_used_at)"
+        )
+        await self._db.commit()
+        await self.purge_expired()
+        async with self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM transcript_cache"
+        ) as cursor:
+            row = await cursor.fetchone()
+        self._total_bytes = row[0] if row else 0
+
+    async def close(self) -> None:
+        if self._db:
+            await self._db.close()
+            self._db = None
+
+    async def get(self, file_unique_id: str) -> CachedTranscript | None:
+        """Return the cached transcript, or None if missing or expired."""
+        assert self._db is not None
+        async with self._db.execute(
+            """
+            SELECT text, words, duration, size, created_at
+            FROM transcript_cache WHERE file_unique_id = ?
+            """,
+            (file_unique_id,),
+        ) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            return None
+        text, words_json, duration, size, created_at = row
+        now = time.time()
+        if now - created_at > self._ttl:
+            await self._db.execute(
+                "DELETE FROM transcript_cache WHERE file_unique_id = ?",
+                (file_unique_id,),
+            )
+            await self._db.commit()
+            self._total_bytes -= size
+            return None
+
+        await self._db.execute(
+            "UPDATE transcript_cache SET last_used_at = ? WHERE file_unique_id = ?",
+            (now, file_unique_id),
+        )
+        await self._db.commit()
+        return CachedTranscript(
+            TranscriptionResult(text=text, words=_decode_words(words_json)),
+            duration,
+        )
+
+    async def put(
+        self,
+        file_unique_id: str,
+        result: TranscriptionResult,
+        duration: int | None = None,
+    ) -> None:
+        """Store a transcript, evicting old entries to stay within budget."""
+        assert self._db is not None
+        words_json = _encode_words(result.words)
+        size = len(result.text.encode("utf-8")) + len(words_json.encode("utf-8"))
+        if size > self._max_bytes:
+            return
+
+        async with self._db.execute(
+            "SELECT size FROM transcript_cache WHERE file_unique_id = ?",
+            (file_unique_id,),
+        ) as cursor:
+            old = await cursor.fetchone()
+        now = time.time()
+        await self._db.execute(
+            """
+            INSERT OR REPLACE INTO transcript_cache
+                (file_unique_id, text, words, duration, size,
+                 created_at, last_used_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (file_unique_id, result.text, words_json, duration, size, now, now),
+        )
+        self._total_bytes += size - (old[0] if old else 0)
+        await self._evict()
+        await self._db.commit()
+
+    async def purge_expired(self) -> int:
+        """Delete expired entries. Returns the number removed."""
+        assert self._db is not None
+        cutoff = time.time() - self._ttl
+        async with self._db.execute(
+            "SELECT COALESCE(SUM(size), 0), COUNT(*) FROM transcript_cache "
+            "WHERE created_at < ?",
+            (cutoff,),
+        ) as cursor:
+            row = await cursor.fetchone()
+        freed, count = row if row else (0, 0)
+        if count:
+            await self._db.execute(
+                "DELETE FROM transcript_cache WHERE created_at < ?", (cutoff,)
+            )
+            await self._db.commit()
+            self._total_bytes -= freed
+        return int(count)
+
+    async def _evict(self) -> None:
+        assert self._db is not None
+        while self._total_bytes > self._max_bytes:
+            async with self._db.execute(
+                """
+                SELECT file_unique_id, size FROM transcript_cache
+                ORDER BY last_used_at LIMIT 32
+                """
+            ) as cursor:
+                rows = await cursor.fetchall()
+            if not rows:
+                self._total_bytes = 0
+                return
+            for file_unique_id, size in rows:
+                if self._total_bytes <= self._max_bytes:
+                    break
+                await self._db.execute(
+                    "DELETE FROM transcript_cache WHERE file_unique_id = ?",
+                    (file_unique_id,),
+                )
+                self._total_bytes -= size
+                logger.debug("Evicted cached transcript %s", file_unique_id)
+
+
+def _encode_words(words: list[WordData]) -> str:
+    return json.dumps(
+        [[w.text, w.start, w.end, w.speaker_id, w.type] for w in words],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+
+
+def _decode_words(data: str) -> list[WordData]:
+    return [
+        WordData(text=text, start=start, end=end, speaker_id=sid, type=wtype)
+        for text, start, end, sid, wtype in json.loads(data)
+    ]
@@ -1,61 +1,277 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+import struct
+import sys
 import time
-from typing import TYPE_CHECKING
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
 
-if TYPE_CHECKING:
-    from src.bot.services.transcription import WordData
+from src.bot.services.transcription import WordData, WordTable
+from src.bot.storage.transcript_archive import TranscriptArchive
+
+logger = logging.getLogger(__name__)
+
+Key = tuple[int, int]
+
+# Length of the UTF-8 text that precedes the serialized words in a blob.
+_TEXT_LEN = struct.Struct("<I")
+
+
+@dataclass(slots=True)
+class _Entry:
+    saved_at: float
+    used_at: float
+    size: int
+    text: str = ""
+    words: WordTable | None = None
+    # zlib of text + words while the entry is cold; text/words are then unset.
+    blob: bytes | None = None
 
 
 class TranscriptionStore:
     """In-memory store for transcriptions with TTL-based expiry.
 
     Keyed by (user_id, message_id) to ensure user isolation.
-    Stores both the formatted text and the raw word-level data.
+    Stores both the formatted text and the raw word-level data, the latter
+    as a compact `WordTable`.
+
+    Entries are kept in save order, which with a single TTL is also expiry
+    order: `save` drops expired entries from the old end (amortized O(1)),
+    lookups check only the requested key, and `run_sweeper` clears out
+    entries nobody asks for again.
+
+    With `compress_after` set, entries not read for that many seconds are
+    zlib-compressed in place and inflated again on the next read. With
+    `max_bytes` set, the estimated size of all entries is kept under it:
+    hot entries are compressed first (if compression is on), then the least
+    recently used entries are evicted. The entry being saved or read is
+    never evicted.
+
+    With an `archive`, every saved entry is also written there (batched by
+    `flush`, which the sweeper calls), and `load` falls back to it for
+    entries that have left memory or predate a restart.
     """
 
-    def __init__(self, ttl_seconds: int = 600) -> None:
+    def __init__(
+        self,
+        ttl_seconds: int = 600,
+        *,
+        max_bytes: int = 0,
+        compress_after: float = 0,
+        archive: TranscriptArchive | None = None,
+    ) -> None:
         self._ttl = ttl_seconds
-        self._store: dict[
-            tuple[int, int], tuple[str, list[WordData], float]
-        ] = {}
+        self._max_bytes = max_bytes
+        self._compress_after = compress_after
+        self._archive = archive
+        # (user_id, message_id, payload, saved_at) rows not yet archived.
+        self._unarchived: list[tuple[int, int, bytes, float]] = []
+        self._store: OrderedDict[Key, _Entry] = OrderedDict()  # save order
+        self._lru: OrderedDict[Key, None] = OrderedDict()  # least recently used first
+        self._hot: OrderedDict[Key, None] = OrderedDict()  # uncompressed, LRU first
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._compressions = 0
+        self._decompressions = 0
+        self._evictions = 0
+        self._archive_hits = 0
+
+    def __len__(self) -> int:
+        return len(self._store)
 
     def save(
         self,
         user_id: int,
         message_id: int,
         text: str,
-        words: list[WordData] | None = None,
+        words: list[WordData] | WordTable | None = None,
     ) -> None:
-        self._cleanup()
-        self._store[(user_id, message_id)] = (
-            text,
-            words or [],
-            time.monotonic(),
-        )
+        table = WordTable.from_words(words or ())
+        self._insert((user_id, message_id), text, table)
+        if self._archive is not None:
+            self._unarchived.append(
+                (user_id, message_id, _pack(text, table), time.time())
+            )
 
     def get(self, user_id: int, message_id: int) -> str | None:
         """Retrieve the transcription text. Returns None if expired or not found."""
-        self._cleanup()
-        entry = self._store.get((user_id, message_id))
+        entry = self._lookup((user_id, message_id))
         if entry is None:
             return None
-        text, _, _ = entry
-        return text
+        return entry.text
 
-    def get_words(self, user_id: int, message_id: int) -> list[WordData] | None:
+    def get_words(self, user_id: int, message_id: int) -> WordTable | None:
         """Retrieve word-level data. Returns None if expired or not found."""
-        self._cleanup()
-        entry = self._store.get((user_id, message_id))
+        entry = self._lookup((user_id, message_id))
         if entry is None:
             return None
-        _, words, _ = entry
-        return words
+        return entry.words
+
+    async def load(
+        self, user_id: int, message_id: int
+    ) -> tuple[str, WordTable] | None:
+        """Text and words from memory, else from the archive (and back into
+        memory). Returns None if neither has the entry."""
+        key = (user_id, message_id)
+        entry = self._lookup(key)
+        if entry is not None:
+            assert entry.words is not None
+            return entry.text, entry.words
+        if self._archive is None:
+            return None
+        blob = next(
+            (p for u, m, p, _ in reversed(self._unarchived) if (u, m) == key), None
+        ) or await self._archive.get(user_id, message_id)
+        if blob is None:
+            return None
+        self._archive_hits += 1
+        text, table = _unpack(blob)
+        if key not in self._store:  # unless saved again meanwhile
+            self._insert(key, text, table)
+        return text, table
+
+    async def flush(self) -> None:
+        """Write entries saved since the last flush to the archive."""
+        if self._archive is None or not self._unarchived:
+            return
+        rows, self._unarchived = self._unarchived, []
+        await self._archive.put_many(rows)
+
+    def sweep(self) -> None:
+        """Drop every expired entry and compress idle ones."""
+        now = time.monotonic()
+        self._expire(now)
+        self._compress_idle(now)
+
+    async def run_sweeper(self, interval: float = 60.0) -> None:
+        """Call `sweep` and `flush` every `interval` seconds; run as a
+        background task."""
+        while True:
+            await asyncio.sleep(interval)
+            self.sweep()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Archiving transcripts failed")
 
-    def _cleanup(self) -> None:
+    def metrics(self) -> dict[str, int]:
+        """Counters for the /metrics endpoint."""
+        return {
+            "transcription_store_entries": len(self._store),
+            "transcription_store_compressed": len(self._store) - len(self._hot),
+            "transcription_store_bytes": self._bytes,
+            "transcription_store_hits_total": self._hits,
+            "transcription_store_misses_total": self._misses,
+            "transcription_store_compressions_total": self._compressions,
+            "transcription_store_decompressions_total": self._decompressions,
+            "transcription_store_evictions_total": self._evictions,
+            "transcription_store_archive_hits_total": self._archive_hits,
+        }
+
+    def _insert(self, key: Key, text: str, table: WordTable) -> None:
+        now = time.monotonic()
+        self._expire(now)
+        if key in self._store:
+            self._drop(key)
+        entry = _Entry(now, now, _hot_size(text, table), text, table)
+        self._store[key] = entry
+        self._lru[key] = None
+        self._hot[key] = None
+        self._bytes += entry.size
+        self._compress_idle(now)
+        self._fit()
+
+    def _lookup(self, key: Key) -> _Entry | None:
+        entry = self._store.get(key)
         now = time.monotonic()
-        expired = [
-            k for k, (_, _, ts) in self._store.items() if now - ts > self._ttl
-        ]
-        for k in expired:
-            del self._store[k]
+        if entry is not None and now - entry.saved_at > self._ttl:
+            self._drop(key)
+            entry = None
+        if entry is None:
+            self._misses += 1
+            return None
+        self._hits += 1
+        entry.used_at = now
+        self._lru.move_to_end(key)
+        if entry.blob is None:
+            self._hot.move_to_end(key)
+        else:
+            self._inflate(key, entry)
+        return entry
+
+    def _expire(self, now: float) -> None:
+        while self._store:
+            key, entry = next(iter(self._store.items()))
+            if now - entry.saved_at <= self._ttl:
+                break
+            self._drop(key)
+
+    def _drop(self, key: Key) -> None:
+        entry = self._store.pop(key)
+        del self._lru[key]
+        self._hot.pop(key, None)
+        self._bytes -= entry.size
+
+    def _compress_idle(self, now: float) -> None:
+        if self._compress_after <= 0:
+            return
+        while self._hot:
+            key = next(iter(self._hot))
+            if now - self._store[key].used_at < self._compress_after:
+                break
+            self._deflate(key)
+
+    def _fit(self) -> None:
+        """Bring the total under `max_bytes`, sparing the most recent entry."""
+        if self._max_bytes <= 0:
+            return
+        if self._compress_after > 0:
+            while self._bytes > self._max_bytes and len(self._hot) > 1:
+                self._deflate(next(iter(self._hot)))
+        while self._bytes > self._max_bytes and len(self._lru) > 1:
+            self._drop(next(iter(self._lru)))
+            self._evictions += 1
+
+    def _deflate(self, key: Key) -> None:
+        entry = self._store[key]
+        assert entry.words is not None
+        entry.blob = _pack(entry.text, entry.words)
+        entry.text, entry.words = "", None
+        del self._hot[key]
+        self._resize(entry, sys.getsizeof(entry.blob))
+        self._compressions += 1
+
+    def _inflate(self, key: Key, entry: _Entry) -> None:
+        assert entry.blob is not None
+        entry.text, entry.words = _unpack(entry.blob)
+        entry.blob = None
+        self._hot[key] = None
+        self._resize(entry, _hot_size(entry.text, entry.words))
+        self._decompressions += 1
+        self._fit()
+
+    def _resize(self, entry: _Entry, size: int) -> None:
+        self._bytes += size - entry.size
+        entry.size = size
+
+
+def _hot_size(text: str, words: WordTable) -> int:
+    return sys.getsizeof(text) + words.nbytes
+
+
+def _pack(text: str, words: WordTable) -> bytes:
+    """Compressed entry, as held for cold entries and in the archive."""
+    data = text.encode("utf-8")
+    return zlib.compress(_TEXT_LEN.pack(len(data)) + data + words.to_bytes(), 1)
+
+
+def _unpack(blob: bytes) -> tuple[str, WordTable]:
+    data = zlib.decompress(blob)
+    (text_len,) = _TEXT_LEN.unpack_from(data)
+    start = _TEXT_LEN.size
+    text = data[start : start + text_len].decode("utf-8")
+    return text, WordTable.from_bytes(data[start + text_len :])
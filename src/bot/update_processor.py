@@ -0,0 +1,107 @@
+"""Concurrent update processing that keeps per-chat ordering."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+from collections.abc import Awaitable, Hashable
+from typing import Any
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+
+def ordering_key(update: object) -> Hashable | None:
+    """Return the key whose updates must be handled one after another.
+
+    Business updates are keyed by (business_connection_id, chat_id) so two
+    secretary chats of the same owner still run in parallel. Updates without
+    a chat (pre-checkout queries, ...) fall back to the user; anything else
+    has no ordering constraint and returns None.
+    """
+    if not isinstance(update, Update):
+        return None
+    if update.business_connection is not None:
+        return (update.business_connection.id, None)
+    message = update.effective_message
+    biz_conn_id = getattr(message, "business_connection_id", None)
+    chat = update.effective_chat
+    if chat is not None:
+        return (biz_conn_id, chat.id)
+    if update.effective_user is not None:
+        return (None, update.effective_user.id)
+    return None
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """Run updates from different chats concurrently, one chat at a time.
+
+    Within one chat, updates wait on a FIFO lock so they are handled in
+    arrival order; locks are dropped as soon as nobody holds or awaits them,
+    so the table only grows with the number of busy chats.
+
+    The `max_concurrent_updates` cap is taken only after the chat lock, so
+    updates queued behind their own chat don't hold slots: one chat sending
+    a burst of voice notes cannot stall every other chat. (The base class's
+    own semaphore is therefore made effectively unbounded.)
+    """
+
+    __slots__ = ("_locks", "_running", "_slots", "_waiters")
+
+    def __init__(self, max_concurrent_updates: int) -> None:
+        if max_concurrent_updates < 1:
+            raise ValueError("`max_concurrent_updates` must be a positive integer!")
+        super().__init__(sys.maxsize)
+        # Reported by `max_concurrent_updates`; the base semaphore keeps maxsize.
+        self._max_concurrent_updates = max_concurrent_updates
+        self._slots = asyncio.Semaphore(max_concurrent_updates)
+        self._running = 0
+        self._locks: dict[Hashable, asyncio.Lock] = {}
+        self._waiters: dict[Hashable, int] = {}
+
+    @property
+    def current_concurrent_updates(self) -> int:
+        return self._running
+
+    async def do_process_update(
+        self, update: object, coroutine: Awaitable[Any]
+    ) -> None:
+        key = ordering_key(update)
+        if key is None:
+            await self._run(coroutine)
+            return
+
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            async with lock:
+                await self._run(coroutine)
+        finally:
+            self._waiters[key] -= 1
+            if self._waiters[key] == 0:
+                del self._waiters[key]
+                del self._locks[key]
+
+    async def _run(self, coroutine: Awaitable[Any]) -> None:
+        async with self._slots:
+            self._running += 1
+            try:
+                await coroutine
+            finally:
+                self._running -= 1
+
+    @property
+    def active_chats(self) -> int:
+        """Number of chats with an update running or queued."""
+        return len(self._locks)
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
@@ -1,10 +1,25 @@
 import os
+import struct
 import subprocess
 import tempfile
+from unittest.mock import AsyncMock
 
 import pytest
 
-from src.bot.services.audio import extract_audio, get_audio_duration
+from src.bot.services.audio import (
+    compact_for_upload,
+    detect_silences,
+    extract_audio,
+    extract_audio_buffer,
+    get_audio_duration,
+    parse_ffmpeg_log,
+    plan_chunks,
+    speed_up,
+    split_audio,
+)
+from src.bot.services.ffmpeg_scheduler import scheduler
+from src.bot.services.media_duration import read_layout
+from src.bot.services.transcription import AudioBuffer
 
 # Check if ffmpeg is available
 FFMPEG_AVAILABLE = True
@@ -55,6 +70,9 @@ def sample_video() -> str:
             "-i",
             "color=c=black:s=320x240:d=1",
             "-shortest",
+            # Index first, like Telegram's own uploads, so it can be piped.
+            "-movflags",
+            "+faststart",
             path,
         ],
         capture_output=True,
@@ -67,10 +85,197 @@ def sample_video() -> str:
 
 @pytest.mark.skipif(not FFMPEG_AVAILABLE, reason="ffmpeg not installed")
 async def test_extract_audio_from_video(sample_video: str) -> None:
-    audio_path = await extract_audio(sample_video)
-    assert os.path.exists(audio_path)
-    assert audio_path.endswith(".ogg")
-    os.unlink(audio_path)
+    audio = await extract_audio(sample_video, allow_copy=False)
+    assert os.path.exists(audio.path)
+    assert audio.path.endswith(".ogg")
+    # Metadata comes from the extraction run itself.
+    assert audio.duration is not None
+    assert 0.5 < audio.duration < 2.0
+    assert audio.codec == "aac"
+    os.unlink(audio.path)
+
+
+@pytest.mark.skipif(not FFMPEG_AVAILABLE, reason="ffmpeg not installed")
+async def test_extract_audio_stream_copies_aac(sample_video: str) -> None:
+    audio = await extract_audio(sample_video)
+    assert audio.path.endswith(".m4a")
+    assert audio.codec == "aac"
+    layout = read_layout(audio.path)
+    assert layout is not None and layout.codec == "aac"
+    os.unlink(audio.path)
+
+
+def _fake_ffmpeg(stderr: bytes, calls: list[tuple[object, ...]]) -> AsyncMock:
+    """`scheduler.run` stand-in that writes the output file and logs `stderr`."""
+
+    async def run(*args: object, **kwargs: object) -> tuple[int, bytes, bytes]:
+        calls.append(args)
+        if args[-1] == "pipe:1":
+            return 0, b"audio", stderr
+        with open(str(args[-1]), "wb") as f:
+            f.write(b"audio")
+        return 0, b"", stderr
+
+    return AsyncMock(side_effect=run)
+
+
+async def test_extract_audio_copies_unknown_container_in_one_run(
+    tmp_path: object, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    video = os.path.join(str(tmp_path), "clip.webm")
+    with open(video, "wb") as f:
+        f.write(b"\x1aE\xdf\xa3" + bytes(100))
+    calls: list[tuple[object, ...]] = []
+    log = b"Duration: 00:00:05.00\n  Stream #0:1: Audio: opus, 48000 Hz\nOutput #0"
+    monkeypatch.setattr(scheduler, "run", _fake_ffmpeg(log, calls))
+
+    audio = await extract_audio(video)
+    # No ffprobe: the codec comes from the copy run's own log.
+    assert [c[0] for c in calls] == ["ffmpeg"]
+    assert "copy" in calls[0]
+    assert audio.path.endswith(".mka")
+    assert (audio.codec, audio.duration) == ("opus", 5.0)
+    os.unlink(audio.path)
+
+
+async def test_extract_audio_reencodes_uncopyable_codec(
+    tmp_path: object, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    video = os.path.join(str(tmp_path), "clip.avi")
+    with open(video, "wb") as f:
+        f.write(b"RIFF" + bytes(100))
+    calls: list[tuple[object, ...]] = []
+    log = b"  Stream #0:1: Audio: pcm_s16le, 48000 Hz\nOutput #0"
+    monkeypatch.setattr(scheduler, "run", _fake_ffmpeg(log, calls))
+
+    audio = await extract_audio(video)
+    assert len(calls) == 2
+    # Straight to the speech profile; nothing left for compact_for_upload.
+    assert "voip" in calls[1]
+    assert audio.path.endswith(".ogg")
+    assert audio.compacted
+    assert not any(
+        os.path.exists(str(c[-1])) for c in calls if str(c[-1]).endswith(".mka")
+    )
+    os.unlink(audio.path)
+
+
+@pytest.mark.skipif(not FFMPEG_AVAILABLE, reason="ffmpeg not installed")
+async def test_extract_audio_buffer_pipes_aac_into_adts(sample_video: str) -> None:
+    with open(sample_video, "rb") as f:
+        extracted = await extract_audio_buffer(f.read())
+    assert extracted.audio.filename == "audio.aac"
+    assert extracted.audio.data[:2] == b"\xff\xf1"  # ADTS sync word
+    assert extracted.codec == "aac"
+    assert extracted.duration is not None
+    assert 0.5 < extracted.duration < 2.0
+
+
+def _aac_mp4(*, moov_first: bool) -> bytes:
+    """Minimal MP4 with one AAC sound track (see test_media_duration)."""
+
+    def box(kind: bytes, payload: bytes) -> bytes:
+        return struct.pack(">I", 8 + len(payload)) + kind + payload
+
+    decoder = bytes([0x04, 13, 0x40]) + bytes(12)
+    esds = box(b"esds", bytes(4) + bytes([0x03, len(decoder) + 3, 0, 1, 0]) + decoder)
+    stsd = box(b"stsd", bytes(4) + struct.pack(">I", 1) + box(b"mp4a", bytes(28) + esds))
+    hdlr = box(b"hdlr", bytes(8) + b"soun" + bytes(12))
+    trak = box(b"trak", box(b"mdia", hdlr + box(b"minf", box(b"stbl", stsd))))
+    moov, mdat = box(b"moov", trak), box(b"mdat", bytes(1000))
+    return box(b"ftyp", b"isom" + bytes(4)) + (moov + mdat if moov_first else mdat + moov)
+
+
+async def test_extract_audio_buffer_copies_aac_in_one_piped_run(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    calls: list[tuple[object, ...]] = []
+    log = b"  Stream #0:0: Audio: aac, 48000 Hz\nOutput #0"
+    monkeypatch.setattr(scheduler, "run", _fake_ffmpeg(log, calls))
+
+    extracted = await extract_audio_buffer(_aac_mp4(moov_first=True))
+    assert len(calls) == 1
+    assert calls[0][-3:] == ("-f", "adts", "pipe:1")
+    assert "copy" in calls[0]
+    assert extracted.audio.filename == "audio.aac"
+    assert not extracted.compacted
+
+
+async def test_extract_audio_buffer_spills_moov_at_end_without_piping(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    calls: list[tuple[object, ...]] = []
+    log = b"  Stream #0:0: Audio: aac, 48000 Hz\nOutput #0"
+    monkeypatch.setattr(scheduler, "run", _fake_ffmpeg(log, calls))
+
+    extracted = await extract_audio_buffer(_aac_mp4(moov_first=False))
+    # Straight to the temp file, where the AAC is remuxed into .m4a.
+    assert len(calls) == 1
+    assert "pipe:0" not in calls[0]
+    assert extracted.audio.filename.endswith(".m4a")
+    assert extracted.codec == "aac"
+
+
+@pytest.mark.skipif(not FFMPEG_AVAILABLE, reason="ffmpeg not installed")
+async def test_extract_audio_buffer_no_audio_track() -> None:
+    with pytest.raises(RuntimeError):
+        await extract_audio_buffer(b"not a video")
+
+
+@pytest.mark.skipif(not FFMPEG_AVAILABLE, reason="ffmpeg not installed")
+async def test_compact_for_upload_shrinks_wav(tmp_path: object) -> None:
+    path = os.path.join(str(tmp_path), "speech.wav")
+    subprocess.run(
+        ["ffmpeg", "-y", "-f", "lavfi", "-i", "sine=duration=20", "-ac", "2", path],
+        capture_output=True,
+        check=True,
+    )
+    compacted = await compact_for_upload(path, 20)
+    assert isinstance(compacted.source, AudioBuffer)
+    assert compacted.source.filename == "speech.ogg"
+    assert compacted.original_bytes == os.path.getsize(path)
+    assert compacted.saved_bytes > compacted.original_bytes * 0.8
+
+
+async def test_compact_for_upload_leaves_compact_audio_alone(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    run = AsyncMock()
+    monkeypatch.setattr(scheduler, "run", run)
+    # 60 s in 240 KB is already ~32 kbit/s: not worth a transcode.
+    voice = AudioBuffer(b"x" * 240_000, "voice.oga")
+    compacted = await compact_for_upload(voice, 60)
+    assert compacted.source is voice
+    assert compacted.saved_bytes == 0
+    run.assert_not_awaited()
+
+
+async def test_compact_for_upload_keeps_original_on_ffmpeg_failure(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(scheduler, "run", AsyncMock(return_value=(1, b"", b"boom")))
+    wav = AudioBuffer(b"x" * 2_000_000, "a.wav")
+    compacted = await compact_for_upload(wav, 10)
+    assert compacted.source is wav
+
+
+@pytest.mark.skipif(not FFMPEG_AVAILABLE, reason="ffmpeg not installed")
+async def test_speed_up_shortens_audio(tmp_path: object) -> None:
+    path = os.path.join(str(tmp_path), "talk.wav")
+    subprocess.run(
+        ["ffmpeg", "-y", "-f", "lavfi", "-i", "sine=duration=9", path],
+        capture_output=True,
+        check=True,
+    )
+    fast = await speed_up(path, 1.5)
+    assert fast.filename == "speedup.ogg"
+    duration = await get_audio_duration(fast.data)
+    assert duration == pytest.approx(6.0, abs=0.1)
+
+
+async def test_speed_up_rejects_out_of_range_factor() -> None:
+    with pytest.raises(ValueError):
+        await speed_up("a.ogg", 2.5)
 
 
 @pytest.mark.skipif(not FFMPEG_AVAILABLE, reason="ffmpeg not installed")
@@ -84,3 +289,83 @@ async def test_get_audio_duration(sample_audio: str) -> None:
 async def test_get_duration_nonexistent_file() -> None:
     duration = await get_audio_duration("/nonexistent/file.ogg")
     assert duration is None
+
+
+def test_plan_chunks_short_audio_is_not_split() -> None:
+    assert plan_chunks(700, [], chunk_seconds=600) == []
+
+
+def test_plan_chunks_prefers_silence_near_boundary() -> None:
+    silences = [(100.0, 101.0), (560.0, 562.0), (1150.0, 1152.0)]
+    assert plan_chunks(1800, silences, chunk_seconds=600) == [561.0, 1151.0]
+
+
+def test_plan_chunks_hard_cut_without_silence() -> None:
+    assert plan_chunks(1300, [], chunk_seconds=600) == [600.0]
+
+
+@pytest.fixture
+def sample_with_pause() -> str:
+    """1s tone, 1s silence, 1s tone."""
+    fd, path = tempfile.mkstemp(suffix=".wav")
+    os.close(fd)
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-y",
+            "-f",
+            "lavfi",
+            "-i",
+            "sine=frequency=440:duration=3",
+            "-af",
+            "volume=enable='between(t,1,2)':volume=0",
+            path,
+        ],
+        capture_output=True,
+        check=True,
+    )
+    yield path  # type: ignore[misc]
+    if os.path.exists(path):
+        os.unlink(path)
+
+
+@pytest.mark.skipif(not FFMPEG_AVAILABLE, reason="ffmpeg not installed")
+async def test_detect_silences(sample_with_pause: str) -> None:
+    silences = await detect_silences(sample_with_pause)
+    assert len(silences) == 1
+    start, end = silences[0]
+    assert 0.9 < start < 1.1
+    assert 1.9 < end < 2.1
+
+
+@pytest.mark.skipif(not FFMPEG_AVAILABLE, reason="ffmpeg not installed")
+async def test_split_audio(sample_with_pause: str, tmp_path: object) -> None:
+    chunks = await split_audio(sample_with_pause, [1.5], str(tmp_path))
+    assert len(chunks) == 2
+    assert chunks[0][1] == 0.0
+    assert 1.4 < chunks[1][1] < 1.6
+    assert all(os.path.exists(path) for path, _ in chunks)
+
+
+FFMPEG_LOG = """\
+Input #0, mov,mp4,m4a,3gp,3g2,mj2, from 'note.mp4':
+  Duration: 00:01:02.50, start: 0.000000, bitrate: 193 kb/s
+  Stream #0:0[0x1](und): Video: h264 (High) (avc1 / 0x31637661), yuv420p, 384x384
+  Stream #0:1[0x2](und): Audio: aac (LC) (mp4a / 0x6134706D), 44100 Hz, mono
+Output #0, ogg, to 'out.ogg':
+  Stream #0:0(und): Audio: opus, 48000 Hz, mono, flt
+size=     370kB time=00:01:02.49 bitrate=  48.5kbits/s speed= 45x
+"""
+
+
+def test_parse_ffmpeg_log_reads_input_metadata() -> None:
+    assert parse_ffmpeg_log(FFMPEG_LOG) == (62.5, "aac")
+
+
+def test_parse_ffmpeg_log_falls_back_to_progress_time() -> None:
+    log = FFMPEG_LOG.replace("Duration: 00:01:02.50", "Duration: N/A")
+    assert parse_ffmpeg_log(log) == (62.49, "aac")
+
+
+def test_parse_ffmpeg_log_empty() -> None:
+    assert parse_ffmpeg_log("") == (None, None)
@@ -1,3 +1,5 @@
+import pytest
+from pydantic import ValidationError
 
 from src.bot.config import Settings
 
@@ -42,3 +44,13 @@ def test_defaults() -> None:
     assert settings.max_audio_duration == 3600
     assert settings.transcription_ttl == 600
     assert settings.log_level == "INFO"
+
+
+def test_link_speedup_out_of_range_is_rejected() -> None:
+    with pytest.raises(ValidationError):
+        Settings(
+            telegram_bot_token="tok",
+            elevenlabs_api_key="elk",
+            openai_api_key="oai",
+            link_speedup=3.0,
+        )
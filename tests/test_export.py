@@ -1,5 +1,5 @@
 from src.bot.services.export import generate_srt, generate_txt
-from src.bot.services.transcription import WordData
+from src.bot.services.transcription import WordData, WordTable
 
 
 def test_generate_txt() -> None:
@@ -89,3 +89,15 @@ def test_generate_html_splits_single_speaker_wall_of_text() -> None:
     # Paragraphs break at sentence ends, never mid-sentence.
     assert "<p>Hello there. Hello" in page
     assert "there</p>" not in page
+
+
+def test_generate_srt_from_word_table_matches_list() -> None:
+    words = [
+        WordData(f"w{i}", float(i), float(i) + 0.5 if i % 4 else None, f"s{i // 6}")
+        for i in range(14)
+    ]
+    words.insert(3, WordData(" ", None, None, type="spacing"))
+    table = WordTable.from_words(words)
+    for size in (5, 10):
+        assert generate_srt(table, size) == generate_srt(words, size)
+    assert "\n[s0] w0 w1 w2 w3 w4\n" in generate_srt(table, 5)
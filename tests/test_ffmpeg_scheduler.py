@@ -0,0 +1,123 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+from src.bot.services.ffmpeg_scheduler import FFmpegScheduler, available_cores
+
+
+def _python(code: str) -> tuple[str, ...]:
+    return (sys.executable, "-c", code)
+
+
+async def test_run_returns_output() -> None:
+    scheduler = FFmpegScheduler(2)
+    returncode, stdout, stderr = await scheduler.run(
+        *_python("import sys; print('out'); print('err', file=sys.stderr); sys.exit(3)"),
+        timeout=10,
+    )
+    assert returncode == 3
+    assert stdout.strip() == b"out"
+    assert stderr.strip() == b"err"
+
+
+async def test_run_feeds_stdin() -> None:
+    scheduler = FFmpegScheduler(1)
+    code = "import sys; sys.stdout.buffer.write(sys.stdin.buffer.read()[::-1])"
+    _, stdout, _ = await scheduler.run(*_python(code), timeout=10, input=b"abc")
+    assert stdout == b"cba"
+
+
+async def test_stream_hands_over_fixed_size_blocks() -> None:
+    scheduler = FFmpegScheduler(1)
+    blocks: list[bytes] = []
+    code = "import sys; sys.stdout.buffer.write(sys.stdin.buffer.read() * 2)"
+    returncode, stderr = await scheduler.stream(
+        *_python(code), consume=blocks.append, timeout=10, input=b"x" * 150_000,
+        block_size=64_000,
+    )
+    assert returncode == 0
+    assert stderr == b""
+    assert [len(b) for b in blocks] == [64_000] * 4 + [44_000]
+
+
+async def test_stream_kills_process_when_consumer_fails() -> None:
+    scheduler = FFmpegScheduler(1)
+
+    def reject(block: bytes) -> None:
+        raise ValueError("bad block")
+
+    with pytest.raises(ValueError):
+        await scheduler.stream(
+            *_python("import sys, time; print('x', flush=True); time.sleep(10)"),
+            consume=reject,
+            timeout=10,
+            block_size=1,
+        )
+    assert scheduler.metrics()["ffmpeg_running"] == 0
+
+
+async def test_limits_parallel_jobs() -> None:
+    scheduler = FFmpegScheduler(2, niceness=0)
+    peak = 0
+    original = scheduler._lower_priority
+
+    def track(pid: int) -> None:
+        nonlocal peak
+        peak = max(peak, scheduler.metrics()["ffmpeg_running"])
+        original(pid)
+
+    scheduler._lower_priority = track  # type: ignore[method-assign]
+    jobs = [
+        asyncio.create_task(scheduler.run(*_python("import time; time.sleep(0.2)"), timeout=10))
+        for _ in range(5)
+    ]
+    await asyncio.sleep(0.1)
+    assert scheduler.metrics()["ffmpeg_queued"] == 3
+    await asyncio.gather(*jobs)
+
+    metrics = scheduler.metrics()
+    assert peak == 2
+    assert metrics["ffmpeg_running"] == 0
+    assert metrics["ffmpeg_queued"] == 0
+    assert metrics["ffmpeg_jobs_total"] == 5
+    assert metrics["ffmpeg_wait_ms_max"] >= 150
+
+
+async def test_timeout_counts_from_start_and_kills() -> None:
+    scheduler = FFmpegScheduler(1)
+    blocker = asyncio.create_task(
+        scheduler.run(*_python("import time; time.sleep(0.3)"), timeout=10)
+    )
+    await asyncio.sleep(0.05)
+    # Queued behind the blocker for longer than its own timeout, yet succeeds.
+    returncode, _, _ = await scheduler.run(*_python("pass"), timeout=0.25)
+    assert returncode == 0
+    await blocker
+
+    with pytest.raises(TimeoutError):
+        await scheduler.run(*_python("import time; time.sleep(30)"), timeout=0.2)
+    assert scheduler.metrics()["ffmpeg_running"] == 0
+    # The slot was released.
+    assert (await scheduler.run(*_python("pass"), timeout=10))[0] == 0
+
+
+@pytest.mark.skipif(not hasattr(os, "setpriority"), reason="no setpriority")
+async def test_jobs_run_at_lower_priority() -> None:
+    scheduler = FFmpegScheduler(1, niceness=5)
+    code = "import os, time; time.sleep(0.2); print(os.getpriority(os.PRIO_PROCESS, 0))"
+    _, stdout, _ = await scheduler.run(*_python(code), timeout=10)
+    assert int(stdout) == os.getpriority(os.PRIO_PROCESS, 0) + 5
+
+
+async def test_missing_binary_releases_slot() -> None:
+    scheduler = FFmpegScheduler(1)
+    with pytest.raises(OSError):
+        await scheduler.run("/nonexistent/ffmpeg", timeout=10)
+    assert (await scheduler.run(*_python("pass"), timeout=10))[0] == 0
+
+
+def test_default_size_follows_cores() -> None:
+    assert FFmpegScheduler().max_jobs == available_cores()
+    assert FFmpegScheduler(3).max_jobs == 3
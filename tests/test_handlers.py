@@ -1,16 +1,29 @@
 """Tests for command handlers — secretary setup album and broadcast."""
 
 import os
+import sqlite3
 import tempfile
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import ANY, AsyncMock, MagicMock
 
 import pytest
-from telegram import Message
+from telegram import CallbackQuery, Message, User
 
 from src.bot.handlers import SECRETARY_SETUP_IMAGES, BotHandlers
 from src.bot.keyboards import link_audio_keyboard
+from src.bot.locales import t
+from src.bot.services.audio import CompactedAudio, ExtractedAudio, ExtractedAudioBuffer
 from src.bot.services.notifier import AdminNotifier
+from src.bot.services.silence import TrimmedAudio
+from src.bot.services.transcription import (
+    AudioBuffer,
+    EmptyTranscriptionError,
+    TranscriptionResult,
+    WordData,
+)
 from src.bot.storage.statistics import StatisticsDB
+from src.bot.storage.transcript_archive import TranscriptArchive
+from src.bot.storage.transcript_cache import CachedTranscript, TranscriptCache
+from src.bot.storage.transcription_store import TranscriptionStore
 
 
 @pytest.fixture
@@ -170,14 +183,14 @@ def _patch_download(monkeypatch: pytest.MonkeyPatch, duration: float, tmp: str)
             fh.write(b"id3")
         return path
 
-    async def fake_extract(path: str, **kwargs: object) -> str:
+    async def fake_extract(path: str, **kwargs: object) -> ExtractedAudio:
         out = os.path.join(tmp, "audio.ogg")
         with open(out, "wb") as fh:
             fh.write(b"ogg")
-        return out
+        return ExtractedAudio(out, duration, "mp3")
 
     async def fake_duration(path: str) -> float:
-        return duration
+        raise AssertionError("duration comes from the extraction run")
 
     monkeypatch.setattr("src.bot.handlers.download_media", fake_download)
     monkeypatch.setattr("src.bot.handlers.extract_audio", fake_extract)
@@ -293,3 +306,343 @@ async def test_short_transcript_is_sent_as_message() -> None:
 
     message.reply_document.assert_not_awaited()
     assert message.reply_text.await_args.args[0] == "short one"
+
+
+def _voice_update(file_size: int, *, video_note: bool = False) -> tuple[MagicMock, MagicMock]:
+    update = _make_update()
+    update.effective_user.username = "alice"
+    message = update.message
+    message.message_id = 7
+    message.chat_id = 42
+    message.reply_text = AsyncMock(return_value=AsyncMock())
+    media = MagicMock(file_id="f1", file_unique_id="u1", duration=5)
+    message.voice = None if video_note else media
+    message.video_note = media if video_note else None
+
+    tg_file = MagicMock()
+    tg_file.file_size = file_size
+    tg_file.file_path = "video_notes/file_1.mp4" if video_note else "voice/file_0.oga"
+    tg_file.download_as_bytearray = AsyncMock(return_value=bytearray(b"OggS-data"))
+    tg_file.download_to_drive = AsyncMock()
+    context = MagicMock()
+    context.bot.get_file = AsyncMock(return_value=tg_file)
+    context.bot.send_chat_action = AsyncMock()
+    return update, context
+
+
+def _memory_handlers(notifier: AsyncMock, db: StatisticsDB) -> tuple[BotHandlers, AsyncMock]:
+    transcribe = AsyncMock(return_value=TranscriptionResult(text="hello"))
+    handlers = BotHandlers(
+        transcriber=MagicMock(transcribe=transcribe),
+        summarizer=MagicMock(),
+        notifier=notifier,
+        store=MagicMock(),
+        stats_db=db,
+        max_audio_duration=3600,
+        in_memory_audio_max_bytes=1024,
+    )
+    return handlers, transcribe
+
+
+async def test_small_voice_is_transcribed_from_memory(
+    notifier: AsyncMock, db: StatisticsDB
+) -> None:
+    handlers, transcribe = _memory_handlers(notifier, db)
+    update, context = _voice_update(file_size=512)
+
+    await handlers.handle_audio(update, context)
+
+    tg_file = context.bot.get_file.return_value
+    tg_file.download_to_drive.assert_not_awaited()
+    source = transcribe.await_args.args[0]
+    assert source == AudioBuffer(b"OggS-data", "audio.oga")
+    update.message.reply_text.assert_any_await("hello", reply_markup=ANY)
+
+
+async def test_cached_voice_skips_transcription(
+    notifier: AsyncMock, db: StatisticsDB
+) -> None:
+    handlers, transcribe = _memory_handlers(notifier, db)
+    cache = AsyncMock(spec=TranscriptCache)
+    cache.get.return_value = CachedTranscript(TranscriptionResult(text="cached"), 5)
+    handlers._transcript_cache = cache
+    update, context = _voice_update(file_size=512)
+
+    await handlers.handle_audio(update, context)
+
+    cache.get.assert_awaited_once_with("u1")
+    transcribe.assert_not_awaited()
+    context.bot.get_file.assert_not_awaited()
+    update.message.reply_text.assert_any_await("cached", reply_markup=ANY)
+
+
+async def test_failing_cache_does_not_break_transcription(
+    notifier: AsyncMock, db: StatisticsDB
+) -> None:
+    handlers, transcribe = _memory_handlers(notifier, db)
+    cache = AsyncMock(spec=TranscriptCache)
+    cache.get.side_effect = sqlite3.OperationalError("database is locked")
+    cache.put.side_effect = sqlite3.OperationalError("disk I/O error")
+    handlers._transcript_cache = cache
+    update, context = _voice_update(file_size=512)
+
+    await handlers.handle_audio(update, context)
+
+    transcribe.assert_awaited_once()
+    cache.put.assert_awaited_once()
+    update.message.reply_text.assert_any_await("hello", reply_markup=ANY)
+    notifier.notify_error.assert_not_awaited()
+
+
+async def test_large_voice_goes_through_disk(
+    notifier: AsyncMock, db: StatisticsDB
+) -> None:
+    handlers, transcribe = _memory_handlers(notifier, db)
+    update, context = _voice_update(file_size=4096)
+
+    await handlers.handle_audio(update, context)
+
+    tg_file = context.bot.get_file.return_value
+    tg_file.download_as_bytearray.assert_not_awaited()
+    path = tg_file.download_to_drive.await_args.kwargs["custom_path"]
+    assert transcribe.await_args.args[0] == path
+
+
+async def test_small_video_note_is_piped_through_ffmpeg(
+    notifier: AsyncMock, db: StatisticsDB, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    handlers, transcribe = _memory_handlers(notifier, db)
+    update, context = _voice_update(file_size=512, video_note=True)
+    extracted = ExtractedAudioBuffer(AudioBuffer(b"adts", "audio.aac"), 5.0, "aac")
+    extract = AsyncMock(return_value=extracted)
+    monkeypatch.setattr("src.bot.handlers.extract_audio_buffer", extract)
+    monkeypatch.setattr("src.bot.handlers.extract_audio", AsyncMock(side_effect=AssertionError))
+
+    await handlers.handle_audio(update, context)
+
+    assert extract.await_args.args[0] == b"OggS-data"
+    assert transcribe.await_args.args[0] is extracted.audio
+
+
+async def test_bulky_upload_is_compacted_before_transcription(
+    notifier: AsyncMock, db: StatisticsDB, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    handlers, transcribe = _memory_handlers(notifier, db)
+    handlers._compact_audio_uploads = True
+    speech = AudioBuffer(b"opus", "speech.ogg")
+    compact = AsyncMock(return_value=CompactedAudio(speech, 512, 4))
+    monkeypatch.setattr("src.bot.handlers.compact_for_upload", compact)
+    update, context = _voice_update(file_size=512)
+
+    await handlers.handle_audio(update, context)
+
+    assert compact.await_args.args == (AudioBuffer(b"OggS-data", "audio.oga"), 5)
+    assert transcribe.await_args.args[0] is speech
+
+
+async def test_reencoded_video_note_is_not_compacted_again(
+    notifier: AsyncMock, db: StatisticsDB, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    handlers, transcribe = _memory_handlers(notifier, db)
+    handlers._compact_audio_uploads = True
+    compact = AsyncMock(side_effect=AssertionError)
+    monkeypatch.setattr("src.bot.handlers.compact_for_upload", compact)
+    extracted = ExtractedAudioBuffer(
+        AudioBuffer(b"opus", "audio.ogg"), 5.0, "amr_nb", compacted=True
+    )
+    monkeypatch.setattr(
+        "src.bot.handlers.extract_audio_buffer", AsyncMock(return_value=extracted)
+    )
+    update, context = _voice_update(file_size=512, video_note=True)
+
+    await handlers.handle_audio(update, context)
+
+    compact.assert_not_awaited()
+    assert transcribe.await_args.args[0] is extracted.audio
+
+
+async def test_silent_voice_is_rejected_before_upload(
+    notifier: AsyncMock, db: StatisticsDB, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    handlers, transcribe = _memory_handlers(notifier, db)
+    handlers._trim_silence = True
+    monkeypatch.setattr(
+        "src.bot.handlers.trim_silence",
+        AsyncMock(side_effect=EmptyTranscriptionError("Audio contains no speech")),
+    )
+    update, context = _voice_update(file_size=512)
+
+    await handlers.handle_audio(update, context)
+
+    transcribe.assert_not_awaited()
+    processing = update.message.reply_text.return_value
+    processing.edit_text.assert_awaited_with(t("no_speech", "en"))
+
+
+async def test_trimmed_voice_timestamps_are_remapped(
+    notifier: AsyncMock, db: StatisticsDB, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    handlers, transcribe = _memory_handlers(notifier, db)
+    handlers._trim_silence = True
+    trimmed = AudioBuffer(b"opus", "trimmed.ogg")
+    trim = TrimmedAudio(trimmed, ((0.0, 4.0, 1.0),), 5.0)
+    monkeypatch.setattr("src.bot.handlers.trim_silence", AsyncMock(return_value=trim))
+    transcribe.return_value = TranscriptionResult("hello", [WordData("hello", 0.2, 0.6)])
+    update, context = _voice_update(file_size=512)
+
+    await handlers.handle_audio(update, context)
+
+    assert transcribe.await_args.args[0] is trimmed
+    saved_words = handlers._store.save.call_args.args[3]
+    assert (saved_words[0].start, saved_words[0].end) == (4.2, 4.6)
+
+
+@pytest.mark.parametrize(("duration", "sped_up"), [(600, True), (60, False)])
+async def test_long_link_audio_is_sped_up_and_rescaled(
+    notifier: AsyncMock,
+    db: StatisticsDB,
+    monkeypatch: pytest.MonkeyPatch,
+    duration: int,
+    sped_up: bool,
+) -> None:
+    handlers, transcribe = _memory_handlers(notifier, db)
+    handlers._link_speedup = 1.5
+    fast = AudioBuffer(b"opus", "speedup.ogg")
+    speed = AsyncMock(return_value=fast)
+    monkeypatch.setattr("src.bot.handlers.speed_up", speed)
+    transcribe.return_value = TranscriptionResult("hello", [WordData("hello", 2.0, 4.0)])
+    update = _link_update("https://youtu.be/jNQXAC9IVRw")
+    update.effective_user.username = "alice"
+
+    await handlers._transcribe_link_audio(
+        update.message, update.effective_user, "/tmp/a.m4a", duration, AsyncMock()
+    )
+
+    words = handlers._store.save.call_args.args[3]
+    if sped_up:
+        assert speed.await_args.args == ("/tmp/a.m4a", 1.5)
+        assert transcribe.await_args.args[0] is fast
+        assert (words[0].start, words[0].end) == (3.0, 6.0)
+    else:
+        speed.assert_not_awaited()
+        assert (words[0].start, words[0].end) == (2.0, 4.0)
+
+
+async def test_admin_stats_include_usage_windows(
+    handlers: BotHandlers, db: StatisticsDB
+) -> None:
+    await db.record_usage(111, "admin", 90)
+    await db.record_secretary_usage(111, "admin", 30)
+    update = _make_update(user_id=111)
+    await handlers.stats_command(update, MagicMock())
+    replies = [c.args[0] for c in update.message.reply_text.call_args_list]
+    usage = next(r for r in replies if r.startswith("Usage"))
+    lines = usage.splitlines()[1:]
+    assert [line.split(":")[0] for line in lines] == ["1d", "7d", "30d"]
+    assert lines[0].startswith("1d: 2 msgs | 2m 0s (D:1 S:1) | peak ")
+
+
+async def test_admin_stats_error_summary(handlers: BotHandlers, db: StatisticsDB) -> None:
+    await db.record_usage(111, "admin", 10)
+    await db.record_error("Transcription", "admin", "timeout")
+    await db.record_error("Transcription", "admin", "timeout")
+    update = _make_update(user_id=111)
+    await handlers.stats_command(update, MagicMock())
+    errors = update.message.reply_text.call_args_list[-1].args[0]
+    assert errors.startswith("Errors: 2 total")
+    assert "  Transcription: 2 (7d: 2)" in errors
+
+
+def _admin_callback(data: str) -> tuple[MagicMock, MagicMock]:
+    update = _make_update(user_id=111)
+    query = MagicMock()
+    query.data = data
+    query.answer = AsyncMock()
+    query.edit_message_text = AsyncMock()
+    query.message = MagicMock(spec=Message)
+    query.message.reply_document = AsyncMock()
+    update.callback_query = query
+    return update, query
+
+
+async def test_admin_user_report_is_paginated(
+    handlers: BotHandlers, db: StatisticsDB
+) -> None:
+    for uid in range(1, 30):
+        await db.record_usage(uid, f"user{uid}", 10)
+    await db.record_usage(111, "admin", 10)
+    update = _make_update(user_id=111)
+    await handlers.stats_command(update, MagicMock())
+    report = next(
+        c for c in update.message.reply_text.call_args_list
+        if c.args[0].startswith("All users")
+    )
+    assert report.args[0].splitlines()[0] == "All users (30), page 1/2:"
+    assert len(report.args[0].splitlines()) == 26
+    keyboard = report.kwargs["reply_markup"].inline_keyboard
+    buttons = [b.callback_data for row in keyboard for b in row]
+    assert buttons == ["admin_users:1", "admin_users_csv"]
+
+    update, query = _admin_callback("admin_users:1")
+    await handlers.handle_callback(update, MagicMock())
+    text = query.edit_message_text.call_args.args[0]
+    assert text.splitlines()[0] == "All users (30), page 2/2:"
+    assert len(text.splitlines()) == 6
+
+
+async def test_admin_user_report_csv(handlers: BotHandlers, db: StatisticsDB) -> None:
+    await db.record_usage(1, "alice", 10)
+    await db.record_secretary_usage(2, "bob", 20)
+    update, query = _admin_callback("admin_users_csv")
+    sent: list[bytes] = []
+    query.message.reply_document.side_effect = lambda f, filename: sent.append(f.read())
+    await handlers.handle_callback(update, MagicMock())
+    lines = sent[0].decode().splitlines()
+    assert lines[0].startswith("user_id,username,direct_count")
+    assert sorted(line.split(",")[1] for line in lines[1:]) == ["alice", "bob"]
+
+
+async def test_admin_user_report_ignores_non_admins(
+    handlers: BotHandlers, db: StatisticsDB
+) -> None:
+    await db.record_usage(1, "alice", 10)
+    update, query = _admin_callback("admin_users_csv")
+    update.effective_user.id = 42
+    await handlers.handle_callback(update, MagicMock())
+    query.message.reply_document.assert_not_awaited()
+
+
+async def test_export_loads_transcript_from_archive(
+    notifier: AsyncMock, db: StatisticsDB, tmp_path: object
+) -> None:
+    archive = TranscriptArchive(os.path.join(str(tmp_path), "archive.db"))
+    await archive.initialize()
+    try:
+        before = TranscriptionStore(ttl_seconds=600, archive=archive)
+        before.save(42, 7, "Hi", [WordData("Hi", 0.0, 0.4, "speaker_0")])
+        await before.flush()
+        # A fresh store, as after a restart: only the archive has it.
+        handlers = BotHandlers(
+            transcriber=MagicMock(),
+            summarizer=MagicMock(),
+            notifier=notifier,
+            store=TranscriptionStore(ttl_seconds=600, archive=archive),
+            stats_db=db,
+            max_audio_duration=3600,
+        )
+        update = _make_update()
+        update.effective_user = MagicMock(spec=User)
+        update.effective_user.id = 42
+        update.effective_user.language_code = "en"
+        query = MagicMock(spec=CallbackQuery)
+        query.data = "export_srt:7"
+        query.message = MagicMock(spec=Message)
+        update.callback_query = query
+        sent: list[bytes] = []
+        query.message.reply_document.side_effect = (
+            lambda document, filename: sent.append(document.read())
+        )
+        await handlers.handle_callback(update, MagicMock())
+        assert sent and b"00:00:00,000 --> 00:00:00,400" in sent[0]
+    finally:
+        await archive.close()
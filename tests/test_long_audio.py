@@ -0,0 +1,74 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.bot.services import long_audio
+from src.bot.services.transcription import (
+    EmptyTranscriptionError,
+    TranscriptionResult,
+    WordData,
+)
+
+
+class _ChunkClient:
+    """Returns one word per chunk; the first call to `slow_path` hangs."""
+
+    def __init__(self, slow_path: str | None = None) -> None:
+        self.calls: list[str] = []
+        self._slow_path = slow_path
+
+    async def transcribe(self, file_path: str) -> TranscriptionResult:
+        self.calls.append(file_path)
+        if file_path == self._slow_path and self.calls.count(file_path) == 1:
+            await asyncio.sleep(10)
+        if file_path == "silent.ogg":
+            raise EmptyTranscriptionError("empty")
+        return TranscriptionResult(
+            file_path, [WordData(file_path, 0.0, 1.0, "speaker_0")]
+        )
+
+
+def _patch_split(chunks: list[tuple[str, float]]) -> object:
+    return patch.multiple(
+        long_audio,
+        detect_silences=AsyncMock(return_value=[]),
+        split_audio=AsyncMock(return_value=chunks),
+    )
+
+
+async def test_chunks_are_merged_in_order_with_progress() -> None:
+    client = _ChunkClient()
+    progress = AsyncMock()
+    with _patch_split([("a.ogg", 0.0), ("silent.ogg", 600.0), ("b.ogg", 1200.0)]):
+        result = await long_audio.transcribe_long_audio(
+            client, "long.ogg", 1800, on_progress=progress
+        )
+
+    assert result.text == "a.ogg b.ogg"
+    assert [w.start for w in result.words if w.type == "word"] == [0.0, 1200.0]
+    assert [c.args for c in progress.await_args_list] == [(1, 3), (2, 3), (3, 3)]
+
+
+async def test_timeout_retries_only_that_chunk() -> None:
+    client = _ChunkClient(slow_path="b.ogg")
+    with _patch_split([("a.ogg", 0.0), ("b.ogg", 600.0)]):
+        result = await long_audio.transcribe_long_audio(
+            client, "long.ogg", 1200, chunk_timeout=0.05
+        )
+
+    assert result.text == "a.ogg b.ogg"
+    assert client.calls.count("a.ogg") == 1
+    assert client.calls.count("b.ogg") == 2
+
+
+async def test_chunk_timing_out_twice_raises() -> None:
+    class Hanging:
+        async def transcribe(self, file_path: str) -> TranscriptionResult:
+            await asyncio.sleep(10)
+            raise AssertionError
+
+    with _patch_split([("a.ogg", 0.0)]), pytest.raises(TimeoutError):
+        await long_audio.transcribe_long_audio(
+            Hanging(), "long.ogg", 1200, chunk_timeout=0.01
+        )
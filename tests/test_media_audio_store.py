@@ -1,12 +1,13 @@
+import asyncio
 import os
 
 from src.bot.storage.media_audio_store import MediaAudioStore
 
 
-def _audio_file(tmp_path: object, name: str = "a.mp3") -> str:
+def _audio_file(tmp_path: object, name: str = "a.mp3", size: int = 3) -> str:
     path = os.path.join(str(tmp_path), name)
     with open(path, "wb") as fh:
-        fh.write(b"id3")
+        fh.write(b"i" * size)
     return path
 
 
@@ -18,6 +19,7 @@ def test_save_and_get(tmp_path: object) -> None:
     assert audio is not None
     assert audio.path == path
     assert audio.duration == 42
+    assert audio.size == 3
 
 
 def test_get_isolates_users_and_messages(tmp_path: object) -> None:
@@ -35,12 +37,14 @@ def test_expiry_removes_file(tmp_path: object) -> None:
     assert not os.path.exists(path)
 
 
-def test_get_returns_none_when_file_vanished(tmp_path: object) -> None:
+def test_sweep_forgets_vanished_files(tmp_path: object) -> None:
     store = MediaAudioStore()
     path = _audio_file(tmp_path)
     store.save(1, 10, path, None)
     os.remove(path)
+    store.sweep()
     assert store.get(1, 10) is None
+    assert store.metrics()["link_audio_bytes"] == 0
 
 
 def test_discard_removes_file(tmp_path: object) -> None:
@@ -50,3 +54,76 @@ def test_discard_removes_file(tmp_path: object) -> None:
     store.discard(1, 10)
     assert store.get(1, 10) is None
     assert not os.path.exists(path)
+
+
+def test_quota_evicts_least_recently_used(tmp_path: object) -> None:
+    store = MediaAudioStore(max_bytes=250)
+    paths = [_audio_file(tmp_path, f"{i}.mp3", 100) for i in range(3)]
+    store.save(1, 0, paths[0], None)
+    store.save(1, 1, paths[1], None)
+    assert store.get(1, 0) is not None  # 1 is now least recently used
+    store.save(1, 2, paths[2], None)
+    assert store.get(1, 1) is None
+    assert not os.path.exists(paths[1])
+    assert store.get(1, 0) is not None
+    assert store.get(1, 2) is not None
+    assert store.metrics() == {
+        "link_audio_entries": 2,
+        "link_audio_bytes": 200,
+        "link_audio_evictions_total": 1,
+    }
+
+
+def test_file_over_quota_is_kept_alone(tmp_path: object) -> None:
+    store = MediaAudioStore(max_bytes=50)
+    store.save(1, 0, _audio_file(tmp_path, "a.mp3", 100), None)
+    store.save(1, 1, _audio_file(tmp_path, "b.mp3", 100), None)
+    assert len(store) == 1
+    assert store.get(1, 1) is not None
+
+
+def test_save_expires_old_entries(tmp_path: object) -> None:
+    store = MediaAudioStore(ttl_seconds=0)
+    old = _audio_file(tmp_path, "old.mp3")
+    store.save(1, 0, old, None)
+    store.save(1, 1, _audio_file(tmp_path, "new.mp3"), None)
+    assert not os.path.exists(old)
+
+
+def test_pinned_file_is_not_evicted(tmp_path: object) -> None:
+    store = MediaAudioStore(max_bytes=250)
+    paths = [_audio_file(tmp_path, f"{i}.mp3", 100) for i in range(4)]
+    store.save(1, 0, paths[0], None)
+    with store.use(1, 0) as audio:
+        assert audio is not None
+        store.save(1, 1, paths[1], None)
+        store.save(1, 2, paths[2], None)  # over quota: 1 goes, 0 is in use
+        assert os.path.exists(paths[0])
+        assert not os.path.exists(paths[1])
+        store.discard(1, 0)  # dropped, but the file outlives the block
+        assert os.path.exists(paths[0])
+    assert not os.path.exists(paths[0])
+    assert store.get(1, 2) is not None
+
+
+async def test_concurrent_saves_do_not_evict_file_in_use(tmp_path: object) -> None:
+    store = MediaAudioStore(max_bytes=250)
+    store.save(1, 0, _audio_file(tmp_path, "long.mp3", 100), None)
+    saved = asyncio.Event()
+
+    async def transcribe() -> bytes:
+        with store.use(1, 0) as audio:
+            assert audio is not None
+            await saved.wait()  # e.g. uploading while other links arrive
+            with open(audio.path, "rb") as fh:
+                return fh.read()
+
+    async def burst() -> None:
+        for i in range(1, 5):
+            await asyncio.sleep(0)
+            store.save(2, i, _audio_file(tmp_path, f"{i}.mp3", 100), None)
+        saved.set()
+
+    data, _ = await asyncio.gather(transcribe(), burst())
+    assert data == b"i" * 100
+    assert store.metrics()["link_audio_evictions_total"] == 3  # 1, 2 and 3
@@ -0,0 +1,255 @@
+import struct
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from src.bot.services import audio
+from src.bot.services.media_duration import MediaLayout, read_duration, read_layout
+
+FFMPEG_AVAILABLE = True
+try:
+    subprocess.run(["ffmpeg", "-version"], capture_output=True, check=True)
+except (FileNotFoundError, subprocess.CalledProcessError):
+    FFMPEG_AVAILABLE = False
+
+
+def _ogg_page(granule: int, payload: bytes, *, header_type: int = 0) -> bytes:
+    # CRC is left at zero; the reader doesn't verify it.
+    return (
+        b"OggS"
+        + bytes([0, header_type])
+        + struct.pack("<qIII", granule, 1, 0, 0)
+        + bytes([1, len(payload)])
+        + payload
+    )
+
+
+def _opus_file(granule: int, pre_skip: int = 312) -> bytes:
+    head = b"OpusHead" + bytes([1, 1]) + struct.pack("<HIhB", pre_skip, 48000, 0, 0)
+    return (
+        _ogg_page(0, head, header_type=2)
+        + _ogg_page(0, b"OpusTags" + b"\x00" * 8)
+        + _ogg_page(granule // 2, b"\x00" * 100)
+        + _ogg_page(granule, b"\x00" * 100, header_type=4)
+    )
+
+
+def _mp3_frame(header: int) -> bytes:
+    # MPEG-1 Layer III, 128 kbit/s, 44.1 kHz, no padding: 417-byte frames.
+    return struct.pack(">I", header) + b"\x00" * 413
+
+
+_MP3_HEADER = 0xFFFB9000
+_MP3_MONO_HEADER = 0xFFFB90C0
+
+
+def _box(kind: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I", 8 + len(payload)) + kind + payload
+
+
+def _mvhd(timescale: int, duration: int, *, version: int = 0) -> bytes:
+    if version == 1:
+        body = bytes([1, 0, 0, 0]) + struct.pack(">QQIQ", 0, 0, timescale, duration)
+    else:
+        body = bytes(4) + struct.pack(">IIII", 0, 0, timescale, duration)
+    return _box(b"mvhd", body + bytes(80))
+
+
+def test_ogg_opus(tmp_path: Path) -> None:
+    path = tmp_path / "voice.ogg"
+    path.write_bytes(_opus_file(48000 * 5 + 312))
+    assert read_duration(str(path)) == pytest.approx(5.0)
+
+
+def test_ogg_skips_pages_without_granule(tmp_path: Path) -> None:
+    path = tmp_path / "voice.ogg"
+    path.write_bytes(_opus_file(48000 * 3 + 312) + _ogg_page(-1, b"\x00" * 10))
+    assert read_duration(str(path)) == pytest.approx(3.0)
+
+
+def test_ogg_unknown_codec(tmp_path: Path) -> None:
+    path = tmp_path / "video.ogv"
+    path.write_bytes(_ogg_page(0, b"\x80theora" + bytes(40), header_type=2))
+    assert read_duration(str(path)) is None
+
+
+def test_mp3_cbr_estimate(tmp_path: Path) -> None:
+    path = tmp_path / "a.mp3"
+    id3 = b"ID3\x04\x00\x00" + bytes([0, 0, 0, 20]) + bytes(20)
+    # 100 frames of 417 bytes at 128 kbit/s, plus an ID3v1 tag at the end.
+    path.write_bytes(id3 + _mp3_frame(_MP3_HEADER) * 100 + b"TAG" + bytes(125))
+    assert read_duration(str(path)) == pytest.approx(100 * 417 * 8 / 128000)
+
+
+def test_mp3_xing_frame_count(tmp_path: Path) -> None:
+    # Mono MPEG-1: Xing header after 4 + 17 bytes; 1000 frames of 1152 samples.
+    xing = bytearray(_mp3_frame(_MP3_MONO_HEADER))
+    xing[21:33] = b"Xing" + struct.pack(">II", 0x1, 1000)
+    path = tmp_path / "vbr.mp3"
+    path.write_bytes(bytes(xing) + _mp3_frame(_MP3_MONO_HEADER) * 3)
+    assert read_duration(str(path)) == pytest.approx(1000 * 1152 / 44100)
+
+
+def test_mp3_vbri_frame_count(tmp_path: Path) -> None:
+    vbri = bytearray(_mp3_frame(_MP3_HEADER))
+    vbri[36:54] = b"VBRI" + bytes(10) + struct.pack(">I", 500)
+    path = tmp_path / "vbri.mp3"
+    path.write_bytes(bytes(vbri) + _mp3_frame(_MP3_HEADER) * 3)
+    assert read_duration(str(path)) == pytest.approx(500 * 1152 / 44100)
+
+
+def test_mp4_moov_after_mdat(tmp_path: Path) -> None:
+    path = tmp_path / "a.m4a"
+    path.write_bytes(
+        _box(b"ftyp", b"M4A " + bytes(4))
+        + _box(b"mdat", bytes(50_000))
+        + _box(b"moov", _mvhd(1000, 62_500))
+    )
+    assert read_duration(str(path)) == pytest.approx(62.5)
+
+
+def test_mp4_version_1_mvhd(tmp_path: Path) -> None:
+    path = tmp_path / "a.mp4"
+    path.write_bytes(
+        _box(b"ftyp", b"isom" + bytes(4))
+        + _box(b"moov", _mvhd(44100, 44100 * 90, version=1))
+    )
+    assert read_duration(str(path)) == pytest.approx(90.0)
+
+
+def test_mp4_fragmented_is_unknown(tmp_path: Path) -> None:
+    path = tmp_path / "frag.mp4"
+    path.write_bytes(_box(b"ftyp", b"isom" + bytes(4)) + _box(b"moov", _mvhd(1000, 0)))
+    assert read_duration(str(path)) is None
+
+
+def _trak(handler: bytes, sample_entry: bytes) -> bytes:
+    hdlr = _box(b"hdlr", bytes(8) + handler + bytes(12))
+    stsd = _box(b"stsd", bytes(4) + struct.pack(">I", 1) + sample_entry)
+    stbl = _box(b"stbl", stsd)
+    return _box(b"trak", _box(b"mdia", hdlr + _box(b"minf", stbl)))
+
+
+def _mp4a(object_type: int) -> bytes:
+    # ES_Descriptor (ES_ID, no flags) > DecoderConfigDescriptor.
+    decoder = bytes([0x04, 0x80, 0x80, 0x80, 13, object_type]) + bytes(12)
+    es = bytes([0x03, len(decoder) + 3, 0, 1, 0]) + decoder
+    return _box(b"mp4a", bytes(28) + _box(b"esds", bytes(4) + es))
+
+
+def test_layout_mp4_audio_codec_after_video_track(tmp_path: Path) -> None:
+    path = tmp_path / "note.mp4"
+    moov = _mvhd(1000, 5000) + _trak(b"vide", _box(b"avc1", bytes(78))) + _trak(
+        b"soun", _mp4a(0x40)
+    )
+    path.write_bytes(_box(b"ftyp", b"isom" + bytes(4)) + _box(b"moov", moov))
+    assert read_layout(str(path)) == MediaLayout("aac", streamable=True)
+
+
+@pytest.mark.parametrize(
+    ("entry", "codec"),
+    [
+        (_mp4a(0x6B), "mp3"),
+        (_box(b"Opus", bytes(28)), "opus"),
+        (_box(b"ac-3", bytes(28)), "ac3"),
+        (_box(b"xxxx", bytes(28)), None),
+    ],
+)
+def test_layout_mp4_sample_entries(tmp_path: Path, entry: bytes, codec: str | None) -> None:
+    path = tmp_path / "a.mp4"
+    path.write_bytes(
+        _box(b"ftyp", b"isom" + bytes(4)) + _box(b"moov", _trak(b"soun", entry))
+    )
+    assert read_layout(str(path)) == MediaLayout(codec)
+
+
+def test_layout_mp4_moov_after_mdat_is_not_streamable(tmp_path: Path) -> None:
+    path = tmp_path / "camera.mp4"
+    path.write_bytes(
+        _box(b"ftyp", b"isom" + bytes(4))
+        + _box(b"mdat", bytes(50_000))
+        + _box(b"moov", _trak(b"soun", _mp4a(0x40)))
+    )
+    assert read_layout(str(path)) == MediaLayout("aac", streamable=False)
+
+
+def test_layout_mp4_without_audio(tmp_path: Path) -> None:
+    path = tmp_path / "silent.mp4"
+    path.write_bytes(
+        _box(b"ftyp", b"isom" + bytes(4))
+        + _box(b"moov", _trak(b"vide", _box(b"avc1", bytes(78))))
+    )
+    assert read_layout(str(path)) == MediaLayout(None)
+
+
+def test_layout_ogg(tmp_path: Path) -> None:
+    path = tmp_path / "voice.ogg"
+    path.write_bytes(_opus_file(48000))
+    assert read_layout(str(path)) == MediaLayout("opus")
+
+
+@pytest.mark.parametrize("data", [b"", b"\x1aE\xdf\xa3" + bytes(64), _mp3_frame(_MP3_HEADER)])
+def test_layout_of_other_containers_is_unknown(tmp_path: Path, data: bytes) -> None:
+    path = tmp_path / "blob"
+    path.write_bytes(data)
+    assert read_layout(str(path)) is None
+
+
+@pytest.mark.parametrize(
+    "data",
+    [b"", b"RIFF\x00\x00\x00\x00WAVEfmt ", b"\xff\xfb" + bytes(64), bytes(range(256)) * 40],
+)
+def test_unrecognized_data(tmp_path: Path, data: bytes) -> None:
+    path = tmp_path / "blob"
+    path.write_bytes(data)
+    assert read_duration(str(path)) is None
+
+
+def test_missing_file() -> None:
+    assert read_duration("/nonexistent/file.ogg") is None
+
+
+@pytest.mark.skipif(not FFMPEG_AVAILABLE, reason="ffmpeg not installed")
+@pytest.mark.parametrize(
+    ("suffix", "codec_args"),
+    [
+        (".ogg", ["-c:a", "libopus"]),
+        (".mp3", ["-c:a", "libmp3lame", "-b:a", "64k"]),
+        (".mp3", ["-c:a", "libmp3lame", "-q:a", "4"]),
+        (".m4a", ["-c:a", "aac"]),
+    ],
+)
+def test_matches_ffmpeg_output(tmp_path: Path, suffix: str, codec_args: list[str]) -> None:
+    path = tmp_path / f"sine{suffix}"
+    subprocess.run(
+        ["ffmpeg", "-y", "-f", "lavfi", "-i", "sine=frequency=440:duration=7.3"]
+        + codec_args
+        + [str(path)],
+        capture_output=True,
+        check=True,
+    )
+    # MP3 pads the last frame, so allow one frame of slack.
+    assert read_duration(str(path)) == pytest.approx(7.3, abs=0.05)
+
+
+async def test_get_audio_duration_skips_ffprobe(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = tmp_path / "voice.ogg"
+    path.write_bytes(_opus_file(48000 * 2 + 312))
+
+    async def no_subprocess(*args: object, **kwargs: object) -> None:
+        raise AssertionError("ffprobe should not run")
+
+    monkeypatch.setattr(audio.asyncio, "create_subprocess_exec", no_subprocess)
+    assert await audio.get_audio_duration(str(path)) == pytest.approx(2.0)
+
+
+async def test_get_audio_duration_reads_bytes(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def no_subprocess(*args: object, **kwargs: object) -> None:
+        raise AssertionError("ffprobe should not run")
+
+    monkeypatch.setattr(audio.asyncio, "create_subprocess_exec", no_subprocess)
+    data = _opus_file(48000 * 4 + 312)
+    assert await audio.get_audio_duration(data) == pytest.approx(4.0)
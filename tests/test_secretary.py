@@ -14,6 +14,7 @@ from src.bot.services.transcription import (
     TranscriptionResult,
 )
 from src.bot.storage.statistics import StatisticsDB
+from src.bot.storage.transcript_cache import TranscriptCache
 
 
 @pytest.fixture
@@ -93,6 +94,7 @@ def _make_voice_message(
 
     voice = MagicMock()
     voice.file_id = "file_abc"
+    voice.file_unique_id = "unique_abc"
     voice.duration = duration
     msg.voice = voice
     msg.video_note = None
@@ -320,6 +322,47 @@ async def test_transcribe_callback_flow(
     assert stats[0] == 1
 
 
+async def test_transcribe_callback_served_from_cache(
+    mock_transcriber: MagicMock,
+    mock_notifier: AsyncMock,
+    db: StatisticsDB,
+    tmp_path: object,
+) -> None:
+    cache = TranscriptCache(os.path.join(str(tmp_path), "cache.db"))
+    await cache.initialize()
+    await cache.put("unique_abc", TranscriptionResult(text="Cached hello"), 10)
+    handler = SecretaryHandler(
+        transcriber=mock_transcriber,
+        notifier=mock_notifier,
+        stats_db=db,
+        max_audio_duration=3600,
+        transcript_cache=cache,
+    )
+    handler._connections["biz_123"] = _make_business_connection()
+
+    update = MagicMock()
+    query = MagicMock()
+    query.data = "sec_transcribe:1:biz_123"
+    query.answer = AsyncMock()
+    prompt_msg = MagicMock()
+    prompt_msg.chat.id = 100
+    prompt_msg.message_id = 99
+    prompt_msg.reply_to_message = _make_voice_message()
+    query.message = prompt_msg
+    update.callback_query = query
+
+    bot = AsyncMock()
+    await handler.handle_transcribe_callback(update, _make_context(bot))
+    await cache.close()
+
+    bot.get_file.assert_not_called()
+    mock_transcriber.transcribe.assert_not_called()
+    assert "Cached hello" in bot.edit_message_text.call_args.kwargs["text"]
+    stats = await db.get_secretary_stats(42)
+    assert stats is not None
+    assert stats[0] == 1
+
+
 async def test_transcribe_callback_invalid_data(handler: SecretaryHandler) -> None:
     update = MagicMock()
     query = MagicMock()
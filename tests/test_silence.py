@@ -0,0 +1,162 @@
+import subprocess
+from collections.abc import Callable
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+import numpy as np
+import pytest
+
+from src.bot.services.ffmpeg_scheduler import scheduler
+from src.bot.services.silence import (
+    SAMPLE_RATE,
+    TrimmedAudio,
+    keep_intervals,
+    speech_frames,
+    trim_silence,
+)
+from src.bot.services.transcription import (
+    AudioBuffer,
+    EmptyTranscriptionError,
+    TranscriptionResult,
+    WordData,
+)
+
+FFMPEG_AVAILABLE = True
+try:
+    subprocess.run(["ffmpeg", "-version"], capture_output=True, check=True)
+except (FileNotFoundError, subprocess.CalledProcessError):
+    FFMPEG_AVAILABLE = False
+
+
+def _signal(*parts: tuple[float, bool]) -> np.ndarray:
+    """Concatenate (seconds, is_tone) stretches of 16 kHz int16 audio."""
+    chunks = []
+    for seconds, tone in parts:
+        t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+        wave = 12000 * np.sin(2 * np.pi * 440 * t) if tone else np.zeros_like(t)
+        chunks.append(wave.astype("<i2"))
+    return np.concatenate(chunks)
+
+
+def _decodes_to(monkeypatch: pytest.MonkeyPatch, samples: np.ndarray) -> None:
+    """Make the PCM scan stream `samples` in the blocks ffmpeg would."""
+
+    async def stream(
+        *args: str,
+        consume: Callable[[bytes], None],
+        block_size: int,
+        **kwargs: object,
+    ) -> tuple[int, bytes]:
+        data = samples.tobytes()
+        for i in range(0, len(data), block_size):
+            consume(data[i : i + block_size])
+        return 0, b""
+
+    monkeypatch.setattr(scheduler, "stream", stream)
+
+
+def test_speech_frames_marks_loud_frames() -> None:
+    voiced = speech_frames(_signal((1, False), (1, True), (1, False)))
+    assert len(voiced) == 150
+    assert not voiced[:50].any()
+    assert voiced[50:100].all()
+    assert not voiced[100:].any()
+
+
+def test_keep_intervals_pads_and_merges_short_gaps() -> None:
+    voiced = np.zeros(200, dtype=bool)
+    voiced[20:40] = True
+    voiced[45:60] = True  # 5-frame gap: kept whole
+    voiced[150:160] = True  # 90-frame gap: shortened to the padding
+    assert keep_intervals(voiced, pad_frames=5, max_gap_frames=50) == [
+        (15, 65),
+        (145, 165),
+    ]
+
+
+def test_keep_intervals_no_speech() -> None:
+    assert keep_intervals(np.zeros(10, dtype=bool), pad_frames=2, max_gap_frames=5) == []
+
+
+def test_to_original_maps_across_cuts() -> None:
+    trim = TrimmedAudio(AudioBuffer(b"", "t.ogg"), ((0.0, 2.0, 3.0), (3.0, 10.0, 2.0)), 14.0)
+    assert trim.removed_seconds == 9.0
+    assert trim.to_original(1.0) == 3.0
+    assert trim.to_original(3.0) == 10.0
+    assert trim.to_original(3.0, end=True) == 5.0
+    assert trim.to_original(4.5) == 11.5
+
+
+def test_remap_moves_words_and_keeps_text() -> None:
+    trim = TrimmedAudio(AudioBuffer(b"", "t.ogg"), ((0.0, 2.0, 3.0), (3.0, 10.0, 2.0)), 14.0)
+    result = TranscriptionResult(
+        text="hi there",
+        words=[
+            WordData("hi", 0.5, 3.0, "speaker_0"),
+            WordData(" ", None, None, type="spacing"),
+            WordData("there", 3.0, 4.0, "speaker_0"),
+        ],
+    )
+    remapped = trim.remap(result)
+    assert remapped.text == "hi there"
+    assert [(w.start, w.end) for w in remapped.words] == [
+        (2.5, 5.0),
+        (None, None),
+        (10.0, 11.0),
+    ]
+    assert remapped.words[0].speaker_id == "speaker_0"
+
+
+def test_remap_without_segments_is_identity() -> None:
+    result = TranscriptionResult(text="x", words=[WordData("x", 1.0, 2.0)])
+    assert TrimmedAudio("a.ogg", (), 3.0).remap(result) is result
+
+
+async def test_silent_audio_is_rejected(monkeypatch: pytest.MonkeyPatch) -> None:
+    _decodes_to(monkeypatch, _signal((5, False)))
+    with pytest.raises(EmptyTranscriptionError):
+        await trim_silence(AudioBuffer(b"ogg", "voice.ogg"))
+
+
+async def test_little_silence_returns_original(monkeypatch: pytest.MonkeyPatch) -> None:
+    _decodes_to(monkeypatch, _signal((0.2, False), (4, True), (0.2, False)))
+    source = AudioBuffer(b"ogg", "voice.ogg")
+    trim = await trim_silence(source)
+    assert trim.source is source
+    assert trim.segments == ()
+    assert trim.original_duration == pytest.approx(4.4)
+
+
+async def test_trim_selects_kept_frames_from_the_source(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # Frames 100-149 and 300-349 are voiced; 12 frames of padding each side.
+    _decodes_to(monkeypatch, _signal((2, False), (1, True), (3, False), (1, True), (2, False)))
+    run = AsyncMock(return_value=(0, b"trimmed", b""))
+    monkeypatch.setattr(scheduler, "run", run)
+
+    trim = await trim_silence("voice.ogg")
+
+    args = run.await_args.args
+    assert args[args.index("-i") + 1] == "voice.ogg"
+    assert "aselect='between(n,88,161)+between(n,288,361)'" in args[args.index("-af") + 1]
+    assert trim.source == AudioBuffer(b"trimmed", "trimmed.ogg")
+    flat = [t for segment in trim.segments for t in segment]
+    assert flat == pytest.approx([0.0, 1.76, 1.48, 1.48, 5.76, 1.48])
+    assert trim.original_duration == pytest.approx(9.0)
+
+
+@pytest.mark.skipif(not FFMPEG_AVAILABLE, reason="ffmpeg not installed")
+async def test_trim_silence_end_to_end(tmp_path: Path) -> None:
+    path = tmp_path / "gaps.wav"
+    expr = "if(between(t,3,5)+between(t,10,12),0.5*sin(2*PI*440*t),0)"
+    subprocess.run(
+        ["ffmpeg", "-y", "-f", "lavfi", "-i", f"aevalsrc='{expr}':s=16000:d=15", str(path)],
+        capture_output=True,
+        check=True,
+    )
+    trim = await trim_silence(str(path))
+    assert isinstance(trim.source, AudioBuffer)
+    assert trim.removed_seconds > 9
+    assert trim.to_original(0.3) == pytest.approx(3.05, abs=0.1)
+    assert trim.to_original(trim.segments[1][0] + 0.3) == pytest.approx(10.05, abs=0.1)
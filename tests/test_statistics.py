@@ -1,20 +1,31 @@
+import asyncio
 import os
+import sqlite3
 import tempfile
+from collections.abc import AsyncIterator, Awaitable, Callable
+from pathlib import Path
 
 import pytest
 
 from src.bot.storage.statistics import StatisticsDB
 
 
-@pytest.fixture
-async def db() -> StatisticsDB:
+@pytest.fixture(
+    params=[(0.0, 0), (60.0, 0), (60.0, 2)], ids=["immediate", "write_behind", "read_pool"]
+)
+async def db(request: pytest.FixtureRequest) -> StatisticsDB:
     fd, path = tempfile.mkstemp(suffix=".db")
     os.close(fd)
-    stats_db = StatisticsDB(path)
+    flush_interval, read_connections = request.param
+    stats_db = StatisticsDB(
+        path, flush_interval=flush_interval, read_connections=read_connections
+    )
     await stats_db.initialize()
     yield stats_db  # type: ignore[misc]
     await stats_db.close()
-    os.unlink(path)
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.unlink(path + suffix)
 
 
 async def test_record_and_get(db: StatisticsDB) -> None:
@@ -93,3 +104,353 @@ async def test_error_stats_empty(db: StatisticsDB) -> None:
     assert total == 0
     assert by_type == {}
     assert last_error is None
+
+
+def _committed_count(path: Path, table: str) -> int:
+    """Row count as seen by another connection, i.e. only committed rows."""
+    with sqlite3.connect(path) as conn:
+        return int(conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0])
+
+
+async def test_write_behind_defers_commit(tmp_path: Path) -> None:
+    path = tmp_path / "stats.db"
+    db = StatisticsDB(str(path), flush_interval=60, flush_max_rows=100)
+    await db.initialize()
+    await db.record_usage(1, "alice", 10)
+    await db.record_error("Transcription", "alice")
+    await db.add_pending_prompt("conn", 1, 5)
+    assert _committed_count(path, "user_statistics") == 0
+
+    # Reads see queued writes.
+    assert (await db.get_error_stats())[0] == 1
+    assert _committed_count(path, "error_statistics") == 1
+    await db.close()
+
+
+async def test_write_behind_flushes_when_batch_is_full(tmp_path: Path) -> None:
+    path = tmp_path / "stats.db"
+    db = StatisticsDB(str(path), flush_interval=60, flush_max_rows=3)
+    await db.initialize()
+    for message_id in range(2):
+        await db.add_pending_prompt("conn", 1, message_id)
+    assert _committed_count(path, "secretary_pending_prompts") == 0
+    await db.remove_pending_prompt("conn", 0)
+    assert _committed_count(path, "secretary_pending_prompts") == 1
+    await db.close()
+
+
+async def test_write_behind_flushes_after_interval(tmp_path: Path) -> None:
+    path = tmp_path / "stats.db"
+    db = StatisticsDB(str(path), flush_interval=0.05)
+    await db.initialize()
+    await db.record_secretary_usage(1, "alice", 10)
+    await db.record_secretary_usage(1, "alice", 20)
+    await asyncio.sleep(0.2)
+    with sqlite3.connect(path) as conn:
+        row = conn.execute(
+            "SELECT total_transcriptions, total_audio_duration_seconds "
+            "FROM secretary_statistics"
+        ).fetchone()
+    assert row == (2, 30)
+    await db.close()
+
+
+async def test_close_flushes_queued_writes(tmp_path: Path) -> None:
+    path = tmp_path / "stats.db"
+    db = StatisticsDB(str(path), flush_interval=60)
+    await db.initialize()
+    await db.record_usage(1, "alice", 10)
+    await db.close()
+    assert _committed_count(path, "user_statistics") == 1
+
+
+async def test_read_pool_uses_wal_and_separate_connections(tmp_path: Path) -> None:
+    db = StatisticsDB(str(tmp_path / "stats.db"), read_connections=2)
+    await db.initialize()
+    assert db._db is not None
+    async with db._db.execute("PRAGMA journal_mode") as cursor:
+        assert await cursor.fetchone() == ("wal",)
+    await db.save_secretary_connection(1, "conn_1", "alice")
+
+    # An open write transaction doesn't block readers; they see the last commit.
+    await db._db.execute("BEGIN IMMEDIATE")
+    await db._db.execute("DELETE FROM secretary_connections")
+    assert await db.get_all_secretary_connections() == [(1, "conn_1")]
+    await db._db.commit()
+    assert await db.get_all_secretary_connections() == []
+    await db.close()
+
+
+async def test_read_pool_connections_are_read_only(tmp_path: Path) -> None:
+    db = StatisticsDB(str(tmp_path / "stats.db"), read_connections=1)
+    await db.initialize()
+    async with db._reader() as reader:
+        with pytest.raises(sqlite3.OperationalError):
+            await reader.execute("DELETE FROM user_statistics")
+    await db.close()
+
+
+async def test_migrations_upgrade_unversioned_database(tmp_path: Path) -> None:
+    path = tmp_path / "stats.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE user_statistics (user_id INTEGER PRIMARY KEY, username TEXT, "
+            "total_transcriptions INTEGER DEFAULT 0, total_audio_duration_seconds "
+            "INTEGER DEFAULT 0, first_used_at TIMESTAMP, last_used_at TIMESTAMP)"
+        )
+        conn.execute("INSERT INTO user_statistics (user_id, username) VALUES (7, 'old')")
+        conn.execute(
+            "CREATE TABLE error_statistics (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "error_type TEXT NOT NULL, username TEXT, error_detail TEXT, created_at TIMESTAMP)"
+        )
+        conn.executemany(
+            "INSERT INTO error_statistics (error_type, created_at) VALUES (?, ?)",
+            [("Download", "2025-01-01 10:00:00"), ("Download", "2025-01-02 10:00:00")],
+        )
+
+    for _ in range(2):  # the second run finds nothing left to do
+        db = StatisticsDB(str(path))
+        await db.initialize()
+        await db.close()
+
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == 5
+        indexes = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+        assert conn.execute("SELECT username FROM user_statistics").fetchone() == ("old",)
+    assert "idx_pending_prompts_created" in indexes
+    assert "idx_secretary_connections_connection" not in indexes
+
+    # Error counters are backfilled from the existing raw rows.
+    db = StatisticsDB(str(path))
+    await db.initialize()
+    assert await db.get_error_stats() == (2, {"Download": 2}, "2025-01-02 10:00:00")
+    await db.close()
+
+
+# The only table scans allowed, per method. Everything else must SEARCH.
+# Admin listings and reports return every row (walking the last_used_at
+# index to get them in order); the connection list holds one row per
+# connected user; error_totals holds one row per error type.
+_FULL_READS: dict[str, set[str]] = {
+    "get_all_stats": {"SCAN user_statistics USING INDEX idx_user_statistics_last_used"},
+    "get_all_user_ids": {
+        "SCAN user_statistics USING COVERING INDEX idx_user_statistics_last_used",
+        "SCAN secretary_statistics USING COVERING INDEX idx_secretary_statistics_last_used",
+        "SCAN secretary_connections",
+    },
+    "count_report_users": {
+        "SCAN user_statistics USING COVERING INDEX idx_user_statistics_last_used",
+        "SCAN s USING COVERING INDEX idx_secretary_statistics_last_used",
+    },
+    "get_user_report": {
+        "SCAN u USING INDEX idx_user_statistics_last_used",
+        "SCAN s USING INDEX idx_secretary_statistics_last_used",
+    },
+    "iter_user_report": {
+        "SCAN u USING INDEX idx_user_statistics_last_used",
+        "SCAN s USING INDEX idx_secretary_statistics_last_used",
+    },
+    "get_error_stats": {"SCAN error_totals"},
+    "get_all_secretary_stats": {
+        "SCAN secretary_statistics USING INDEX idx_secretary_statistics_last_used"
+    },
+    "get_all_secretary_connections": {"SCAN secretary_connections"},
+}
+
+
+async def _collect(rows: AsyncIterator[object]) -> list[object]:
+    return [row async for row in rows]
+
+
+@pytest.mark.parametrize("flush_interval", [0.0, 60.0], ids=["immediate", "write_behind"])
+async def test_no_query_scans_a_table(tmp_path: Path, flush_interval: float) -> None:
+    path = tmp_path / "stats.db"
+    db = StatisticsDB(
+        str(path), flush_interval=flush_interval, error_max_rows=100, error_max_age_days=30
+    )
+    await db.initialize()
+    assert db._db is not None
+    statements: list[str] = []
+    await db._db.set_trace_callback(statements.append)
+
+    # Exercise every query the class issues. With write-behind, queued
+    # writes run (and are checked) in the flush of the next read.
+    calls: list[tuple[str, Callable[[], Awaitable[object]]]] = [
+        ("record_usage", lambda: db.record_usage(1, "alice", 10)),
+        ("get_user_stats", lambda: db.get_user_stats(1)),
+        ("get_all_stats", db.get_all_stats),
+        ("get_all_user_ids", db.get_all_user_ids),
+        ("get_usage_window", lambda: db.get_usage_window(7)),
+        ("count_report_users", db.count_report_users),
+        ("get_user_report", lambda: db.get_user_report(0, 10)),
+        ("iter_user_report", lambda: _collect(db.iter_user_report())),
+        ("record_error", lambda: db.record_error("Transcription", "alice", "timeout")),
+        ("get_error_stats", db.get_error_stats),
+        ("get_recent_error_counts", lambda: db.get_recent_error_counts(7)),
+        ("add_pending_prompt", lambda: db.add_pending_prompt("conn", 1, 5)),
+        ("remove_pending_prompt", lambda: db.remove_pending_prompt("conn", 5)),
+        ("get_expired_pending_prompts", lambda: db.get_expired_pending_prompts(60)),
+        ("record_secretary_usage", lambda: db.record_secretary_usage(1, "alice", 10)),
+        ("get_secretary_stats", lambda: db.get_secretary_stats(1)),
+        ("get_all_secretary_stats", db.get_all_secretary_stats),
+        ("save_secretary_connection", lambda: db.save_secretary_connection(1, "conn", "a")),
+        ("get_all_secretary_connections", db.get_all_secretary_connections),
+        ("is_user_secretary_connected", lambda: db.is_user_secretary_connected(1)),
+        ("remove_secretary_connection", lambda: db.remove_secretary_connection(1)),
+        ("flush", db.flush),
+    ]
+    queries: list[tuple[str, str]] = []
+    for name, call in calls:
+        statements.clear()
+        await call()
+        queries += [
+            (name, s) for s in statements
+            if s.lstrip().split()[0].upper() in ("SELECT", "DELETE", "UPDATE")
+        ]
+    await db.close()
+
+    assert len(queries) >= 12
+    with sqlite3.connect(path) as conn:
+        for name, query in queries:
+            plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}")]
+            for step in plan:
+                if step.startswith("SCAN ") and step != "SCAN CONSTANT ROW":
+                    assert step in _FULL_READS.get(name, set()), (name, query, plan)
+                assert "TEMP B-TREE FOR ORDER BY" not in step, (name, query, plan)
+
+
+async def test_secretary_connection_check_is_in_memory(tmp_path: Path) -> None:
+    path = str(tmp_path / "stats.db")
+    db = StatisticsDB(path)
+    await db.initialize()
+    await db.save_secretary_connection(1, "conn_1", "alice")
+    await db.save_secretary_connection(2, "conn_2", "bob")
+    await db.remove_secretary_connection(2)
+    await db.close()
+
+    # The set is rebuilt from the table on startup.
+    db = StatisticsDB(path)
+    await db.initialize()
+    assert db._db is not None
+    statements: list[str] = []
+    await db._db.set_trace_callback(statements.append)
+    assert await db.is_user_secretary_connected(1)
+    assert not await db.is_user_secretary_connected(2)
+    assert statements == []
+    await db.close()
+
+
+async def test_connection_writes_wait_for_a_running_flush(tmp_path: Path) -> None:
+    db = StatisticsDB(str(tmp_path / "stats.db"), flush_interval=60)
+    await db.initialize()
+    await db.record_usage(1, "alice", 10)
+    await db.record_error("Transcription", "alice")
+    assert db._db is not None
+    statements: list[str] = []
+    await db._db.set_trace_callback(statements.append)
+
+    await asyncio.gather(db.flush(), db.save_secretary_connection(1, "conn_1", "alice"))
+
+    # The batch commits on its own; the connection row isn't slipped into it.
+    first_commit = statements.index("COMMIT")
+    assert not any("secretary_connections" in s for s in statements[:first_commit])
+    assert any("secretary_connections" in s for s in statements[first_commit:])
+    await db.close()
+
+
+async def test_usage_rollups_follow_recorded_usage(db: StatisticsDB) -> None:
+    await db.record_usage(1, "alice", 60)
+    await db.record_usage(2, "bob", 30)
+    await db.record_secretary_usage(1, "alice", 15)
+    *totals, peak_hour = await db.get_usage_window(1)
+    assert totals == [2, 90, 1, 15]
+    assert peak_hour in range(24)
+    count, duration, *_ = await db.get_usage_window(30)
+    assert (count, duration) == (2, 90)
+
+
+async def test_usage_window_excludes_older_days(tmp_path: Path) -> None:
+    path = tmp_path / "stats.db"
+    db = StatisticsDB(str(path))
+    await db.initialize()
+    with sqlite3.connect(path) as conn:
+        conn.executemany(
+            "INSERT INTO usage_daily VALUES (date('now', ?), 'direct', ?, ?)",
+            [("-0 days", 1, 10), ("-3 days", 2, 20), ("-20 days", 4, 40), ("-40 days", 8, 80)],
+        )
+        conn.executemany(
+            "INSERT INTO usage_hourly "
+            "VALUES (strftime('%Y-%m-%d ', 'now', ?) || ?, 'direct', ?, 0)",
+            [("-0 days", "09:00", 1), ("-3 days", "17:00", 2), ("-20 days", "09:00", 4)],
+        )
+    assert await db.get_usage_window(1) == (1, 10, 0, 0, 9)
+    assert await db.get_usage_window(7) == (3, 30, 0, 0, 17)
+    assert await db.get_usage_window(30) == (7, 70, 0, 0, 9)
+    await db.close()
+
+
+async def test_usage_window_empty(db: StatisticsDB) -> None:
+    assert await db.get_usage_window(7) == (0, 0, 0, 0, None)
+
+
+async def test_error_ring_is_bounded_by_rows(tmp_path: Path) -> None:
+    path = tmp_path / "stats.db"
+    db = StatisticsDB(str(path), error_max_rows=3)
+    await db.initialize()
+    for i in range(5):
+        await db.record_error("Transcription", "alice", f"failure {i}")
+    await db.record_error("Download")
+    with sqlite3.connect(path) as conn:
+        details = [r[0] for r in conn.execute("SELECT error_detail FROM error_statistics")]
+    assert details == ["failure 3", "failure 4", None]
+    # The counters keep the full history.
+    assert (await db.get_error_stats())[:2] == (6, {"Transcription": 5, "Download": 1})
+    assert await db.get_recent_error_counts(1) == {"Transcription": 5, "Download": 1}
+    await db.close()
+
+
+async def test_error_ring_is_bounded_by_age(tmp_path: Path) -> None:
+    path = tmp_path / "stats.db"
+    db = StatisticsDB(str(path), error_max_age_days=7)
+    await db.initialize()
+    await db.record_error("Transcription")
+    with sqlite3.connect(path) as conn:
+        conn.execute("UPDATE error_statistics SET created_at = datetime('now', '-8 days')")
+    await db.record_error("Download")
+    with sqlite3.connect(path) as conn:
+        types = [r[0] for r in conn.execute("SELECT error_type FROM error_statistics")]
+    assert types == ["Download"]
+    await db.close()
+
+
+async def test_user_report_merges_sources_by_last_activity(tmp_path: Path) -> None:
+    path = tmp_path / "stats.db"
+    db = StatisticsDB(str(path))
+    await db.initialize()
+    await db.record_usage(1, "both_direct_last", 10)
+    await db.record_secretary_usage(1, None, 5)
+    await db.record_usage(2, "both_secretary_last", 20)
+    await db.record_secretary_usage(2, "sec_name", 7)
+    await db.record_usage(3, "direct_only", 30)
+    await db.record_secretary_usage(4, "secretary_only", 40)
+    with sqlite3.connect(path) as conn:
+        for table, uid, ts in [
+            ("user_statistics", 1, "2025-01-05"),
+            ("secretary_statistics", 1, "2025-01-01"),
+            ("user_statistics", 2, "2025-01-01"),
+            ("secretary_statistics", 2, "2025-01-04"),
+            ("user_statistics", 3, "2025-01-03"),
+            ("secretary_statistics", 4, "2025-01-02"),
+        ]:
+            conn.execute(f"UPDATE {table} SET last_used_at = ? WHERE user_id = ?", (ts, uid))
+
+    assert await db.count_report_users() == 4
+    assert await db.get_user_report(0, 10) == [
+        (1, "both_direct_last", 1, 10, 1, 5, "2025-01-05"),
+        (2, "both_secretary_last", 1, 20, 1, 7, "2025-01-04"),
+        (3, "direct_only", 1, 30, 0, 0, "2025-01-03"),
+        (4, "secretary_only", 0, 0, 1, 40, "2025-01-02"),
+    ]
+    assert [r[0] for r in await db.get_user_report(1, 2)] == [2, 3]
+    assert [r[0] async for r in db.iter_user_report()] == [1, 2, 3, 4]
+    await db.close()
@@ -0,0 +1,77 @@
+import os
+import time
+from collections.abc import AsyncIterator
+from unittest.mock import patch
+
+import pytest
+
+from src.bot.services.transcription import WordData
+from src.bot.storage.transcript_archive import TranscriptArchive
+from src.bot.storage.transcription_store import TranscriptionStore
+
+
+@pytest.fixture
+async def archive(tmp_path: object) -> AsyncIterator[TranscriptArchive]:
+    a = TranscriptArchive(os.path.join(str(tmp_path), "archive.db"))
+    await a.initialize()
+    yield a
+    await a.close()
+
+
+async def test_put_and_get(archive: TranscriptArchive) -> None:
+    await archive.put_many([(1, 100, b"payload", time.time())])
+    assert await archive.get(1, 100) == b"payload"
+    assert await archive.get(2, 100) is None
+
+
+async def test_expired_entries_are_hidden_and_purged(archive: TranscriptArchive) -> None:
+    await archive.put_many([(1, 100, b"old", time.time() - 8 * 86400)])
+    assert await archive.get(1, 100) is None
+    assert await archive.purge_expired() == 1
+
+
+async def test_store_survives_restart(tmp_path: object) -> None:
+    path = os.path.join(str(tmp_path), "archive.db")
+    words = [WordData("Hi", 0.0, 0.4, "speaker_0"), WordData(" ", type="spacing")]
+    first = TranscriptArchive(path)
+    await first.initialize()
+    store = TranscriptionStore(ttl_seconds=600, archive=first)
+    store.save(user_id=1, message_id=100, text="Hi", words=words)
+    await store.flush()
+    await first.close()
+
+    second = TranscriptArchive(path)
+    await second.initialize()
+    try:
+        store = TranscriptionStore(ttl_seconds=600, archive=second)
+        assert store.get(user_id=1, message_id=100) is None
+        loaded = await store.load(user_id=1, message_id=100)
+        assert loaded is not None
+        text, table = loaded
+        assert text == "Hi"
+        assert list(table) == words
+        # Back in memory for the synchronous getters.
+        assert store.get(user_id=1, message_id=100) == "Hi"
+        assert store.metrics()["transcription_store_archive_hits_total"] == 1
+    finally:
+        await second.close()
+
+
+async def test_load_outlives_memory_ttl(archive: TranscriptArchive) -> None:
+    store = TranscriptionStore(ttl_seconds=1, archive=archive)
+    store.save(user_id=1, message_id=100, text="kept")
+    with patch("src.bot.storage.transcription_store.time") as mock_time:
+        mock_time.monotonic.return_value = time.monotonic() + 2
+        mock_time.time.return_value = time.time()
+        assert store.get(user_id=1, message_id=100) is None
+        # Not flushed yet: served from the pending batch.
+        loaded = await store.load(user_id=1, message_id=100)
+        assert loaded is not None and loaded[0] == "kept"
+
+
+async def test_load_without_archive_is_a_memory_lookup() -> None:
+    store = TranscriptionStore(ttl_seconds=600)
+    assert await store.load(user_id=1, message_id=100) is None
+    store.save(user_id=1, message_id=100, text="x")
+    loaded = await store.load(user_id=1, message_id=100)
+    assert loaded is not None and loaded[0] == "x"
@@ -0,0 +1,64 @@
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.bot.services.transcription import TranscriptionResult, WordData
+from src.bot.storage.transcript_cache import TranscriptCache
+
+
+@pytest.fixture
+async def cache(tmp_path: object) -> TranscriptCache:
+    c = TranscriptCache(os.path.join(str(tmp_path), "cache.db"))
+    await c.initialize()
+    yield c  # type: ignore[misc]
+    await c.close()
+
+
+async def test_put_and_get_roundtrip(cache: TranscriptCache) -> None:
+    words = [
+        WordData("Hello", 0.0, 0.5, "speaker_0"),
+        WordData(" ", None, None, None, "spacing"),
+    ]
+    await cache.put("u1", TranscriptionResult("Hello", words), duration=3)
+    cached = await cache.get("u1")
+    assert cached is not None
+    assert cached.result.text == "Hello"
+    assert cached.result.words == words
+    assert cached.duration == 3
+
+
+async def test_get_missing(cache: TranscriptCache) -> None:
+    assert await cache.get("nope") is None
+
+
+async def test_expired_entry_is_dropped(cache: TranscriptCache) -> None:
+    await cache.put("u1", TranscriptionResult("old"))
+    with patch("src.bot.storage.transcript_cache.time") as mock_time:
+        mock_time.time.return_value = time.time() + 8 * 86400
+        assert await cache.get("u1") is None
+        assert await cache.purge_expired() == 0
+
+
+async def test_purge_expired(cache: TranscriptCache) -> None:
+    await cache.put("u1", TranscriptionResult("old"))
+    with patch("src.bot.storage.transcript_cache.time") as mock_time:
+        mock_time.time.return_value = time.time() + 8 * 86400
+        assert await cache.purge_expired() == 1
+    assert await cache.get("u1") is None
+
+
+async def test_evicts_least_recently_used(tmp_path: object) -> None:
+    cache = TranscriptCache(os.path.join(str(tmp_path), "c.db"), max_bytes=25)
+    await cache.initialize()
+    await cache.put("a", TranscriptionResult("aaaaaaaaaa"))
+    await cache.put("b", TranscriptionResult("bbbbbbbbbb"))
+    # Touch "a" so "b" becomes the least recently used entry.
+    assert await cache.get("a") is not None
+    await cache.put("c", TranscriptionResult("cccccccccc"))
+
+    assert await cache.get("a") is not None
+    assert await cache.get("b") is None
+    assert await cache.get("c") is not None
+    await cache.close()
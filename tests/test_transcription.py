@@ -1,13 +1,26 @@
+import asyncio
 import os
 import tempfile
-from unittest.mock import MagicMock, patch
+import threading
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
 from src.bot.services.transcription import (
+    AsyncElevenLabsTranscriber,
+    AudioBuffer,
     ElevenLabsTranscriber,
     EmptyTranscriptionError,
+    TranscriptionExecutor,
+    TranscriptionResult,
+    WordData,
+    WordTable,
     format_diarized_transcript,
+    merge_chunk_results,
+    scale_timestamps,
+    transcribe_file,
+    transcription_slot,
 )
 
 
@@ -123,6 +136,170 @@ def test_transcribe_api_error(dummy_audio: str) -> None:
             transcriber.transcribe(dummy_audio)
 
 
+# --- Async client ---
+
+
+async def test_async_transcribe_success(dummy_audio: str) -> None:
+    with patch("src.bot.services.transcription.AsyncElevenLabs") as mock_cls:
+        mock_client = MagicMock()
+        mock_cls.return_value = mock_client
+        mock_client.speech_to_text.convert = AsyncMock(
+            return_value=_make_result(
+                "Hello", [_make_word("Hello", "speaker_0", start=0.0, end=0.5)]
+            )
+        )
+
+        transcriber = AsyncElevenLabsTranscriber(api_key="fake-key")
+        result = await transcriber.transcribe(dummy_audio)
+        await transcriber.aclose()
+
+        assert result.text == "Hello"
+        assert result.words[0].end == 0.5
+
+
+async def test_async_transcribe_uploads_buffer() -> None:
+    with patch("src.bot.services.transcription.AsyncElevenLabs") as mock_cls:
+        mock_client = MagicMock()
+        mock_cls.return_value = mock_client
+        mock_client.speech_to_text.convert = AsyncMock(
+            return_value=_make_result("Hello", [_make_word("Hello", "speaker_0")])
+        )
+
+        transcriber = AsyncElevenLabsTranscriber(api_key="fake-key")
+        result = await transcriber.transcribe(AudioBuffer(b"OggS", "voice.oga"))
+        await transcriber.aclose()
+
+        assert result.text == "Hello"
+        kwargs = mock_client.speech_to_text.convert.await_args.kwargs
+        assert kwargs["file"] == ("voice.oga", b"OggS")
+
+
+async def test_async_transcribe_api_error(dummy_audio: str) -> None:
+    with patch("src.bot.services.transcription.AsyncElevenLabs") as mock_cls:
+        mock_client = MagicMock()
+        mock_cls.return_value = mock_client
+        mock_client.speech_to_text.convert = AsyncMock(
+            side_effect=Exception("API rate limit")
+        )
+
+        transcriber = AsyncElevenLabsTranscriber(api_key="fake-key")
+        with pytest.raises(RuntimeError, match="ElevenLabs transcription failed"):
+            await transcriber.transcribe(dummy_audio)
+        await transcriber.aclose()
+
+
+async def test_async_transcribe_bounds_in_flight_jobs(dummy_audio: str) -> None:
+    in_flight = 0
+    peak = 0
+
+    async def convert(**kwargs: object) -> MagicMock:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return _make_result("Hi", [_make_word("Hi", "speaker_0")])
+
+    with patch("src.bot.services.transcription.AsyncElevenLabs") as mock_cls:
+        mock_client = MagicMock()
+        mock_cls.return_value = mock_client
+        mock_client.speech_to_text.convert = convert
+
+        transcriber = AsyncElevenLabsTranscriber(api_key="fake-key", max_concurrency=2)
+        await asyncio.gather(*(transcriber.transcribe(dummy_audio) for _ in range(6)))
+        await transcriber.aclose()
+
+    assert peak == 2
+
+
+async def test_waiting_for_a_slot_is_not_part_of_the_timeout(dummy_audio: str) -> None:
+    async def convert(**kwargs: object) -> MagicMock:
+        await asyncio.sleep(0.1)
+        return _make_result("Hi", [_make_word("Hi", "speaker_0")])
+
+    with patch("src.bot.services.transcription.AsyncElevenLabs") as mock_cls:
+        mock_client = MagicMock()
+        mock_cls.return_value = mock_client
+        mock_client.speech_to_text.convert = convert
+
+        transcriber = AsyncElevenLabsTranscriber(api_key="fake-key", max_concurrency=1)
+        executor = TranscriptionExecutor(transcriber)
+
+        async def job() -> str:
+            async with transcription_slot(executor):
+                result = await asyncio.wait_for(
+                    transcribe_file(executor, dummy_audio), timeout=0.15
+                )
+            return result.text
+
+        # Each waits up to 0.2s for the slot, but only 0.1s on the clock.
+        assert await asyncio.gather(*(job() for _ in range(3))) == ["Hi"] * 3
+        await executor.aclose()
+
+
+async def test_transcribe_file_accepts_sync_and_async_clients() -> None:
+    expected = TranscriptionResult(text="ok")
+    sync_client = MagicMock()
+    sync_client.transcribe.return_value = expected
+    async_client = MagicMock()
+    async_client.transcribe = AsyncMock(return_value=expected)
+
+    assert await transcribe_file(sync_client, "a.ogg") is expected
+    assert await transcribe_file(async_client, "a.ogg") is expected
+
+
+# --- Dedicated executor ---
+
+
+async def test_executor_counts_orphaned_blocking_calls() -> None:
+    release = threading.Event()
+
+    def slow(file_path: str) -> TranscriptionResult:
+        release.wait(5)
+        return TranscriptionResult(text="late")
+
+    client = SimpleNamespace(transcribe=slow)
+    executor = TranscriptionExecutor(client, max_workers=1)
+
+    with pytest.raises(TimeoutError):
+        await asyncio.wait_for(executor.transcribe("a.ogg"), timeout=0.05)
+    assert executor.metrics()["transcription_orphaned"] == 1
+    assert executor.metrics()["transcription_orphaned_total"] == 1
+
+    release.set()
+    for _ in range(100):
+        if executor.metrics()["transcription_orphaned"] == 0:
+            break
+        await asyncio.sleep(0.01)
+    assert executor.metrics()["transcription_orphaned"] == 0
+    assert executor.metrics()["transcription_in_flight"] == 0
+    await executor.aclose()
+
+
+async def test_executor_cancels_async_calls() -> None:
+    cancelled = asyncio.Event()
+
+    async def slow(file_path: str) -> TranscriptionResult:
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return TranscriptionResult(text="late")
+
+    client = SimpleNamespace(transcribe=slow)
+    executor = TranscriptionExecutor(client)
+
+    with pytest.raises(TimeoutError):
+        await asyncio.wait_for(executor.transcribe("a.ogg"), timeout=0.05)
+    assert cancelled.is_set()
+    assert executor.metrics()["transcription_cancelled_total"] == 1
+    # Async clients need no threads, so there is nothing to orphan.
+    assert executor._pool is None
+    assert "transcription_orphaned_total" not in executor.metrics()
+    await executor.aclose()
+
+
 # --- format_diarized_transcript unit tests ---
 
 
@@ -156,6 +333,36 @@ def test_format_multi_speaker_labels() -> None:
     assert lines[2] == "Speaker 1: back"
 
 
+def test_format_reads_word_table() -> None:
+    words = [
+        WordData("Hi", 0.0, 0.5, "speaker_0"),
+        WordData(" ", None, None, "speaker_0", "spacing"),
+        WordData("there", 0.5, 1.0, "speaker_0"),
+        WordData("Hello", 1.0, 1.5, "speaker_1"),
+    ]
+    result = TranscriptionResult("Hi there Hello", words)
+    table = TranscriptionResult("Hi there Hello", WordTable.from_words(words))  # type: ignore[arg-type]
+    assert format_diarized_transcript(table) == format_diarized_transcript(result)
+    assert format_diarized_transcript(result) == "Speaker 1: Hi there\nSpeaker 2: Hello"
+
+
+def test_word_table_round_trip() -> None:
+    words = [
+        WordData("Привет", 0.0, 0.25, "speaker_0"),
+        WordData(" ", None, None, None, "spacing"),
+        WordData("(laughs)", 0.3, None, "speaker_1", "audio_event"),
+        WordData("ok", 1.0, 1.5, "speaker_0"),
+    ]
+    table = WordTable.from_words(words)
+    assert len(table) == 4
+    assert list(table) == words
+    assert table.text_of(2) == "(laughs)"
+    assert table.speaker_ids == (None, "speaker_0", "speaker_1")
+    assert table.type_names == ("word", "spacing", "audio_event")
+    assert table.type_code("missing") == -1
+    assert WordTable.from_words(table) is table
+
+
 def test_format_three_speakers() -> None:
     words = [
         _make_word("A", "s0"),
@@ -169,3 +376,75 @@ def test_format_three_speakers() -> None:
     assert lines[0].startswith("Speaker 1:")
     assert lines[1].startswith("Speaker 2:")
     assert lines[2].startswith("Speaker 3:")
+
+
+
+# --- Chunk merging ---
+
+
+def test_merge_chunks_offsets_timestamps() -> None:
+    first = TranscriptionResult(
+        "Hello", [WordData("Hello", 0.0, 0.5, "speaker_0")]
+    )
+    second = TranscriptionResult(
+        "again", [WordData("again", 1.0, 1.5, "speaker_0")]
+    )
+    merged = merge_chunk_results([(first, 0.0), (second, 600.0)])
+    assert merged.text == "Hello again"
+    timed = [w for w in merged.words if w.type == "word"]
+    assert [(w.start, w.end) for w in timed] == [(0.0, 0.5), (601.0, 601.5)]
+
+
+def test_merge_chunks_reconciles_speakers_across_cut() -> None:
+    # The provider numbers voices per request: in chunk two the person who
+    # was speaker_1 at the end of chunk one comes back as speaker_0.
+    first = TranscriptionResult("", [
+        WordData("Question?", 0.0, 1.0, "speaker_0"),
+        WordData("Answer", 1.0, 2.0, "speaker_1"),
+    ])
+    second = TranscriptionResult("", [
+        WordData("continues", 0.0, 1.0, "speaker_0"),
+        WordData("Thanks", 1.0, 2.0, "speaker_1"),
+    ])
+    merged = merge_chunk_results([(first, 0.0), (second, 600.0)])
+    assert merged.text.split("\n") == [
+        "Speaker 1: Question?",
+        "Speaker 2: Answer continues",
+        "Speaker 1: Thanks",
+    ]
+
+
+def test_merge_chunks_skips_empty_chunks() -> None:
+    empty = TranscriptionResult("")
+    speech = TranscriptionResult("Hi", [WordData("Hi", 0.0, 0.2, "speaker_0")])
+    merged = merge_chunk_results([(empty, 0.0), (speech, 600.0)])
+    assert merged.text == "Hi"
+    assert merged.words[0].start == 600.0
+
+
+def test_merge_chunks_all_empty_raises() -> None:
+    with pytest.raises(EmptyTranscriptionError):
+        merge_chunk_results([(TranscriptionResult(""), 0.0)])
+
+
+def test_scale_timestamps_maps_sped_up_audio_back() -> None:
+    result = TranscriptionResult(
+        text="hi",
+        words=[WordData("hi", 2.0, 4.0, "speaker_0"), WordData(" ", type="spacing")],
+    )
+    scaled = scale_timestamps(result, 1.5)
+    assert scaled.text == "hi"
+    assert [(w.start, w.end) for w in scaled.words] == [(3.0, 6.0), (None, None)]
+    assert scaled.words[0].speaker_id == "speaker_0"
+    assert scale_timestamps(result, 1.0) is result
+
+
+def test_word_table_bytes_round_trip() -> None:
+    table = WordTable.from_words(
+        [
+            WordData("Grüß", 0.0, 0.4, "speaker_1"),
+            WordData(" ", None, None, None, "spacing"),
+            WordData("(laughs)", 0.5, 0.9, "speaker_0", "audio_event"),
+        ]
+    )
+    assert list(WordTable.from_bytes(table.to_bytes())) == list(table)
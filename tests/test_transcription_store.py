@@ -1,6 +1,8 @@
+import asyncio
 import time
 from unittest.mock import patch
 
+from src.bot.services.transcription import WordData, WordTable
 from src.bot.storage.transcription_store import TranscriptionStore
 
 
@@ -9,6 +11,14 @@ def test_save_and_get(store: TranscriptionStore) -> None:
     assert store.get(user_id=1, message_id=100) == "Hello world"
 
 
+def test_words_are_kept_as_word_table(store: TranscriptionStore) -> None:
+    words = [WordData("Hi", 0.0, 0.4, "speaker_0"), WordData(" ", type="spacing")]
+    store.save(user_id=1, message_id=100, text="Hi", words=words)
+    table = store.get_words(user_id=1, message_id=100)
+    assert isinstance(table, WordTable)
+    assert list(table) == words
+
+
 def test_get_missing_returns_none(store: TranscriptionStore) -> None:
     assert store.get(user_id=1, message_id=999) is None
 
@@ -36,3 +46,104 @@ def test_overwrite(store: TranscriptionStore) -> None:
     store.save(user_id=1, message_id=100, text="first")
     store.save(user_id=1, message_id=100, text="second")
     assert store.get(user_id=1, message_id=100) == "second"
+
+
+def test_save_drops_expired_entries_from_the_front() -> None:
+    s = TranscriptionStore(ttl_seconds=10)
+    start = time.monotonic()
+    with patch("src.bot.storage.transcription_store.time") as mock_time:
+        mock_time.monotonic.return_value = start
+        s.save(user_id=1, message_id=1, text="old")
+        s.save(user_id=1, message_id=2, text="older but refreshed")
+        mock_time.monotonic.return_value = start + 5
+        s.save(user_id=1, message_id=2, text="refreshed")
+        mock_time.monotonic.return_value = start + 12
+        s.save(user_id=1, message_id=3, text="new")
+        assert len(s) == 2
+        assert s.get(user_id=1, message_id=2) == "refreshed"
+
+
+def test_expired_lookup_removes_entry() -> None:
+    s = TranscriptionStore(ttl_seconds=1)
+    s.save(user_id=1, message_id=100, text="x")
+    with patch("src.bot.storage.transcription_store.time") as mock_time:
+        mock_time.monotonic.return_value = time.monotonic() + 2
+        assert s.get_words(user_id=1, message_id=100) is None
+    assert len(s) == 0
+
+
+async def test_sweeper_clears_unrequested_entries() -> None:
+    s = TranscriptionStore(ttl_seconds=0)
+    s.save(user_id=1, message_id=100, text="x")
+    time.sleep(0.001)
+    sweeper = asyncio.create_task(s.run_sweeper(interval=0.01))
+    await asyncio.sleep(0.05)
+    sweeper.cancel()
+    assert len(s) == 0
+
+
+def _words(n: int) -> list[WordData]:
+    return [WordData(f"w{i}", float(i), i + 0.5, f"speaker_{i % 2}") for i in range(n)]
+
+
+def test_idle_entries_are_compressed_and_restored() -> None:
+    s = TranscriptionStore(ttl_seconds=600, compress_after=60)
+    words = _words(200)
+    start = time.monotonic()
+    with patch("src.bot.storage.transcription_store.time") as mock_time:
+        mock_time.monotonic.return_value = start
+        s.save(user_id=1, message_id=1, text="héllo " * 200, words=words)
+        hot_bytes = s.metrics()["transcription_store_bytes"]
+        mock_time.monotonic.return_value = start + 61
+        s.sweep()
+        metrics = s.metrics()
+        assert metrics["transcription_store_compressed"] == 1
+        assert metrics["transcription_store_bytes"] < hot_bytes
+
+        assert s.get(user_id=1, message_id=1) == "héllo " * 200
+        table = s.get_words(user_id=1, message_id=1)
+        assert table is not None and list(table) == words
+        metrics = s.metrics()
+        assert metrics["transcription_store_compressed"] == 0
+        assert metrics["transcription_store_decompressions_total"] == 1
+        assert metrics["transcription_store_bytes"] == hot_bytes
+
+
+def test_budget_evicts_least_recently_used() -> None:
+    s = TranscriptionStore(ttl_seconds=600)
+    s.save(user_id=1, message_id=1, text="a", words=_words(100))
+    size = s.metrics()["transcription_store_bytes"]
+    s = TranscriptionStore(ttl_seconds=600, max_bytes=size * 2)
+    s.save(user_id=1, message_id=1, text="a", words=_words(100))
+    s.save(user_id=1, message_id=2, text="b", words=_words(100))
+    assert s.get(user_id=1, message_id=1) == "a"  # 2 is now least recently used
+    s.save(user_id=1, message_id=3, text="c", words=_words(100))
+    assert s.get(user_id=1, message_id=2) is None
+    assert s.get(user_id=1, message_id=1) == "a"
+    assert s.get(user_id=1, message_id=3) == "c"
+    metrics = s.metrics()
+    assert metrics["transcription_store_evictions_total"] == 1
+    assert metrics["transcription_store_hits_total"] == 3
+    assert metrics["transcription_store_misses_total"] == 1
+    assert metrics["transcription_store_bytes"] <= size * 2
+
+
+def test_budget_compresses_before_evicting() -> None:
+    s = TranscriptionStore(ttl_seconds=600)
+    s.save(user_id=1, message_id=1, text="a", words=_words(100))
+    size = s.metrics()["transcription_store_bytes"]
+    s = TranscriptionStore(ttl_seconds=600, max_bytes=size * 2, compress_after=600)
+    for message_id in range(1, 4):
+        s.save(user_id=1, message_id=message_id, text="x", words=_words(100))
+    metrics = s.metrics()
+    assert len(s) == 3
+    assert metrics["transcription_store_evictions_total"] == 0
+    assert metrics["transcription_store_compressed"] >= 1
+
+
+def test_oversized_entry_is_kept_alone() -> None:
+    s = TranscriptionStore(ttl_seconds=600, max_bytes=1)
+    s.save(user_id=1, message_id=1, text="a")
+    s.save(user_id=1, message_id=2, text="b")
+    assert len(s) == 1
+    assert s.get(user_id=1, message_id=2) == "b"
@@ -0,0 +1,110 @@
+import asyncio
+from datetime import UTC, datetime
+
+from telegram import Chat, Message, Update, User
+
+from src.bot.update_processor import ChatOrderedUpdateProcessor, ordering_key
+
+
+def _update(update_id: int, chat_id: int, biz_conn_id: str | None = None) -> Update:
+    chat = Chat(id=chat_id, type=Chat.PRIVATE)
+    message = Message(
+        message_id=update_id,
+        date=datetime.now(UTC),
+        chat=chat,
+        from_user=User(id=chat_id, first_name="u", is_bot=False),
+        business_connection_id=biz_conn_id,
+    )
+    if biz_conn_id is not None:
+        return Update(update_id=update_id, business_message=message)
+    return Update(update_id=update_id, message=message)
+
+
+def test_ordering_key() -> None:
+    assert ordering_key(_update(1, 10)) == (None, 10)
+    assert ordering_key(_update(2, 10, "conn")) == ("conn", 10)
+    assert ordering_key(object()) is None
+
+
+async def test_same_chat_keeps_order() -> None:
+    processor = ChatOrderedUpdateProcessor(8)
+    order: list[int] = []
+
+    async def work(n: int, delay: float) -> None:
+        await asyncio.sleep(delay)
+        order.append(n)
+
+    await asyncio.gather(
+        processor.process_update(_update(1, 10), work(1, 0.05)),
+        processor.process_update(_update(2, 10), work(2, 0)),
+    )
+    assert order == [1, 2]
+    assert processor.active_chats == 0
+
+
+async def test_different_chats_run_concurrently() -> None:
+    processor = ChatOrderedUpdateProcessor(8)
+    order: list[int] = []
+
+    async def work(n: int, delay: float) -> None:
+        await asyncio.sleep(delay)
+        order.append(n)
+
+    await asyncio.gather(
+        processor.process_update(_update(1, 10), work(1, 0.05)),
+        processor.process_update(_update(2, 20), work(2, 0)),
+    )
+    assert order == [2, 1]
+
+
+async def test_business_chats_are_separate_from_private_chat() -> None:
+    processor = ChatOrderedUpdateProcessor(8)
+    order: list[int] = []
+
+    async def work(n: int, delay: float) -> None:
+        await asyncio.sleep(delay)
+        order.append(n)
+
+    await asyncio.gather(
+        processor.process_update(_update(1, 10), work(1, 0.05)),
+        processor.process_update(_update(2, 10, "conn"), work(2, 0)),
+    )
+    assert order == [2, 1]
+
+
+async def test_busy_chat_does_not_take_every_slot() -> None:
+    processor = ChatOrderedUpdateProcessor(2)
+    done: dict[int, float] = {}
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+
+    async def work(n: int, delay: float) -> None:
+        await asyncio.sleep(delay)
+        done[n] = loop.time() - start
+
+    # Three updates from chat 10 (more than the cap), then one from chat 20.
+    await asyncio.gather(
+        *(processor.process_update(_update(n, 10), work(n, 0.1)) for n in range(3)),
+        processor.process_update(_update(99, 20), work(99, 0)),
+    )
+    assert done[99] < 0.05
+    assert done[0] < done[1] < done[2]
+    assert processor.current_concurrent_updates == 0
+
+
+async def test_cap_limits_updates_across_chats() -> None:
+    processor = ChatOrderedUpdateProcessor(2)
+    running = peak = 0
+
+    async def work() -> None:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    await asyncio.gather(
+        *(processor.process_update(_update(n, n), work()) for n in range(6))
+    )
+    assert peak == 2
+    assert processor.max_concurrent_updates == 2